@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'bosscore',
     'bossmeta',
     'bossspatialdb',
+    'bosstiles',
     'sso',
     'bossingest',
     'rest_framework_swagger',
@@ -147,5 +148,92 @@ BOSS_VERSION = 'v0.6'
 # Maximum number of bytes in an uncompressed matrix supported by the Cutout Service
 CUTOUT_MAX_SIZE = 10 ** 9
 
+# Maximum number of concurrent cutouts used to build a single tile from several channels or regions
+TILE_FETCH_MAX_WORKERS = 8
+
+# Shared cache. Production uses Redis so that invalidations reach every process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Number of seconds resolved collections, experiments and channels are cached in each process
+RESOURCE_CACHE_TTL = 300
+
+# Number of seconds bosskey to lookup key mappings are cached in each process
+LOOKUP_CACHE_TTL = 3600
+
+# Number of seconds a user's object permissions are cached in each process
+PERMISSION_CACHE_TTL = 300
+
+# Number of seconds a user's roles are cached in each process
+ROLE_CACHE_TTL = 300
+
+# Maximum page size of the resource list endpoints
+RESOURCE_LIST_MAX_LIMIT = 1000
+
+# Maximum number of resources that can be created in a single bulk request
+RESOURCE_BULK_MAX_ITEMS = 1000
+
+# Number of threads a delete job uses to remove cache entries, cuboids and metadata in parallel
+DELETE_JOB_WORKERS = 4
+
+# Number of cache keys removed per request by delete jobs
+DELETE_JOB_BATCH_SIZE = 1000
+
+# Number of seconds between the heartbeats of background jobs running in the web workers
+JOB_HEARTBEAT_INTERVAL = 60
+
+# Number of seconds without a heartbeat after which the periodic management commands restart a background job
+JOB_STALE_TIMEOUT = 600
+
+# Number of threads generating and sending the upload tasks of an ingest job
+INGEST_TASK_WORKERS = 8
+
+# Metadata backend: 'bossmeta.metadb.MetaDB' (DynamoDB) or 'bossmeta.sqlmetadb.SqlMetaDB' (Django database)
+META_BACKEND = 'bossmeta.metadb.MetaDB'
+
+# Number of seconds metadata values and key lists are cached, both in each process and in the shared cache
+META_CACHE_TTL = 300
+
+# Number of metadata entries kept in each process
+META_CACHE_MAX_ENTRIES = 10000
+
+# Maximum page size of metadata listings
+META_LIST_MAX_LIMIT = 1000
+
+# Maximum number of metadata keys in a batch request
+META_BATCH_MAX_ITEMS = 1000
+
+# Maximum number of tiles that can be returned in a single mosaic
+MOSAIC_MAX_TILES = 256
+
+# Encoder settings for image, tile and composite responses, keyed by profile and then renderer format. The profile is
+# selected with the 'profile' query argument and 'default' is used when none is given. Options are passed straight to
+# PIL, except the png 'strategy' which selects the zlib strategy (default, filtered, huffman, rle or fixed).
+TILE_ENCODER_PROFILES = {
+    'default': {
+        'png': {'compress_level': 6},
+        'jpg': {'quality': 85, 'subsampling': 0},
+        'webp': {'quality': 85, 'method': 4},
+    },
+    'fast': {
+        'png': {'compress_level': 1, 'strategy': 'rle'},
+        'jpg': {'quality': 75, 'subsampling': 2},
+        'webp': {'quality': 75, 'method': 0},
+    },
+    'small': {
+        'png': {'compress_level': 9, 'strategy': 'filtered'},
+        'jpg': {'quality': 70, 'subsampling': 2, 'optimize': True},
+        'webp': {'quality': 70, 'method': 6},
+    },
+    'lossless': {
+        'png': {'compress_level': 6},
+        'jpg': {'quality': 100, 'subsampling': 0},
+        'webp': {'lossless': True, 'quality': 50, 'method': 4},
+    },
+}
+
 # Allow all cross site origins
 CORS_ORIGIN_ALLOW_ALL = True
@@ -41,6 +41,15 @@ DATABASES = {
     }
 }
 
+# Shared cache. Holds the version counters that invalidate in-process caches in every uwsgi worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://{}:6379/{}'.format(config['aws']['cache-state'], config['aws']['cache-state-db']),
+        'KEY_PREFIX': 'boss',
+    }
+}
+
 from bossutils.aws import *
 aws_mngr = get_aws_manager()
 
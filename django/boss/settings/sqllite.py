@@ -30,4 +30,5 @@ DATABASES = {
     }
 }
 
-
+# Keep metadata in the sqlite database too
+META_BACKEND = 'bossmeta.sqlmetadb.SqlMetaDB'
@@ -61,13 +61,20 @@ urlpatterns = [
 
     # API version 0.6
     url(r'^v0.6/meta/', include('bossmeta.urls', namespace='v0.6')),
+    url(r'^v0.6/meta-batch/', include('bossmeta.batch_urls', namespace='v0.6')),
+    url(r'^v0.6/meta-search/', include('bossmeta.search_urls', namespace='v0.6')),
     url(r'^v0.6/resource/', include('bosscore.urls.resource_urls', namespace='v0.6')),
+    url(r'^v0.6/resource-bulk/', include('bosscore.urls.resource-bulk-urls', namespace='v0.6')),
+    url(r'^v0.6/resource-tree/', include('bosscore.urls.resource-tree-urls', namespace='v0.6')),
+    url(r'^v0.6/delete-job/', include('bosscore.urls.delete-job-urls', namespace='v0.6')),
     url(r'^v0.6/permission/', include('bosscore.urls.permission-urls', namespace='v0.6')),
     url(r'^v0.6/group/', include('bosscore.urls.group-urls', namespace='v0.6')),
     url(r'^v0.6/group-member/', include('bosscore.urls.group-member-urls', namespace='v0.6')),
     url(r'^v0.6/cutout/', include('bossspatialdb.urls', namespace='v0.6')),
     url(r'^v0.6/image/', include('bosstiles.image_urls', namespace='v0.6')),
     url(r'^v0.6/tile/', include('bosstiles.tile_urls', namespace='v0.6')),
+    url(r'^v0.6/composite/', include('bosstiles.composite_urls', namespace='v0.6')),
+    url(r'^v0.6/mosaic/', include('bosstiles.mosaic_urls', namespace='v0.6')),
     url(r'^v0.6/sso/user/', include('sso.urls.user-urls', namespace='v0.6')),
     url(r'^v0.6/sso/user-role/', include('sso.urls.user-role-urls', namespace='v0.6')),
     url(r'^v0.6/ingest/', include('bossingest.urls', namespace='v0.6')),
@@ -0,0 +1,193 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from rest_framework.response import Response
+
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from .error import BossError, ErrorCodes
+from .models import BossAcl, Collection, CoordinateFrame, Experiment, ChannelLayer
+
+# Permission that makes a resource visible in resource lists
+READ_PERMISSION = 'read'
+
+
+def set_readable(content_type, object_id, readable, group=None, user=None):
+    """
+    Record whether a group or user can read a resource
+
+    Args:
+        content_type: ContentType of the resource
+        object_id: Primary key of the resource
+        readable: True if the read permission was granted, False if it was removed
+        group: Group the permission applies to
+        user: User the permission applies to
+
+    Returns:
+        None
+    """
+    BossAcl.objects.update_or_create(group=group, user=user, content_type=content_type, object_id=int(object_id),
+                                     defaults={'readable': readable})
+
+
+def add_readable(rows):
+    """
+    Record read permissions for many groups in one insert
+
+    Used by bulk permission grants, which do not send model signals.
+
+    Args:
+        rows: Iterable of (group, content type, object id) tuples
+
+    Returns:
+        None
+    """
+    rows = {(group.pk, content_type.pk, int(object_id)) for group, content_type, object_id in rows}
+    if not rows:
+        return
+
+    with transaction.atomic():
+        existing = BossAcl.objects.filter(user=None, group_id__in={row[0] for row in rows},
+                                          content_type_id__in={row[1] for row in rows},
+                                          object_id__in={row[2] for row in rows})
+        unreadable = []
+        for pk, group_id, content_type_id, object_id, readable in existing.values_list(
+                'pk', 'group_id', 'content_type_id', 'object_id', 'readable'):
+            if (group_id, content_type_id, object_id) in rows:
+                rows.discard((group_id, content_type_id, object_id))
+                if not readable:
+                    unreadable.append(pk)
+
+        BossAcl.objects.filter(pk__in=unreadable).update(readable=True)
+        BossAcl.objects.bulk_create([BossAcl(group_id=group_id, content_type_id=content_type_id, object_id=object_id)
+                                     for group_id, content_type_id, object_id in rows])
+
+
+def rebuild():
+    """
+    Rebuild the ACL index from the guardian read permissions
+
+    Returns:
+        int: Number of readable entries in the index
+    """
+    rows = []
+    for model, owner in ((GroupObjectPermission, 'group_id'), (UserObjectPermission, 'user_id')):
+        perms = model.objects.filter(permission__codename=READ_PERMISSION)
+        for owner_id, content_type_id, object_pk in perms.values_list(owner, 'content_type_id', 'object_pk'):
+            rows.append(BossAcl(content_type_id=content_type_id, object_id=int(object_pk), **{owner: owner_id}))
+
+    with transaction.atomic():
+        BossAcl.objects.all().delete()
+        BossAcl.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def get_readable(user, model):
+    """
+    Get all resources of a type that a user can read
+
+    Args:
+        user: User
+        model: Resource model class
+
+    Returns:
+        QuerySet: Readable resources ordered by primary key
+    """
+    queryset = model.objects.all()
+    if not user.is_superuser:
+        content_type = ContentType.objects.get_for_model(model)
+        readable = BossAcl.objects.filter(content_type=content_type, readable=True)\
+            .filter(Q(user_id=user.pk) | Q(group__user=user.pk)).values('object_id')
+        queryset = queryset.filter(pk__in=readable)
+    return queryset.order_by('pk')
+
+
+def paginated_response(queryset, request, serializer_class):
+    """
+    Serialize one page of a resource list
+
+    Pages are selected with the 'limit' and 'after' query arguments. 'after' is the cursor returned in the
+    X-Next-Cursor header of the previous page. Without a limit the complete list is returned.
+
+    Args:
+        queryset: QuerySet ordered by primary key
+        request: DRF request
+        serializer_class: Serializer for the resources
+
+    Returns:
+        Response: Serialized resources, with an X-Next-Cursor header if there are more pages
+    """
+    try:
+        limit = request.query_params.get('limit')
+        after = request.query_params.get('after')
+        if after:
+            queryset = queryset.filter(pk__gt=int(after))
+        if limit:
+            limit = int(limit)
+            if not 0 < limit <= settings.RESOURCE_LIST_MAX_LIMIT:
+                raise ValueError
+    except ValueError:
+        return BossError("Invalid pagination arguments. limit must be between 1 and {} and after must be a cursor"
+                         .format(settings.RESOURCE_LIST_MAX_LIMIT), ErrorCodes.INVALID_URL).to_http()
+
+    if not limit:
+        return Response(serializer_class(queryset, many=True).data)
+
+    # Fetch one extra row to find out if there is another page
+    page = list(queryset[:limit + 1])
+    response = Response(serializer_class(page[:limit], many=True).data)
+    if len(page) > limit:
+        response['X-Next-Cursor'] = str(page[limit - 1].pk)
+    return response
+
+
+def update_group_permission(sender, instance, **kwargs):
+    """
+    Signal handler that keeps the index in sync with group object permissions
+    """
+    if instance.permission.codename == READ_PERMISSION:
+        set_readable(instance.content_type, instance.object_pk, 'created' in kwargs, group=instance.group)
+
+
+def update_user_permission(sender, instance, **kwargs):
+    """
+    Signal handler that keeps the index in sync with user object permissions
+    """
+    if instance.permission.codename == READ_PERMISSION:
+        set_readable(instance.content_type, instance.object_pk, 'created' in kwargs, user=instance.user)
+
+
+def delete_resource(sender, instance, **kwargs):
+    """
+    Signal handler that removes a deleted resource from the index
+    """
+    BossAcl.objects.filter(content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk).delete()
+
+
+def connect_signals():
+    """
+    Keep the index in sync when read permissions are granted or removed and when resources are deleted
+
+    Returns:
+        None
+    """
+    post_save.connect(update_group_permission, sender=GroupObjectPermission, dispatch_uid='acl-group-save')
+    post_delete.connect(update_group_permission, sender=GroupObjectPermission, dispatch_uid='acl-group-delete')
+    post_save.connect(update_user_permission, sender=UserObjectPermission, dispatch_uid='acl-user-save')
+    post_delete.connect(update_user_permission, sender=UserObjectPermission, dispatch_uid='acl-user-delete')
+    for model in (Collection, CoordinateFrame, Experiment, ChannelLayer):
+        post_delete.connect(delete_resource, sender=model, dispatch_uid='acl-delete-{}'.format(model.__name__))
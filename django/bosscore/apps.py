@@ -17,3 +17,11 @@ from django.apps import AppConfig
 
 class BosscoreConfig(AppConfig):
     name = 'bosscore'
+
+    def ready(self):
+        from . import acl, lookup, permissions, privileges, resolver
+        acl.connect_signals()
+        lookup.connect_signals()
+        permissions.connect_signals()
+        privileges.connect_signals()
+        resolver.connect_signals()
@@ -0,0 +1,339 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class VersionedTTLCache(object):
+    """
+    In-process cache with a time to live that is invalidated across processes by a shared version counter
+
+    Entries are kept in a dictionary local to the process. The version counter lives in the default Django cache
+    (Redis in production) so that invalidate() in any process clears the entries of every process on their next
+    lookup. Entries also expire after ttl seconds, which bounds staleness if the shared cache is unavailable.
+
+    Cached values are shared between requests and must be treated as read only.
+    """
+
+    def __init__(self, namespace, ttl, max_entries=10000):
+        """
+        Args:
+            namespace (str): Name of the cache. Used to build the key of the shared version counter.
+            ttl (int): Number of seconds an entry is valid for
+            max_entries (int): Number of entries after which the cache is cleared
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def version_key(self):
+        return 'cache-version:{}'.format(self.namespace)
+
+    def get_version(self):
+        """
+        Get the shared version counter, which changes every time the cache is invalidated in any process
+
+        Returns:
+            int: Current version, 0 if the cache has never been invalidated
+        """
+        return cache.get(self.version_key, 0)
+
+    def _check_version(self):
+        """
+        Clear the local entries if another process has invalidated the cache
+
+        Returns:
+            None
+        """
+        version = self.get_version()
+        if version != self._version:
+            with self._lock:
+                self._entries.clear()
+                self._version = version
+
+    def get(self, key, default=None):
+        """
+        Get an entry from the cache
+
+        Args:
+            key: Hashable key of the entry
+            default: Value returned if the entry is missing or expired
+
+        Returns:
+            The cached value or default
+        """
+        self._check_version()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            return default
+        return entry[1]
+
+    def get_many(self, keys):
+        """
+        Get several entries from the cache
+
+        Args:
+            keys (iterable): Hashable keys of the entries
+
+        Returns:
+            (dict): The cached values of the keys that were found
+        """
+        self._check_version()
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                found[key] = entry[1]
+        return found
+
+    def set(self, key, value):
+        """
+        Add an entry to the cache
+
+        Args:
+            key: Hashable key of the entry
+            value: Value to cache
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.time() + self.ttl, value)
+
+    def delete(self, key):
+        """
+        Remove an entry from the cache of this process only
+
+        Args:
+            key: Hashable key of the entry
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self):
+        """
+        Clear the cache in every process
+
+        Returns:
+            None
+        """
+        if cache.add(self.version_key, 1, timeout=None):
+            version = 1
+        else:
+            try:
+                version = cache.incr(self.version_key)
+            except ValueError:
+                # The counter was evicted between add() and incr()
+                version = 1
+                cache.set(self.version_key, version, timeout=None)
+
+        with self._lock:
+            self._entries.clear()
+            self._version = version
+
+
+class GenerationalLRUCache(object):
+    """
+    Two tier read-through cache whose entries are invalidated one group at a time
+
+    Every entry belongs to a group, such as the metadata of one resource. Each group has a generation counter in the
+    default Django cache and writes to a group increment it, which orphans all of the group's entries in every
+    process without touching other groups. Values are kept in a least recently used dictionary local to the process
+    and in the Django cache (Redis in production), so a value loaded by one process is reused by the others. Both
+    tiers expire entries after ttl seconds.
+
+    Cached values are shared between requests and must be treated as read only.
+    """
+
+    def __init__(self, namespace, ttl, max_entries=10000):
+        """
+        Args:
+            namespace (str): Name of the cache. Used to build the keys stored in the shared cache.
+            ttl (int): Number of seconds an entry is valid for
+            max_entries (int): Number of entries kept in each process before the least recently used is evicted
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _generation_key(self, group):
+        return 'cache-generation:{}:{}'.format(self.namespace, hashlib.sha1(group.encode()).hexdigest())
+
+    def _value_key(self, group, key, generation):
+        digest = hashlib.sha1('{}\0{}'.format(group, key).encode()).hexdigest()
+        return 'cache-value:{}:{}:{}'.format(self.namespace, digest, generation)
+
+    def get_or_load(self, group, key, load):
+        """
+        Get an entry, loading and caching it if it is missing from both tiers
+
+        Args:
+            group (str): Group of the entry
+            key (str): Key of the entry within the group
+            load (callable): Function without arguments that returns the value. None values are cached too.
+
+        Returns:
+            The cached or loaded value
+        """
+        generation = cache.get(self._generation_key(group), 0)
+        local_key = (group, key)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(local_key)
+            if entry is not None and entry[0] == generation and entry[1] >= now:
+                self._entries.move_to_end(local_key)
+                return entry[2]
+
+        # Values are wrapped so a cached None can be told apart from a miss
+        value_key = self._value_key(group, key, generation)
+        wrapped = cache.get(value_key)
+        if wrapped is None:
+            wrapped = (load(),)
+            cache.set(value_key, wrapped, timeout=self.ttl)
+
+        self._store(local_key, generation, now, wrapped[0])
+        return wrapped[0]
+
+    def get_many_or_load(self, entries, load):
+        """
+        Get several entries, loading the ones missing from both tiers with a single call
+
+        Args:
+            entries (list[(str, str)]): (group, key) of the entries
+            load (callable): Function that takes the list of missing (group, key) and returns a dict of their values.
+                Entries left out of the dict are not cached.
+
+        Returns:
+            (dict): Values keyed by (group, key), without the entries that could not be loaded
+        """
+        generation_keys = {entry: self._generation_key(entry[0]) for entry in entries}
+        stored = cache.get_many(list(generation_keys.values()))
+        generations = {entry: stored.get(key, 0) for entry, key in generation_keys.items()}
+        now = time.time()
+
+        found = {}
+        with self._lock:
+            for entry in entries:
+                local = self._entries.get(entry)
+                if local is not None and local[0] == generations[entry] and local[1] >= now:
+                    self._entries.move_to_end(entry)
+                    found[entry] = local[2]
+
+        value_keys = {entry: self._value_key(entry[0], entry[1], generations[entry])
+                      for entry in entries if entry not in found}
+        shared = {}
+        if value_keys:
+            stored = cache.get_many(list(value_keys.values()))
+            shared = {entry: stored[key][0] for entry, key in value_keys.items() if key in stored}
+
+        missing = [entry for entry in value_keys if entry not in shared]
+        loaded = load(missing) if missing else {}
+        if loaded:
+            cache.set_many({value_keys[entry]: (value,) for entry, value in loaded.items()}, timeout=self.ttl)
+
+        for entry, value in list(shared.items()) + list(loaded.items()):
+            self._store(entry, generations[entry], now, value)
+            found[entry] = value
+        return found
+
+    def set(self, group, key, value):
+        """
+        Add an entry to both tiers, for values loaded as a side effect of loading another entry
+
+        Args:
+            group (str): Group of the entry
+            key (str): Key of the entry within the group
+            value: Value to cache
+
+        Returns:
+            None
+        """
+        generation = cache.get(self._generation_key(group), 0)
+        cache.set(self._value_key(group, key, generation), (value,), timeout=self.ttl)
+        self._store((group, key), generation, time.time(), value)
+
+    def _store(self, local_key, generation, now, value):
+        with self._lock:
+            self._entries[local_key] = (generation, now + self.ttl, value)
+            self._entries.move_to_end(local_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_generation(self, group):
+        """
+        Get the generation of a group, which changes every time the group is invalidated in any process
+
+        Args:
+            group (str): Group
+
+        Returns:
+            int: Current generation, 0 if the group has never been invalidated
+        """
+        return cache.get(self._generation_key(group), 0)
+
+    def invalidate(self, group):
+        """
+        Invalidate the entries of a group in every process
+
+        Call after the underlying data has been written, so a concurrent load cannot cache the old value under the
+        new generation.
+
+        Args:
+            group (str): Group to invalidate
+
+        Returns:
+            None
+        """
+        self.invalidate_many([group])
+
+    def invalidate_many(self, groups):
+        """
+        Invalidate the entries of several groups in every process
+
+        Args:
+            groups (iterable): Groups to invalidate
+
+        Returns:
+            None
+        """
+        groups = set(groups)
+        for group in groups:
+            generation_key = self._generation_key(group)
+            if not cache.add(generation_key, 1, timeout=None):
+                try:
+                    cache.incr(generation_key)
+                except ValueError:
+                    # The counter was evicted between add() and incr()
+                    cache.set(generation_key, 1, timeout=None)
+
+        with self._lock:
+            for local_key in [local_key for local_key in self._entries if local_key[0] in groups]:
+                del self._entries[local_key]
@@ -0,0 +1,278 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from boto3.dynamodb.conditions import Attr
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from bossspatialdb.versioning import VERSION_PREFIX, MODIFIED_PREFIX, GENERATION_PREFIX, INGEST_PREFIX
+from bossutils.aws import get_session
+from bossutils.logger import BossLogger
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from .jobs import Heartbeat
+from .lookup import LookUpKey
+from .models import BossLookup, Collection, Experiment, ChannelLayer, DeleteJob
+
+# Maximum number of keys S3 deletes in one request
+S3_DELETE_BATCH = 1000
+
+# Prefixes of the cuboid cache keys. Every key is "<prefix>&<lookup key>&..."
+CACHE_KEY_PREFIXES = ['CACHED-CUBOID', 'WRITE-CUBOID']
+
+# Prefixes of the cache state keys. Every key is "<prefix>&<lookup key>&..."
+STATE_KEY_PREFIXES = ['PAGE-OUT', 'DELAYED-WRITE', VERSION_PREFIX, MODIFIED_PREFIX]
+
+# Prefixes of the cache state keys that hold a whole channel or layer. Every key is "<prefix>&<lookup key>"
+STATE_CHANNEL_KEY_PREFIXES = [GENERATION_PREFIX, INGEST_PREFIX]
+
+
+def start_delete_job(user, resource, collection_name, experiment_name=None, channel_layer_name=None):
+    """
+    Hide a resource from requests and queue a background job that removes it
+
+    The job starts in a thread of the web worker once the current transaction commits. The run_delete_jobs
+    management command must be scheduled to run periodically to restart jobs whose worker was restarted.
+
+    Args:
+        user: User deleting the resource
+        resource: Collection, Experiment or ChannelLayer to delete
+        collection_name (str): Collection name
+        experiment_name (str): Experiment name, if deleting an experiment or a channel or layer
+        channel_layer_name (str): Channel or layer name, if deleting a channel or layer
+
+    Returns:
+        DeleteJob: The queued job
+    """
+    # Saving sends the signals that clear the resource cache in every process
+    resource.deleting = True
+    resource.save(update_fields=['deleting'])
+
+    job = DeleteJob.objects.create(creator=user, collection_name=collection_name, experiment_name=experiment_name,
+                                   channel_layer_name=channel_layer_name)
+    transaction.on_commit(lambda: threading.Thread(target=run_delete_job, args=(job.pk,), daemon=True).start())
+    return job
+
+
+def get_resource(job):
+    """
+    Get the resource a job deletes
+
+    Args:
+        job (DeleteJob): Delete job
+
+    Returns:
+        Collection, Experiment or ChannelLayer
+    """
+    if job.channel_layer_name:
+        return ChannelLayer.objects.get(name=job.channel_layer_name, experiment__name=job.experiment_name,
+                                        experiment__collection__name=job.collection_name, deleting=True)
+    elif job.experiment_name:
+        return Experiment.objects.get(name=job.experiment_name, collection__name=job.collection_name, deleting=True)
+    else:
+        return Collection.objects.get(name=job.collection_name, deleting=True)
+
+
+def get_redis_clients():
+    """
+    Get clients for the cuboid cache and the cache state databases
+
+    Returns:
+        (list[(redis.StrictRedis, list[str], list[str])]): Clients, the prefixes of the keys they hold per cuboid and
+        the prefixes of the keys they hold per channel or layer
+    """
+    return [(redis.StrictRedis(host=settings.KVIO_SETTINGS['cache_host'], db=settings.KVIO_SETTINGS['cache_db']),
+             CACHE_KEY_PREFIXES, []),
+            (redis.StrictRedis(host=settings.STATEIO_CONFIG['cache_state_host'],
+                               db=settings.STATEIO_CONFIG['cache_state_db']),
+             STATE_KEY_PREFIXES, STATE_CHANNEL_KEY_PREFIXES)]
+
+
+def delete_cache_entries(lookup_key):
+    """
+    Delete the cached cuboids and the cache state of a channel or layer
+
+    Keys are matched on a known prefix followed by the full lookup key, so the keys of channels whose lookup key
+    contains this one are left alone.
+
+    Args:
+        lookup_key (str): Lookup key of the channel or layer
+
+    Returns:
+        int: Number of keys deleted
+    """
+    count = 0
+    for client, prefixes, channel_prefixes in get_redis_clients():
+        for prefix in prefixes:
+            batch = []
+            pattern = '{}&{}&*'.format(prefix, lookup_key)
+            for key in client.scan_iter(match=pattern, count=settings.DELETE_JOB_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) == settings.DELETE_JOB_BATCH_SIZE:
+                    count += client.delete(*batch)
+                    batch = []
+            if batch:
+                count += client.delete(*batch)
+        if channel_prefixes:
+            count += client.delete(*['{}&{}'.format(prefix, lookup_key) for prefix in channel_prefixes])
+    return count
+
+
+def get_object_lookup_key(object_key):
+    """
+    Get the lookup key of a cuboid object
+
+    Object keys have the form "<hash>&<lookup key>&<resolution>&<time sample>&<morton id>".
+
+    Args:
+        object_key (str): Key of the cuboid object
+
+    Returns:
+        str: Lookup key of the channel or layer the cuboid belongs to
+    """
+    return '&'.join(object_key.split('&')[1:-3])
+
+
+def delete_object_segment(lookup_key, segment, total_segments):
+    """
+    Delete the cuboids of a channel or layer found in one segment of a parallel scan of the object index
+
+    Args:
+        lookup_key (str): Lookup key of the channel or layer
+        segment (int): Segment to scan
+        total_segments (int): Number of segments the index is scanned in
+
+    Returns:
+        int: Number of objects deleted
+    """
+    session = get_session()
+    s3 = session.client('s3')
+    index = session.resource('dynamodb').Table(settings.OBJECTIO_CONFIG['s3_index_table'])
+    bucket = settings.OBJECTIO_CONFIG['cuboid_bucket']
+
+    count = 0
+    scan_args = {'Segment': segment,
+                 'TotalSegments': total_segments,
+                 'ProjectionExpression': '#ok, #vn',
+                 'ExpressionAttributeNames': {'#ok': 'object-key', '#vn': 'version-node'},
+                 'FilterExpression': Attr('object-key').contains('&{}&'.format(lookup_key))}
+    while True:
+        response = index.scan(**scan_args)
+        # The filter also matches lookup keys that end with this one, so compare the full lookup key
+        items = [item for item in response.get('Items', [])
+                 if get_object_lookup_key(item['object-key']) == lookup_key]
+        for start in range(0, len(items), S3_DELETE_BATCH):
+            batch = items[start:start + S3_DELETE_BATCH]
+            s3.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': item['object-key']} for item in batch],
+                                                      'Quiet': True})
+            with index.batch_writer() as writer:
+                for item in batch:
+                    writer.delete_item(Key={'object-key': item['object-key'], 'version-node': item['version-node']})
+        count += len(items)
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return count
+
+
+def delete_objects(lookup_key):
+    """
+    Delete the cuboids of a channel or layer from the object store, together with their index entries
+
+    The object index is keyed by object key only, so it is scanned in DELETE_JOB_WORKERS parallel segments.
+
+    Args:
+        lookup_key (str): Lookup key of the channel or layer
+
+    Returns:
+        int: Number of objects deleted
+    """
+    segments = settings.DELETE_JOB_WORKERS
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        return sum(executor.map(lambda segment: delete_object_segment(lookup_key, segment, segments),
+                                range(segments)))
+
+
+def delete_metadata(lookup_key):
+    """
+    Delete the metadata of a resource
+
+    Args:
+        lookup_key (str): Lookup key of the resource
+
+    Returns:
+        int: Number of metadata items deleted
+    """
+    from bossmeta.metadb import get_metadb
+    return get_metadb().delete_meta_keys(lookup_key)
+
+
+def run_delete_job(job_id):
+    """
+    Remove the stored data and the database rows of a resource
+
+    The cache entries, stored cuboids and metadata are removed in parallel. The resource, its permissions and its
+    lookup key are only deleted once all the data is gone, so a failed job can be run again.
+
+    Args:
+        job_id (int): Primary key of the DeleteJob
+
+    Returns:
+        None
+    """
+    log = BossLogger().logger
+    job = DeleteJob.objects.get(pk=job_id)
+    try:
+        with Heartbeat(DeleteJob, job_id):
+            resource = get_resource(job)
+            boss_key = '&'.join(name for name in (job.collection_name, job.experiment_name, job.channel_layer_name)
+                                if name)
+            lookup_key = LookUpKey.get_lookup_key(boss_key).lookup_key
+
+            steps = [delete_metadata]
+            if isinstance(resource, ChannelLayer):
+                steps += [delete_cache_entries, delete_objects]
+
+            DeleteJob.objects.filter(pk=job_id).update(status=1, total_steps=len(steps), completed_steps=0, message='')
+
+            def run_step(step):
+                try:
+                    return step(lookup_key)
+                finally:
+                    DeleteJob.objects.filter(pk=job_id).update(completed_steps=F('completed_steps') + 1)
+                    connection.close()
+
+            with ThreadPoolExecutor(max_workers=settings.DELETE_JOB_WORKERS) as executor:
+                for step, count in zip(steps, executor.map(run_step, steps)):
+                    log.info("Delete job {}: {} removed {} items".format(job_id, step.__name__, count))
+
+            with transaction.atomic():
+                content_type = ContentType.objects.get_for_model(resource)
+                for model in (GroupObjectPermission, UserObjectPermission):
+                    model.objects.filter(content_type=content_type, object_pk=str(resource.pk)).delete()
+                resource.delete()
+                BossLookup.objects.filter(boss_key=boss_key).delete()
+                DeleteJob.objects.filter(pk=job_id).update(status=2, end_date=timezone.now())
+
+    except Exception as err:
+        log.error("Delete job {} failed: {}".format(job_id, err))
+        DeleteJob.objects.filter(pk=job_id).update(status=3, end_date=timezone.now(), message=str(err))
+    finally:
+        connection.close()
@@ -55,6 +55,7 @@ class ErrorCodes(IntEnum):
     # Already exists
     GROUP_EXISTS = 6001
     RESOURCE_EXISTS = 6002
+    VERSION_CONFLICT = 6003
 
     # SSO Errors
     KEYCLOAK_EXCEPTION = 7001
@@ -89,6 +90,7 @@ RESP_CODES = {
     ErrorCodes.DESERIALIZATION_ERROR: 404,
     ErrorCodes.GROUP_EXISTS: 404,
     ErrorCodes.RESOURCE_EXISTS: 404,
+    ErrorCodes.VERSION_CONFLICT: 409,
     ErrorCodes.KEYCLOAK_EXCEPTION: 500,
     ErrorCodes.INVALID_ROLE: 403,
     ErrorCodes.FUTURE: 404,
@@ -0,0 +1,75 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Heartbeat(object):
+    """
+    Context manager that records a background job is alive by updating its heartbeat_date every
+    JOB_HEARTBEAT_INTERVAL seconds
+
+    Jobs run in threads of the web workers, which are killed when a worker is restarted. The heartbeat lets the
+    periodic management commands tell a running job from an interrupted one.
+
+    Args:
+        model: Job model with a heartbeat_date field
+        job_id (int): Primary key of the job
+    """
+
+    def __init__(self, model, job_id):
+        self.jobs = model.objects.filter(pk=job_id)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def beat(self):
+        self.jobs.update(heartbeat_date=timezone.now())
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                self.beat()
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.beat()
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stopped.set()
+        self.thread.join()
+
+
+def filter_stale(jobs, timeout=None):
+    """
+    Filter jobs down to those whose heartbeat stopped, or that never started, more than timeout seconds ago
+
+    Args:
+        jobs (QuerySet): Jobs with heartbeat_date and start_date fields
+        timeout (int): Seconds without a heartbeat. Defaults to JOB_STALE_TIMEOUT
+
+    Returns:
+        QuerySet: Jobs that are not running
+    """
+    if timeout is None:
+        timeout = settings.JOB_STALE_TIMEOUT
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return jobs.filter(Q(heartbeat_date__lt=cutoff) | Q(heartbeat_date__isnull=True, start_date__lt=cutoff))
@@ -12,10 +12,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+
+from .caching import GenerationalLRUCache
 from .serializers import BossLookupSerializer
 from .models import BossLookup
 from .error import BossError
 
+# BossLookup objects. Every bosskey and every lookup key is its own group, so saving or deleting a lookup only
+# invalidates the entries of that lookup.
+LOOKUP_CACHE = GenerationalLRUCache('lookup', settings.LOOKUP_CACHE_TTL)
+
+
+def _entry(field, value):
+    """
+    Get the cache entry of a lookup
+
+    Args:
+        field (str): 'boss_key' or 'lookup_key'
+        value (str): Bosskey or lookup key
+
+    Returns:
+        (str, str): Group and key of the entry
+    """
+    return '{}:{}'.format(field, value), ''
+
 
 class LookUpKey:
     """
@@ -47,8 +69,66 @@ class LookUpKey:
                        }
         serializer = BossLookupSerializer(data=lookup_data)
         if serializer.is_valid():
-            serializer.save()
+            LookUpKey._cache(serializer.save())
 
+    @staticmethod
+    def add_lookups(lookups):
+        """
+        Add the lookup keys of many data model objects with a single insert
+
+        Args:
+            lookups: Iterable of (lookup_key, boss_key, collection_name, experiment_name, channel_layer_name) tuples.
+                The experiment and channel or layer names are None for objects higher in the hierarchy.
+
+        Returns: None
+
+        """
+        BossLookup.objects.bulk_create([BossLookup(lookup_key=lookup_key, boss_key=boss_key,
+                                                   collection_name=collection_name, experiment_name=experiment_name,
+                                                   channel_layer_name=channel_layer_name)
+                                        for lookup_key, boss_key, collection_name, experiment_name, channel_layer_name
+                                        in lookups])
+        # Missing lookups are never cached, so the new lookups do not invalidate anything
+
+    @staticmethod
+    def _cache(lookup_obj):
+        """
+        Add a lookup to the cache in both directions
+        Args:
+            lookup_obj: BossLookup object
+
+        Returns: None
+
+        """
+        LOOKUP_CACHE.set(*_entry('boss_key', lookup_obj.boss_key), value=lookup_obj)
+        LOOKUP_CACHE.set(*_entry('lookup_key', lookup_obj.lookup_key), value=lookup_obj)
+
+    @staticmethod
+    def _get_many(field, values):
+        """
+        Get lookups by bosskey or by lookup key with at most one query
+
+        Lookups loaded from the database are also cached in the other direction.
+        Args:
+            field: 'boss_key' or 'lookup_key'
+            values: Bosskeys or lookup keys
+
+        Returns:
+            dict : BossLookup objects keyed by value. Values without a lookup are left out.
+
+        """
+        entries = {_entry(field, value): value for value in values}
+        other_field = 'lookup_key' if field == 'boss_key' else 'boss_key'
+
+        def load(missing):
+            loaded = {}
+            for lookup_obj in BossLookup.objects.filter(**{field + '__in': [entries[entry] for entry in missing]}):
+                LOOKUP_CACHE.set(*_entry(other_field, getattr(lookup_obj, other_field)), value=lookup_obj)
+                loaded[_entry(field, getattr(lookup_obj, field))] = lookup_obj
+            return loaded
+
+        return {entries[entry]: lookup_obj
+                for entry, lookup_obj in LOOKUP_CACHE.get_many_or_load(list(entries), load).items()}
 
     @staticmethod
     def get_lookup_key(bkey):
@@ -60,10 +140,60 @@ class LookUpKey:
         Returns:
             Lookup key
 
+        Raises:
+            BossLookup.DoesNotExist: If there is no lookup for the bosskey
+
         """
-        lookup_obj = BossLookup.objects.get(boss_key=bkey)
+        lookup_obj = LookUpKey._get_many('boss_key', [bkey]).get(bkey)
+        if lookup_obj is None:
+            raise BossLookup.DoesNotExist("No lookup for the bosskey {}".format(bkey))
         return lookup_obj
 
+    @staticmethod
+    def get_lookup_keys(bkeys):
+        """
+        Get the lookup keys for several bosskeys with at most one query
+        Args:
+            bkeys: List of bosskeys
+
+        Returns:
+            dict : BossLookup objects keyed by bosskey. Bosskeys without a lookup are left out.
+
+        """
+        return LookUpKey._get_many('boss_key', bkeys)
+
+    @staticmethod
+    def get_boss_key(lkey):
+        """
+        Get the bosskey for a lookup key
+        Args:
+            lkey: Lookup key
+
+        Returns:
+            BossLookup object for the lookup key
+
+        Raises:
+            BossLookup.DoesNotExist: If the lookup key does not exist
+
+        """
+        lookup_obj = LookUpKey._get_many('lookup_key', [lkey]).get(lkey)
+        if lookup_obj is None:
+            raise BossLookup.DoesNotExist("No lookup for the lookup key {}".format(lkey))
+        return lookup_obj
+
+    @staticmethod
+    def get_boss_keys(lkeys):
+        """
+        Get the bosskeys for several lookup keys with at most one query
+        Args:
+            lkeys: List of lookup keys
+
+        Returns:
+            dict : BossLookup objects keyed by lookup key. Lookup keys without a lookup are left out.
+
+        """
+        return LookUpKey._get_many('lookup_key', lkeys)
+
     @staticmethod
     def delete_lookup_key(collection, experiment=None, channel_layer=None):
         """
@@ -118,7 +248,32 @@ class LookUpKey:
                        'channel_layer_name': channel_layer_name
                        }
         lookup_obj = BossLookup.objects.get(lookup_key=lookup_key)
+        old_boss_key = lookup_obj.boss_key
         serializer = BossLookupSerializer(lookup_obj, data=lookup_data, partial=True)
 
         if serializer.is_valid():
-            serializer.save()
\ No newline at end of file
+            serializer.save()
+            # The save signal only knows the new bosskey
+            LOOKUP_CACHE.invalidate(_entry('boss_key', old_boss_key)[0])
+
+
+def invalidate_lookups(sender, instance, **kwargs):
+    """
+    Signal handler that invalidates the cache entries of a lookup in every process when it is saved or deleted
+
+    A renamed resource keeps its lookup key under a new bosskey and a resource created with the name of a deleted one
+    gets a new lookup key, so stale entries must not survive in any process.
+    """
+    LOOKUP_CACHE.invalidate(_entry('boss_key', instance.boss_key)[0])
+    LOOKUP_CACHE.invalidate(_entry('lookup_key', instance.lookup_key)[0])
+
+
+def connect_signals():
+    """
+    Invalidate the lookup cache whenever a lookup is saved or deleted
+
+    Returns:
+        None
+    """
+    post_save.connect(invalidate_lookups, sender=BossLookup, dispatch_uid='lookup-save')
+    post_delete.connect(invalidate_lookups, sender=BossLookup, dispatch_uid='lookup-delete')
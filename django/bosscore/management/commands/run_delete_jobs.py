@@ -0,0 +1,44 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from django.core.management.base import BaseCommand
+
+from bosscore.deletion import run_delete_job
+from bosscore.jobs import filter_stale
+from bosscore.models import DeleteJob
+
+
+class Command(BaseCommand):
+    help = ('Run delete jobs that were interrupted before they completed, for example by a web worker restart. '
+            'Schedule this command to run periodically (e.g. every 10 minutes from cron).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also run jobs that failed')
+        parser.add_argument('--stale-seconds', type=int, default=None,
+                            help='Only run jobs without a heartbeat for this many seconds. '
+                                 'Defaults to JOB_STALE_TIMEOUT')
+        parser.add_argument('job_ids', type=int, nargs='*',
+                            help='Jobs to run, even if they are still running. Defaults to every stale unfinished job')
+
+    def handle(self, *args, **options):
+        statuses = [0, 1, 3] if options['retry_failed'] else [0, 1]
+        jobs = DeleteJob.objects.filter(status__in=statuses)
+        if options['job_ids']:
+            jobs = jobs.filter(pk__in=options['job_ids'])
+        else:
+            jobs = filter_stale(jobs, options['stale_seconds'])
+
+        for job_id in jobs.order_by('pk').values_list('pk', flat=True):
+            run_delete_job(job_id)
+            job = DeleteJob.objects.get(pk=job_id)
+            self.stdout.write('Delete job {}: {} {}'.format(job_id, job.get_status_display(), job.message))
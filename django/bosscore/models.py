@@ -29,6 +29,8 @@ class Collection(models.Model):
                             validators=[NameValidator()], unique=True)
     description = models.CharField(max_length=4096, blank=True)
     creator = models.ForeignKey('auth.User', related_name='collections')
+    # Set while a background job removes the collection. Deleting resources are hidden from requests.
+    deleting = models.BooleanField(default=False)
 
     class Meta:
         db_table = u"collection"
@@ -125,6 +127,7 @@ class Experiment(models.Model):
     )
     hierarchy_method = models.CharField(choices=HIERARCHY_METHOD_CHOICES, max_length=100)
     max_time_sample = models.IntegerField(default=0)
+    deleting = models.BooleanField(default=False)
 
     class Meta:
         db_table = u"experiment"
@@ -165,6 +168,7 @@ class ChannelLayer(models.Model):
     )
 
     datatype = models.CharField(choices=DATATYPE_CHOICES, max_length=100)
+    deleting = models.BooleanField(default=False)
 
     # channels = models.ManyToManyField('self', through='ChannelLayerMap', symmetrical=False,
     # related_name='ref_channels')
@@ -214,7 +218,7 @@ class BossLookup(models.Model):
 
     """
     lookup_key = models.CharField(max_length=255)
-    boss_key = models.CharField(max_length=255)
+    boss_key = models.CharField(max_length=255, unique=True)
 
     collection_name = models.CharField(max_length=255)
     experiment_name = models.CharField(max_length=255, blank=True, null=True)
@@ -222,7 +226,6 @@ class BossLookup(models.Model):
 
     class Meta:
         db_table = u"lookup"
-        unique_together = ('lookup_key', 'boss_key')
 
     def __str__(self):
         return 'Lookup key = {}, Boss key = {}'.format(self.lookup_key, self.boss_key)
@@ -247,3 +250,59 @@ class BossRole(models.Model):
 
     def __str__(self):
         return 'user = {}, role = {}'.format(self.user, self.role)
+
+
+class BossAcl(models.Model):
+    """
+    Denormalized index of the resources each user and group can read
+
+    Rows are kept in sync with the guardian read permissions (see bosscore.acl) so resource lists can be filtered
+    with an indexed integer join instead of guardian's permission subqueries.
+    """
+    group = models.ForeignKey('auth.Group', related_name='acl', null=True, on_delete=models.CASCADE)
+    user = models.ForeignKey('auth.User', related_name='acl', null=True, on_delete=models.CASCADE)
+    content_type = models.ForeignKey('contenttypes.ContentType', on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    readable = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = u"acl"
+        unique_together = ('group', 'user', 'content_type', 'object_id')
+        index_together = (('content_type', 'group', 'object_id'), ('content_type', 'user', 'object_id'))
+
+    def __str__(self):
+        return 'group = {}, user = {}, {} {}, readable = {}'.format(self.group_id, self.user_id, self.content_type_id,
+                                                                     self.object_id, self.readable)
+
+
+class DeleteJob(models.Model):
+    """
+    Background job that removes a collection, experiment, channel or layer together with its stored data
+
+    """
+    creator = models.ForeignKey('auth.User', related_name='delete_jobs')
+    start_date = models.DateTimeField(auto_now_add=True)
+    end_date = models.DateTimeField(null=True)
+    DELETE_STATUS_OPTIONS = (
+        (0, 'Queued'),
+        (1, 'Running'),
+        (2, 'Complete'),
+        (3, 'Failed'),
+    )
+    status = models.IntegerField(choices=DELETE_STATUS_OPTIONS, default=0)
+
+    collection_name = models.CharField(max_length=255)
+    experiment_name = models.CharField(max_length=255, blank=True, null=True)
+    channel_layer_name = models.CharField(max_length=255, blank=True, null=True)
+
+    total_steps = models.IntegerField(default=0)
+    completed_steps = models.IntegerField(default=0)
+    message = models.TextField(blank=True)
+    # Last time the thread running the job reported it was alive
+    heartbeat_date = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = u"delete_job"
+
+    def __str__(self):
+        return "{}".format(self.id)
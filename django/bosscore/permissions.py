@@ -12,12 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from django.contrib.auth.models import Group
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 
-from guardian.shortcuts import assign_perm, get_perms, remove_perm
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from guardian.shortcuts import get_perms, remove_perm
+from . import acl
+from .caching import GenerationalLRUCache
 from .error import BossHTTPError, ErrorCodes
 
+# Permission codenames of every user, one group per user keyed by "<content type id>:<object pk>", so a change only
+# invalidates the entries of the users it affects
+PERMISSION_CACHE = GenerationalLRUCache('permissions', settings.PERMISSION_CACHE_TTL)
+
+# Permissions granted to the creator's primary group and the admin group on new resources
+RESOURCE_PERMISSIONS = ('read', 'add', 'update', 'delete', 'assign_group', 'remove_group')
+DATA_PERMISSIONS = ('add_volumetric_data', 'read_volumetric_data', 'delete_volumetric_data')
+
+# Maximum number of sibling objects whose permissions are loaded together on a cache miss
+MAX_PERMISSION_PREFETCH = 1000
+
 
 class BossPermissionManager:
 
@@ -41,24 +58,11 @@ class BossPermissionManager:
             None
 
         """
-        # Get the type of model
-        ct = ContentType.objects.get_for_model(obj)
         group_name = user.username + "-primary"
         user_primary_group = Group.objects.get_or_create(name=group_name)[0]
         user.groups.add(user_primary_group.pk)
 
-        assign_perm('read', user_primary_group, obj)
-        assign_perm('add', user_primary_group, obj)
-        assign_perm('update', user_primary_group, obj)
-        assign_perm('delete', user_primary_group, obj)
-        assign_perm('assign_group', user_primary_group, obj)
-        assign_perm('remove_group', user_primary_group, obj)
-        if ct.model == 'channellayer':
-            assign_perm('add_volumetric_data', user_primary_group, obj)
-            assign_perm('read_volumetric_data', user_primary_group, obj)
-            assign_perm('delete_volumetric_data', user_primary_group, obj)
-
-
+        BossPermissionManager.bulk_grant([(user_primary_group, perm, obj) for perm in get_default_permissions(obj)])
 
     @staticmethod
     def add_permissions_group(group_name, obj, perm_list):
@@ -73,10 +77,8 @@ class BossPermissionManager:
             None
 
         """
-        # Get the type of model
         group = Group.objects.get(name=group_name)
-        for perm in perm_list:
-            assign_perm(perm, group, obj)
+        BossPermissionManager.bulk_grant([(group, perm, obj) for perm in perm_list])
 
     @staticmethod
     def get_permissions_group(group_name, obj):
@@ -122,24 +124,62 @@ class BossPermissionManager:
         Returns:
             None
         """
-        # Get the type of model
         try:
             admin_group, created = Group.objects.get_or_create(name="admin")
-            ct = ContentType.objects.get_for_model(obj)
-            assign_perm('read', admin_group, obj)
-            assign_perm('add', admin_group, obj)
-            assign_perm('update', admin_group, obj)
-            assign_perm('delete', admin_group, obj)
-            assign_perm('assign_group', admin_group, obj)
-            assign_perm('remove_group', admin_group, obj)
-            if ct.model == 'channellayer':
-                assign_perm('add_volumetric_data', admin_group, obj)
-                assign_perm('read_volumetric_data', admin_group, obj)
-                assign_perm('delete_volumetric_data', admin_group, obj)
+            BossPermissionManager.bulk_grant([(admin_group, perm, obj) for perm in get_default_permissions(obj)])
 
         except Group.DoesNotExist:
             BossHTTPError(404, "{Cannot assign permissions to the admin group because the group does not exist}", 30000)
 
+    @staticmethod
+    def bulk_grant(grants):
+        """
+        Grant many object permissions to groups with a single insert
+
+        Grants that already exist are skipped, so the call can be repeated safely.
+
+        Args:
+            grants: Iterable of (group, permission codename, object) tuples
+
+        Returns:
+            int: Number of permissions created
+
+        Raises:
+            Permission.DoesNotExist: If a permission does not exist for the type of its object
+
+        """
+        grants = [(group, codename, obj, ContentType.objects.get_for_model(obj)) for group, codename, obj in grants]
+        if not grants:
+            return 0
+
+        # Resolve all permission names in one query
+        cts = {ct.pk for _, _, _, ct in grants}
+        codenames = {codename for _, codename, _, _ in grants}
+        perms = {(perm.content_type_id, perm.codename): perm
+                 for perm in Permission.objects.filter(content_type_id__in=cts, codename__in=codenames)}
+
+        rows = {}
+        for group, codename, obj, ct in grants:
+            perm = perms.get((ct.pk, codename))
+            if perm is None:
+                raise Permission.DoesNotExist("Permission {} does not exist for {}".format(codename, ct.model))
+            rows[(group.pk, perm.pk, str(obj.pk))] = GroupObjectPermission(group=group, permission=perm,
+                                                                             content_type=ct, object_pk=str(obj.pk))
+
+        with transaction.atomic():
+            existing = GroupObjectPermission.objects.filter(group_id__in={key[0] for key in rows},
+                                                            permission_id__in={key[1] for key in rows},
+                                                            object_pk__in={key[2] for key in rows})
+            for key in existing.values_list('group_id', 'permission_id', 'object_pk'):
+                rows.pop(key, None)
+            GroupObjectPermission.objects.bulk_create(rows.values())
+            acl.add_readable((row.group, row.content_type, row.object_pk) for row in rows.values()
+                             if row.permission.codename == acl.READ_PERMISSION)
+
+        # bulk_create does not send the signals that normally clear the cache and update the ACL index
+        invalidate_groups({key[0] for key in rows})
+        return len(rows)
+
     @staticmethod
     def check_resource_permissions(user, obj, method_type):
         """
@@ -164,7 +204,7 @@ class BossPermissionManager:
         else:
             return BossHTTPError(404, "Unable to get permissions for this request", 30000)
 
-        if permission in get_perms(user, obj):
+        if permission in BossPermissionManager.get_user_permissions(user, obj):
             return True
         else:
             return False
@@ -191,7 +231,229 @@ class BossPermissionManager:
         else:
             return BossHTTPError("Unable to get permissions for this request", ErrorCodes.INVALID_POST_ARGUMENT)
 
-        if permission in get_perms(user, obj):
+        if permission in BossPermissionManager.get_user_permissions(user, obj):
             return True
         else:
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def get_user_permissions(user, obj):
+        """
+        Get the permissions of a user for an object, including the permissions granted to the user's groups
+
+        On a cache miss the permissions for all siblings of the object (eg. all channels of the experiment) are
+        loaded at once, since requests for one channel are usually followed by requests for the others.
+
+        Args:
+            user: User
+            obj: Resource
+
+        Returns:
+            frozenset: Permission codenames
+
+        """
+        if user.pk is None:
+            return frozenset(get_perms(user, obj))
+
+        ct = ContentType.objects.get_for_model(obj)
+        entry = permission_entry(user.pk, ct.pk, obj.pk)
+        perms = PERMISSION_CACHE.get_many_or_load([entry], lambda missing: {}).get(entry)
+        if perms is None:
+            perms = BossPermissionManager.prefetch_user_permissions(user, get_sibling_pks(obj), ct)[str(obj.pk)]
+        return perms
+
+    @staticmethod
+    def prefetch_user_permissions(user, pks, ct):
+        """
+        Load and cache the permissions of a user for several objects of the same type in two queries
+
+        Args:
+            user: User
+            pks: Primary keys of the objects
+            ct: ContentType of the objects
+
+        Returns:
+            dict: Permission codenames (frozenset) keyed by the primary key as a string
+
+        """
+        entries = {permission_entry(user.pk, ct.pk, pk): str(pk) for pk in pks}
+
+        def load(missing):
+            pks = [entries[entry] for entry in missing]
+            perms = {pk: set() for pk in pks}
+
+            if not user.is_active:
+                pass
+            elif user.is_superuser:
+                all_perms = set(Permission.objects.filter(content_type=ct).values_list('codename', flat=True))
+                for pk in pks:
+                    perms[pk] = all_perms
+            else:
+                group_perms = GroupObjectPermission.objects.filter(group__user=user, content_type=ct,
+                                                                   object_pk__in=pks)
+                user_perms = UserObjectPermission.objects.filter(user=user, content_type=ct, object_pk__in=pks)
+                for queryset in (group_perms, user_perms):
+                    for pk, codename in queryset.values_list('object_pk', 'permission__codename'):
+                        perms[pk].add(codename)
+
+            return {permission_entry(user.pk, ct.pk, pk): frozenset(codenames) for pk, codenames in perms.items()}
+
+        return {entries[entry]: codenames
+                for entry, codenames in PERMISSION_CACHE.get_many_or_load(list(entries), load).items()}
+
+
+def get_default_permissions(obj):
+    """
+    Get the permissions granted by default on a new resource
+
+    Args:
+        obj: Resource
+
+    Returns:
+        tuple: Permission codenames
+    """
+    if ContentType.objects.get_for_model(obj).model == 'channellayer':
+        return RESOURCE_PERMISSIONS + DATA_PERMISSIONS
+    return RESOURCE_PERMISSIONS
+
+
+def get_sibling_pks(obj):
+    """
+    Get the primary keys of the object and the objects that share its parent
+
+    Args:
+        obj: Resource
+
+    Returns:
+        list: Primary keys, including the object's own. At most MAX_PERMISSION_PREFETCH siblings are returned.
+    """
+    if hasattr(obj, 'experiment_id'):
+        siblings = type(obj).objects.filter(experiment_id=obj.experiment_id)
+    elif hasattr(obj, 'collection_id'):
+        siblings = type(obj).objects.filter(collection_id=obj.collection_id)
+    else:
+        return [obj.pk]
+
+    pks = list(siblings.values_list('pk', flat=True)[:MAX_PERMISSION_PREFETCH])
+    if obj.pk not in pks:
+        pks.append(obj.pk)
+    return pks
+
+
+def permission_group(user_pk):
+    """
+    Get the cache group holding the permissions of a user
+
+    Args:
+        user_pk (int): Primary key of the user
+
+    Returns:
+        str: Group
+    """
+    return 'user:{}'.format(user_pk)
+
+
+def permission_entry(user_pk, ct_pk, obj_pk):
+    """
+    Get the cache entry holding the permissions of a user for an object
+
+    Args:
+        user_pk (int): Primary key of the user
+        ct_pk (int): Primary key of the content type of the object
+        obj_pk: Primary key of the object
+
+    Returns:
+        (str, str): Group and key of the entry
+    """
+    return permission_group(user_pk), '{}:{}'.format(ct_pk, obj_pk)
+
+
+def invalidate_users(user_pks):
+    """
+    Invalidate the cached permissions of several users in every process
+
+    Args:
+        user_pks (iterable): Primary keys of the users
+
+    Returns:
+        None
+    """
+    PERMISSION_CACHE.invalidate_many(permission_group(pk) for pk in user_pks)
+
+
+def invalidate_groups(group_pks):
+    """
+    Invalidate the cached permissions of every member of several groups in every process
+
+    Args:
+        group_pks (iterable): Primary keys of the groups
+
+    Returns:
+        None
+    """
+    invalidate_users(User.objects.filter(groups__in=list(group_pks)).values_list('pk', flat=True).distinct())
+
+
+def invalidate_object_permissions(sender, instance, **kwargs):
+    """
+    Signal handler that invalidates the cached permissions of the users a granted or removed object permission
+    applies to: the user itself, or every member of the group
+    """
+    if isinstance(instance, UserObjectPermission):
+        invalidate_users([instance.user_id])
+    else:
+        invalidate_groups([instance.group_id])
+
+
+def invalidate_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler that invalidates the cached permissions of the users added to or removed from groups
+
+    Clearing the members of a group is handled before the clear, while they can still be listed.
+    """
+    if not reverse:
+        # instance is a user
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_users([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # instance is a group and pk_set the users
+        invalidate_users(pk_set)
+    elif action == 'pre_clear':
+        invalidate_groups([instance.pk])
+
+
+def invalidate_deleted_group(sender, instance, **kwargs):
+    """
+    Signal handler that invalidates the cached permissions of the members of a group before it is deleted
+    """
+    invalidate_groups([instance.pk])
+
+
+def invalidate_user_permissions(sender, instance, update_fields=None, **kwargs):
+    """
+    Signal handler that invalidates the cached permissions of a user when the user changes, eg. becomes a superuser
+    or is deactivated
+
+    Saving only the last login time, which happens on every login, does not change permissions.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_users([instance.pk])
+
+
+def connect_signals():
+    """
+    Invalidate the permission cache when object permissions are granted or removed (assign_perm, remove_perm and
+    deleted groups or users) and when users are added to or removed from groups
+
+    Returns:
+        None
+    """
+    for model in (GroupObjectPermission, UserObjectPermission):
+        post_save.connect(invalidate_object_permissions, sender=model,
+                          dispatch_uid='permissions-save-{}'.format(model.__name__))
+        post_delete.connect(invalidate_object_permissions, sender=model,
+                            dispatch_uid='permissions-delete-{}'.format(model.__name__))
+    m2m_changed.connect(invalidate_membership, sender=User.groups.through, dispatch_uid='permissions-membership')
+    pre_delete.connect(invalidate_deleted_group, sender=Group, dispatch_uid='permissions-group-delete')
+    post_save.connect(invalidate_user_permissions, sender=User, dispatch_uid='permissions-user')
@@ -11,15 +11,112 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.db.models.signals import post_save, post_delete
 from functools import wraps
 from bosscore.error import BossHTTPError, ErrorCodes
 from bosscore.serializers import BossRoleSerializer
+from .caching import VersionedTTLCache
 from .models import BossRole
 from bossutils.keycloak import KeyCloakClient
 
 VALID_ROLES = ('admin', 'user-manager', 'resource-manager')
 
+# Role names of a user keyed by user id
+ROLE_CACHE = VersionedTTLCache('roles', settings.ROLE_CACHE_TTL)
+
+
+def get_roles(user):
+    """
+    Get the roles of a user
+
+    Roles are cached with a TTL, so repeated calls for the same user do not query the database.
+
+    Args:
+        user: User
+
+    Returns:
+        frozenset: Role names, always including 'default'
+
+    """
+    roles = ROLE_CACHE.get(user.pk)
+    if roles is None:
+        roles = frozenset(['default'] + list(BossRole.objects.filter(user_id=user.pk).values_list('role', flat=True)))
+        ROLE_CACHE.set(user.pk, roles)
+    return roles
+
+
+def get_request_roles(request):
+    """
+    Get the roles of the user making a request
+
+    The roles are computed once per request and exposed as request.boss_roles.
+
+    Args:
+        request: DRF request
+
+    Returns:
+        frozenset: Role names
+
+    """
+    if getattr(request, 'boss_roles', None) is None:
+        request.boss_roles = get_roles(request.user)
+    return request.boss_roles
+
+
+def set_local_role(user_name, role, assigned):
+    """
+    Mirror a role change made in keycloak to the local roles, so it applies without waiting for the next login
+
+    Args:
+        user_name: User name
+        role: Role name
+        assigned: True if the role was assigned, False if it was removed
+
+    Returns:
+        None
+
+    """
+    try:
+        user = User.objects.get(username=user_name)
+    except User.DoesNotExist:
+        # The user has never logged in. Roles are loaded on first login.
+        return
+
+    if assigned:
+        BossRole.objects.get_or_create(user=user, role=role)
+    else:
+        for boss_role in BossRole.objects.filter(user=user, role=role):
+            boss_role.delete()
+
+
+def invalidate_roles(sender, **kwargs):
+    """
+    Signal handler that clears the role cache in every process when a role is added or removed
+    """
+    ROLE_CACHE.invalidate()
+
+
+def invalidate_new_user_roles(sender, created=False, **kwargs):
+    """
+    Signal handler that clears the role cache when a user is created, in case the id of a deleted user is reused
+    """
+    if created:
+        ROLE_CACHE.invalidate()
+
+
+def connect_signals():
+    """
+    Invalidate the role cache whenever a role is saved or deleted, eg. by load_user_roles or the user-role endpoints
+
+    Returns:
+        None
+    """
+    post_save.connect(invalidate_roles, sender=BossRole, dispatch_uid='roles-save')
+    post_delete.connect(invalidate_roles, sender=BossRole, dispatch_uid='roles-delete')
+    post_save.connect(invalidate_new_user_roles, sender=User, dispatch_uid='roles-new-user')
+
 def load_user_roles(user, roles):
     """
         Loads user roles from keycloak to django on user login
@@ -70,8 +167,8 @@ def check_role(role_name):
         @wraps(func)
         def wrapped(self, *args, **kwargs):
             if check_role:
-                bpm = BossPrivilegeManager(self.request.user)
-                if not bpm.has_role(role_name) and not bpm.has_role('admin'):
+                roles = get_request_roles(self.request)
+                if role_name not in roles and 'admin' not in roles:
                     return BossHTTPError("{} does not have the required role {}"
                                          .format(self.request.user, role_name), ErrorCodes.MISSING_ROLE)
             return func(self, *args, **kwargs)
@@ -82,17 +179,16 @@ def check_role(role_name):
 
 class BossPrivilegeManager:
 
-    user = None
-    roles = set()
-
-    def __init__(self, user_name):
+    def __init__(self, user):
         """
         Initalize the roles for a user
         Args:
-            user_name: Username from the request
+            user: User or user name
         """
-        self.user = User.objects.get(username=user_name)
-        self.get_user_roles()
+        if not isinstance(user, User):
+            user = User.objects.get(username=user)
+        self.user = user
+        self.roles = self.get_user_roles()
 
     def has_role(self, role):
         """
@@ -107,19 +203,9 @@ class BossPrivilegeManager:
 
     def get_user_roles(self):
         """
-        Get the roles for the user from the database
+        Get the roles for the user
         Returns:
             Set containing all the users roles
 
         """
-        self.roles = set()
-        self.roles.add('default')
-
-        try:
-            all_roles = BossRole.objects.filter(user=self.user)
-            for role in all_roles:
-                self.roles.add(role.role)
-            return self.roles
-        except BossRole.DoesNotExist:
-            # User only has the default user role
-            return self.roles
+        return get_roles(self.user)
@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import re
 
-from .models import Collection, Experiment, ChannelLayer
+from .models import ChannelLayer, ChannelLayerMap
 from .lookup import LookUpKey
+from .resolver import resolve_resources
 from .error import BossHTTPError, BossError, ErrorCodes, BossRestArgsError
 from .permissions import BossPermissionManager
 
@@ -42,6 +44,9 @@ class BossRequest:
         self.experiment = None
         self.channel_layer = None
 
+        # All channels and layers for services that operate on more than one
+        self.channel_layers = []
+
         self.default_time = None
         self.coord_frame = None
 
@@ -101,6 +106,12 @@ class BossRequest:
         elif service == 'tile':
             self.validate_tile_service(webargs)
 
+        elif service == 'composite':
+            self.validate_composite_service(webargs)
+
+        elif service == 'mosaic':
+            self.validate_mosaic_service(webargs)
+
         else:
             self.validate_cutout_service(webargs)
 
@@ -220,6 +231,83 @@ class BossRequest:
         else:
             raise BossError("Unable to parse the url.", ErrorCodes.INVALID_URL)
 
+    def validate_composite_service(self, webargs):
+        """
+        Validate a composite tile request
+
+        The channels and layers to composite are given as a comma separated list in the 'channels' query parameter.
+        Layers are only allowed if they are linked to one of the requested channels.
+
+        Args:
+            webargs: Url arguments after the service
+
+        Raises:
+            BossError: For invalid requests
+
+        """
+        m = re.match("/?(?P<collection>\w+)/(?P<experiment>\w+)/(?P<orientation>xy|yz|xz)/(?P<tile_size>\d+)/" +
+                     "(?P<resolution>\d)/(?P<x>\d+)/(?P<y>\d+)/(?P<z>\d+)/?(?P<rest>.*)?/?", webargs)
+
+        if m:
+            [collection_name, experiment_name, orientation, tile_size, resolution, x, y, z] = \
+                [arg for arg in m.groups()[:-1]]
+            time = m.groups()[-1]
+
+            self.initialize_request(collection_name, experiment_name, None)
+            self.set_channel_layers(self.request.query_params.get('channels', ''))
+            self.check_permissions()
+            if not time:
+                # get default time
+                self.time_start = self.channel_layer.default_time_step
+                self.time_stop = self.channel_layer.default_time_step + 1
+            else:
+                self.set_time(time)
+
+            self.set_tileargs(tile_size, orientation, int(resolution), x, y, z)
+            self.set_boss_key()
+
+        else:
+            raise BossError("Unable to parse the url.", ErrorCodes.INVALID_URL)
+
+    def validate_mosaic_service(self, webargs):
+        """
+        Validate a mosaic request
+
+        The tile indices of the two in-plane dimensions and the plane index of the third dimension can each be a
+        single index or a python style range (eg. 0:4).
+
+        Args:
+            webargs: Url arguments after the service
+
+        Raises:
+            BossError: For invalid requests
+
+        """
+        m = re.match("/?(?P<collection>\w+)/(?P<experiment>\w+)/(?P<channel_layer>\w+)/(?P<orientation>xy|yz|xz)/" +
+                     "(?P<tile_size>\d+)/(?P<resolution>\d)/(?P<x>\d+(:\d+)?)/(?P<y>\d+(:\d+)?)/" +
+                     "(?P<z>\d+(:\d+)?)/?(?P<rest>.*)?/?", webargs)
+
+        if m:
+            [collection_name, experiment_name, channel_layer_name, orientation, tile_size, resolution, x, y, z] = \
+                [m.group(name) for name in ('collection', 'experiment', 'channel_layer', 'orientation', 'tile_size',
+                                            'resolution', 'x', 'y', 'z')]
+            time = m.group('rest')
+
+            self.initialize_request(collection_name, experiment_name, channel_layer_name)
+            self.check_permissions()
+            if not time:
+                # get default time
+                self.time_start = self.channel_layer.default_time_step
+                self.time_stop = self.channel_layer.default_time_step + 1
+            else:
+                self.set_time(time)
+
+            self.set_mosaicargs(tile_size, orientation, int(resolution), x, y, z)
+            self.set_boss_key()
+
+        else:
+            raise BossError("Unable to parse the url.", ErrorCodes.INVALID_URL)
+
     def initialize_request(self, collection_name, experiment_name, channel_layer_name):
         """
         Initialize the request
@@ -233,11 +321,10 @@ class BossRequest:
 
         """
         if collection_name:
-            colstatus = self.set_collection(collection_name)
-            if experiment_name and colstatus:
-                expstatus = self.set_experiment(experiment_name)
-                if channel_layer_name and expstatus:
-                    self.set_channel_layer(channel_layer_name)
+            self.collection, self.experiment, self.channel_layer = resolve_resources(
+                collection_name, experiment_name or None, (experiment_name and channel_layer_name) or None)
+            if self.experiment:
+                self.coord_frame = self.experiment.coord_frame
 
     def set_cutoutargs(self, resolution, x_range, y_range, z_range):
         """
@@ -403,6 +490,52 @@ class BossRequest:
             raise BossError("Type error in cutout argument{}/{}/{}/{}".format(resolution, x_idx, y_idx, z_idx),
                             ErrorCodes.TYPE_ERROR)
 
+    def set_mosaicargs(self, tile_size, orientation, resolution, x_args, y_args, z_args):
+        """
+        Validate and initialize mosaic arguments in the request
+
+        The region of the request is the bounding box of all tiles in the mosaic.
+
+        Args:
+            tile_size: Size of each tile in pixels
+            orientation: Image plane requested. Valid options are xy, xz or yz
+            resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+            x_args: X tile index or range of tile indices (eg. 0:4). A plane index or range for yz mosaics.
+            y_args: Y tile index or range of tile indices (eg. 0:4). A plane index or range for xz mosaics.
+            z_args: Z plane index or range of plane indices (eg. 0:4). A tile index or range for xz and yz mosaics.
+
+        Raises:
+            BossError: For invalid requests
+
+        """
+        tile_size = int(tile_size)
+        [x_start, x_stop], [y_start, y_stop], [z_start, z_stop] = [parse_index_range(arg)
+                                                                  for arg in (x_args, y_args, z_args)]
+
+        if int(resolution) in range(0, self.experiment.num_hierarchy_levels):
+            self.resolution = int(resolution)
+
+        # Tile indices are scaled to voxels, plane indices are used as is
+        if orientation == 'xy':
+            x_start, x_stop, y_start, y_stop = [tile_size * idx for idx in (x_start, x_stop, y_start, y_stop)]
+        elif orientation == 'xz':
+            x_start, x_stop, z_start, z_stop = [tile_size * idx for idx in (x_start, x_stop, z_start, z_stop)]
+        elif orientation == 'yz':
+            y_start, y_stop, z_start, z_stop = [tile_size * idx for idx in (y_start, y_stop, z_start, z_stop)]
+        else:
+            raise BossError("Invalid orientation: {}".format(orientation), ErrorCodes.INVALID_CUTOUT_ARGS)
+
+        self.x_start, self.x_stop = x_start, x_stop
+        self.y_start, self.y_stop = y_start, y_stop
+        self.z_start, self.z_stop = z_start, z_stop
+
+        # Check for valid arguments
+        if (self.x_start >= self.x_stop) or (self.y_start >= self.y_stop) or (self.z_start >= self.z_stop) or \
+                (self.x_start < self.coord_frame.x_start) or (self.x_stop > self.coord_frame.x_stop) or \
+                (self.y_start < self.coord_frame.y_start) or (self.y_stop > self.coord_frame.y_stop) or \
+                (self.z_start < self.coord_frame.z_start) or (self.z_stop > self.coord_frame.z_stop):
+            raise BossError("Incorrect mosaic arguments {}/{}/{}/{}".format(resolution, x_args, y_args, z_args),
+                            ErrorCodes.INVALID_CUTOUT_ARGS)
 
     def initialize_view_request(self, webargs):
         """
@@ -437,11 +570,8 @@ class BossRequest:
         Raises : BossError is the collection is not found.
 
         """
-        if Collection.objects.filter(name=str(collection_name)).exists():
-            self.collection = Collection.objects.get(name=collection_name)
-            return True
-        else:
-            raise BossError("Collection {} not found".format(collection_name), ErrorCodes.RESOURCE_NOT_FOUND)
+        self.collection = resolve_resources(collection_name)[0]
+        return True
 
     def get_collection(self):
         """
@@ -463,12 +593,8 @@ class BossRequest:
         Returns: BossError is the experiment with the matching name is not found in the db
 
         """
-        if Experiment.objects.filter(name=experiment_name, collection=self.collection).exists():
-            self.experiment = Experiment.objects.get(name=experiment_name, collection=self.collection)
-            self.coord_frame = self.experiment.coord_frame
-        else:
-            raise BossError("Collection {} not found".format(experiment_name), ErrorCodes.RESOURCE_NOT_FOUND)
-
+        self.experiment = resolve_resources(self.collection.name, experiment_name)[1]
+        self.coord_frame = self.experiment.coord_frame
         return True
 
     def get_experiment(self):
@@ -491,11 +617,45 @@ class BossRequest:
         Returns:
 
         """
-        if ChannelLayer.objects.filter(name=channel_layer_name, experiment=self.experiment).exists():
-            self.channel_layer = ChannelLayer.objects.get(name=channel_layer_name, experiment=self.experiment)
-            return True
-        else:
-            raise BossError("Channel/Layer {} not found".format(channel_layer_name), ErrorCodes.RESOURCE_NOT_FOUND)
+        self.channel_layer = resolve_resources(self.collection.name, self.experiment.name, channel_layer_name)[2]
+        return True
+
+    def set_channel_layers(self, channel_layer_names):
+        """
+        Validate and set a list of channels and layers from the current experiment
+
+        The first entry also becomes the request's channel_layer so the default time step and boss key are
+        taken from it.
+
+        Args:
+            channel_layer_names: Comma separated list of channel or layer names
+
+        Raises:
+            BossError: If a name is not found or a layer is not linked to one of the requested channels
+
+        """
+        names = [name for name in channel_layer_names.split(',') if name]
+        if not names:
+            raise BossError("No channels specified. Provide a comma separated list in the channels argument",
+                            ErrorCodes.INVALID_URL)
+
+        objs = {obj.name: obj for obj in ChannelLayer.objects.filter(name__in=names, experiment=self.experiment)}
+        for name in names:
+            if name not in objs:
+                raise BossError("Channel/Layer {} not found".format(name), ErrorCodes.RESOURCE_NOT_FOUND)
+        self.channel_layers = [objs[name] for name in names]
+
+        channels = [obj for obj in self.channel_layers if obj.is_channel]
+        layers = [obj for obj in self.channel_layers if not obj.is_channel]
+        if layers:
+            linked = set(ChannelLayerMap.objects.filter(layer__in=layers, channel__in=channels)
+                         .values_list('layer_id', flat=True))
+            for layer in layers:
+                if layer.pk not in linked:
+                    raise BossError("Layer {} is not linked to any of the requested channels".format(layer.name),
+                                    ErrorCodes.INVALID_URL)
+
+        self.channel_layer = self.channel_layers[0]
 
     def get_channel_layer(self):
         """
@@ -662,6 +822,25 @@ class BossRequest:
         else:
             return BossHTTPError("Error creating the boss key", ErrorCodes.UNABLE_TO_VALIDATE)
 
+    def for_channel_layer(self, channel_layer):
+        """
+        Get a copy of this request scoped to one of its channels or layers
+
+        Services that operate on several channels use this to hand each channel to spdb as a regular single
+        channel request. The channel must already have been validated and permission checked.
+
+        Args:
+            channel_layer: ChannelLayer object from self.channel_layers
+
+        Returns:
+            BossRequest : Copy of the request for the channel or layer
+        """
+        req = copy.copy(self)
+        req.channel_layer = channel_layer
+        req.channel_layers = [channel_layer]
+        req.set_boss_key()
+        return req
+
     def check_permissions(self):
         """ Set the base boss key for the request
 
@@ -669,7 +848,15 @@ class BossRequest:
         Returns:
             self.bosskey(str) : String that represents the boss key for the current request
         """
-        if self.service =='cutout' or self.service == 'image' or self.service == 'tile':
+        if self.service == 'composite':
+            for channel_layer in self.channel_layers:
+                if not BossPermissionManager.check_data_permissions(self.request.user, channel_layer,
+                                                                    self.request.method):
+                    raise BossError("This user does not have the required permissions on {}"
+                                    .format(channel_layer.name), ErrorCodes.MISSING_PERMISSION)
+            return
+
+        if self.service in ('cutout', 'image', 'tile', 'mosaic'):
             perm = BossPermissionManager.check_data_permissions(self.request.user, self.channel_layer,
                                                                   self.request.method)
         elif self.service =='meta':
@@ -699,6 +886,24 @@ class BossRequest:
         """
         return self.base_boss_key
 
+    def get_boss_key_hierarchy(self):
+        """
+        Get the boss keys of the requested resource and of each of its parents
+
+        Returns:
+            list((str, object, str)) : (level, datamodel object, boss key) for the collection, followed by the
+            experiment and the channel or layer when they are part of the request
+        """
+        levels = []
+        names = []
+        for level, obj in (('collection', self.collection), ('experiment', self.experiment),
+                           ('channel_layer', self.channel_layer)):
+            if obj is None:
+                break
+            names.append(obj.name)
+            levels.append((level, obj, META_CONNECTOR.join(names)))
+        return levels
+
     def get_boss_key_list(self):
         """
         Get the boss_key list for the current object including the resolution and time samples
@@ -796,3 +1001,19 @@ class BossRequest:
 
         """
         return range(self.time_start, self.time_stop)
+
+
+def parse_index_range(index_range):
+    """
+    Parse a single index or a python style range of indices
+
+    Args:
+        index_range (str): Index (eg. 3) or range (eg. 0:4)
+
+    Returns:
+        (int, int): Start and stop of the range. A single index i is returned as (i, i + 1)
+    """
+    if ':' in index_range:
+        start, stop = index_range.split(':')
+        return int(start), int(stop)
+    return int(index_range), int(index_range) + 1
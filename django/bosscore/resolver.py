@@ -0,0 +1,116 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+
+from .caching import VersionedTTLCache
+from .error import BossError, ErrorCodes
+from .models import Collection, CoordinateFrame, Experiment, ChannelLayer, ChannelLayerMap
+
+# Resolved (collection, experiment, channel_layer) tuples keyed by the name triple from the request
+RESOURCE_CACHE = VersionedTTLCache('resources', settings.RESOURCE_CACHE_TTL)
+
+
+def resolve_resources(collection_name, experiment_name=None, channel_layer_name=None):
+    """
+    Resolve the datamodel objects named in a request
+
+    The deepest resource named is loaded together with its parents and coordinate frame in a single query, and the
+    result is cached in-process. On a warm cache no queries are made. Resources that are being deleted are not found.
+
+    Args:
+        collection_name (str): Collection name
+        experiment_name (str): Experiment name or None to only resolve the collection
+        channel_layer_name (str): Channel or layer name or None to only resolve the collection and experiment
+
+    Returns:
+        (Collection, Experiment, ChannelLayer): The resolved objects. Objects that were not requested are None.
+        The objects are shared between requests and must not be modified.
+
+    Raises:
+        BossError: If a resource is not found
+    """
+    key = (collection_name, experiment_name, channel_layer_name)
+    resources = RESOURCE_CACHE.get(key)
+    if resources is None:
+        resources = _load_resources(collection_name, experiment_name, channel_layer_name)
+        RESOURCE_CACHE.set(key, resources)
+    return resources
+
+
+def _load_resources(collection_name, experiment_name, channel_layer_name):
+    """
+    Load the datamodel objects named in a request from the database
+
+    Args:
+        collection_name (str): Collection name
+        experiment_name (str): Experiment name or None
+        channel_layer_name (str): Channel or layer name or None
+
+    Returns:
+        (Collection, Experiment, ChannelLayer): The resolved objects
+
+    Raises:
+        BossError: If a resource is not found
+    """
+    if experiment_name and channel_layer_name:
+        try:
+            channel_layer = ChannelLayer.objects.select_related('experiment__collection', 'experiment__coord_frame')\
+                .get(name=channel_layer_name, experiment__name=experiment_name,
+                     experiment__collection__name=collection_name, deleting=False, experiment__deleting=False,
+                     experiment__collection__deleting=False)
+            return channel_layer.experiment.collection, channel_layer.experiment, channel_layer
+        except ChannelLayer.DoesNotExist:
+            # Find out which level of the hierarchy is missing
+            _load_resources(collection_name, experiment_name, None)
+            raise BossError("Channel/Layer {} not found".format(channel_layer_name), ErrorCodes.RESOURCE_NOT_FOUND)
+
+    elif experiment_name:
+        try:
+            experiment = Experiment.objects.select_related('collection', 'coord_frame')\
+                .get(name=experiment_name, collection__name=collection_name, deleting=False,
+                     collection__deleting=False)
+            return experiment.collection, experiment, None
+        except Experiment.DoesNotExist:
+            _load_resources(collection_name, None, None)
+            raise BossError("Experiment {} not found".format(experiment_name), ErrorCodes.RESOURCE_NOT_FOUND)
+
+    else:
+        try:
+            return Collection.objects.get(name=collection_name, deleting=False), None, None
+        except Collection.DoesNotExist:
+            raise BossError("Collection {} not found".format(collection_name), ErrorCodes.RESOURCE_NOT_FOUND)
+
+
+def invalidate_resources(sender, **kwargs):
+    """
+    Signal handler that clears the resolver cache in every process when a resource changes
+    """
+    RESOURCE_CACHE.invalidate()
+
+
+def connect_signals():
+    """
+    Invalidate the resolver cache whenever a resource is saved or deleted
+
+    Channel/layer links are included so that the version counter of the cache also tracks every change to the
+    resource tree.
+
+    Returns:
+        None
+    """
+    for model in (Collection, CoordinateFrame, Experiment, ChannelLayer, ChannelLayerMap):
+        post_save.connect(invalidate_resources, sender=model, dispatch_uid='resolver-save-{}'.format(model.__name__))
+        post_delete.connect(invalidate_resources, sender=model,
+                            dispatch_uid='resolver-delete-{}'.format(model.__name__))
@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django.db.models import Prefetch
 from rest_framework import serializers
 from django.contrib.auth.models import User, Group
 from guardian.shortcuts import get_objects_for_user
-from .models import Collection, Experiment, ChannelLayer, CoordinateFrame, ChannelLayerMap, BossLookup, BossRole
+from .models import Collection, Experiment, ChannelLayer, CoordinateFrame, ChannelLayerMap, BossLookup, BossRole,\
+    DeleteJob
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -99,6 +101,19 @@ class ChannelLayerSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'experiment', 'is_channel', 'default_time_step', 'datatype',
                   'base_resolution', 'linked_channel_layers', 'creator')
 
+    @staticmethod
+    def eager_load(queryset):
+        """
+        Load the related objects used by the serializer together with the queryset
+
+        Args:
+            queryset: ChannelLayer queryset
+
+        Returns:
+            QuerySet: Queryset that serializes in a constant number of queries
+        """
+        return queryset.select_related('creator').prefetch_related('linked_channel_layers')
+
 
 class ExperimentSerializer(serializers.ModelSerializer):
     channel_layers = ChannelLayerSerializer(many=True, read_only=True)
@@ -116,6 +131,19 @@ class ExperimentSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'collection', 'coord_frame', 'num_hierarchy_levels', 'hierarchy_method',
                   'max_time_sample', 'channel_layers', 'creator')
 
+    @staticmethod
+    def eager_load(queryset):
+        """
+        Load the related objects used by the serializer together with the queryset
+
+        Args:
+            queryset: Experiment queryset
+
+        Returns:
+            QuerySet: Queryset that serializes in a constant number of queries
+        """
+        return queryset.select_related('creator')
+
 
 class CollectionSerializer(serializers.ModelSerializer):
     experiments = ExperimentSerializer(many=True, read_only=True)
@@ -126,6 +154,31 @@ class CollectionSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'experiments', 'creator')
         depth = 1
 
+    @staticmethod
+    def eager_load(queryset):
+        """
+        Load the related objects used by the serializer together with the queryset
+
+        Args:
+            queryset: Collection queryset
+
+        Returns:
+            QuerySet: Queryset that serializes in a constant number of queries
+        """
+        return queryset.select_related('creator').prefetch_related(
+            Prefetch('experiments', queryset=ExperimentSerializer.eager_load(
+                Experiment.objects.filter(deleting=False))))
+
+
+class DeleteJobSerializer(serializers.ModelSerializer):
+    status = serializers.ReadOnlyField(source='get_status_display')
+    creator = serializers.ReadOnlyField(source='creator.username')
+
+    class Meta:
+        model = DeleteJob
+        fields = ('id', 'status', 'collection_name', 'experiment_name', 'channel_layer_name', 'total_steps',
+                  'completed_steps', 'message', 'start_date', 'end_date', 'creator')
+
 
 class BossLookupSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='pk')
@@ -0,0 +1,123 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.conf import settings
+from django.test import TestCase
+from django.contrib.auth.models import Group
+from guardian.shortcuts import assign_perm, remove_perm
+from rest_framework.test import APITestCase
+
+from bosscore import acl
+from bosscore.models import BossAcl, Collection, ChannelLayer
+from .setup_db import SetupTestDB
+
+version = settings.BOSS_VERSION
+
+
+class AclIndexTests(TestCase):
+    """
+    Class to test the ACL index is kept in sync with the object permissions
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user('testuser')
+        dbsetup.set_user(self.user)
+        dbsetup.insert_test_data()
+
+        self.other = dbsetup.create_user('otheruser')
+        self.group = Group.objects.get(name='testuser-primary')
+        self.channel1 = ChannelLayer.objects.get(name='channel1')
+
+    def test_readable(self):
+        """
+        Test resources created by a user are readable by that user only
+        :return:
+        """
+        self.assertIn(self.channel1, acl.get_readable(self.user, ChannelLayer))
+        self.assertNotIn(self.channel1, acl.get_readable(self.other, ChannelLayer))
+
+    def test_remove_perm(self):
+        """
+        Test removing the read permission removes the resource from the index
+        :return:
+        """
+        remove_perm('read', self.group, self.channel1)
+        self.assertNotIn(self.channel1, acl.get_readable(self.user, ChannelLayer))
+
+    def test_user_perm(self):
+        """
+        Test read permissions assigned directly to a user are indexed
+        :return:
+        """
+        assign_perm('read', self.other, self.channel1)
+        self.assertIn(self.channel1, acl.get_readable(self.other, ChannelLayer))
+
+    def test_rebuild(self):
+        """
+        Test rebuilding the index gives the same results
+        :return:
+        """
+        readable = list(acl.get_readable(self.user, ChannelLayer))
+        BossAcl.objects.all().delete()
+        self.assertGreater(acl.rebuild(), 0)
+        self.assertEqual(list(acl.get_readable(self.user, ChannelLayer)), readable)
+
+
+class AclPaginationTests(APITestCase):
+    """
+    Class to test keyset pagination of the resource lists
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user('testuser')
+        dbsetup.set_user(self.user)
+        self.client.force_login(self.user)
+        dbsetup.insert_test_data()
+
+    def test_pages(self):
+        """
+        Test walking the collection list a page at a time returns every collection once
+        :return:
+        """
+        url = '/' + version + '/resource/collections/'
+        names = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'limit': 1, 'after': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 1)
+            names.extend(collection['name'] for collection in response.data)
+            cursor = response.get('X-Next-Cursor')
+            if cursor is None:
+                break
+
+        self.assertEqual(names, list(Collection.objects.order_by('pk').values_list('name', flat=True)))
+
+    def test_invalid_limit(self):
+        """
+        Test an out of range page size is rejected
+        :return:
+        """
+        response = self.client.get('/' + version + '/resource/collections/', {'limit': 0})
+        self.assertEqual(response.status_code, 400)
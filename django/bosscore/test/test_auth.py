@@ -113,7 +113,7 @@ class UserPermissionsCollection(APITestCase):
         self.assertEqual(response.status_code, 201)
 
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_get_collections(self):
         """
@@ -366,7 +366,7 @@ class UserPermissionsExperiment(APITestCase):
         """
         url = '/' + version + '/resource/unittestcol/unittestexp/'
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_get_experiments_no_permissions(self):
         """
@@ -503,7 +503,7 @@ class UserPermissionsChannelLayer(APITestCase):
         """
         url = '/' + version + '/resource/unittestcol/unittestexp/unittestlayer/'
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_get_channels_no_permissions(self):
         """
@@ -0,0 +1,104 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from bosscore.caching import GenerationalLRUCache
+
+
+class GenerationalLRUCacheTests(SimpleTestCase):
+    """
+    Class to test the grouped read-through cache
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.cache = GenerationalLRUCache('test', 60, max_entries=2)
+        self.loads = []
+
+    def load(self, value):
+        def load():
+            self.loads.append(value)
+            return value
+        return load
+
+    def test_value_loaded_once(self):
+        """
+        Test a cached value is not loaded again, including None values
+        :return:
+        """
+        self.assertEqual(self.cache.get_or_load('res1', 'key1', self.load('v1')), 'v1')
+        self.assertEqual(self.cache.get_or_load('res1', 'key1', self.load('v2')), 'v1')
+        self.assertIsNone(self.cache.get_or_load('res1', 'key2', self.load(None)))
+        self.assertIsNone(self.cache.get_or_load('res1', 'key2', self.load('v3')))
+        self.assertEqual(self.loads, ['v1', None])
+
+    def test_invalidate_group(self):
+        """
+        Test invalidating a group only reloads the entries of that group
+        :return:
+        """
+        self.cache.get_or_load('res1', 'key1', self.load('v1'))
+        self.cache.get_or_load('res2', 'key1', self.load('v2'))
+        self.cache.invalidate('res1')
+
+        self.assertEqual(self.cache.get_or_load('res1', 'key1', self.load('v3')), 'v3')
+        self.assertEqual(self.cache.get_or_load('res2', 'key1', self.load('v4')), 'v2')
+
+    def test_shared_between_processes(self):
+        """
+        Test values and invalidations are shared through the Django cache
+        :return:
+        """
+        other = GenerationalLRUCache('test', 60)
+        self.cache.get_or_load('res1', 'key1', self.load('v1'))
+        self.assertEqual(other.get_or_load('res1', 'key1', self.load('v2')), 'v1')
+
+        self.cache.invalidate('res1')
+        self.assertEqual(other.get_or_load('res1', 'key1', self.load('v3')), 'v3')
+        self.assertEqual(self.loads, ['v1', 'v3'])
+
+    def test_least_recently_used_evicted(self):
+        """
+        Test the local tier keeps the most recently used entries
+        :return:
+        """
+        self.cache.get_or_load('res1', 'key1', self.load('v1'))
+        self.cache.get_or_load('res1', 'key2', self.load('v2'))
+        self.cache.get_or_load('res1', 'key1', self.load('v1'))
+        self.cache.get_or_load('res1', 'key3', self.load('v3'))
+
+        self.assertEqual(list(self.cache._entries), [('res1', 'key1'), ('res1', 'key3')])
+
+    def test_get_many_loads_missing_once(self):
+        """
+        Test several entries are loaded with one call and entries that could not be loaded are not cached
+        :return:
+        """
+        calls = []
+
+        def load(missing):
+            calls.append(missing)
+            return {entry: entry[0] for entry in missing if entry[0] != 'res3'}
+
+        other = GenerationalLRUCache('test', 60)
+        self.cache.get_or_load('res1', '', self.load('res1'))
+        found = other.get_many_or_load([('res1', ''), ('res2', ''), ('res3', '')], load)
+
+        self.assertEqual(found, {('res1', ''): 'res1', ('res2', ''): 'res2'})
+        self.assertEqual(calls, [[('res2', ''), ('res3', '')]])
+
+        other.get_many_or_load([('res2', ''), ('res3', '')], load)
+        self.assertEqual(calls[-1], [('res3', '')])
@@ -0,0 +1,181 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import timedelta
+from fnmatch import fnmatchcase
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from bosscore import deletion
+
+from bosscore.error import BossError
+from bosscore.jobs import filter_stale
+from bosscore.models import DeleteJob
+from bosscore.resolver import resolve_resources
+from .setup_db import SetupTestDB
+
+version = settings.BOSS_VERSION
+
+
+class DeleteJobTests(APITestCase):
+    """
+    Class to test resources are hidden and a job is queued when they are deleted
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        self.dbsetup = SetupTestDB()
+        user = self.dbsetup.create_user('testuser')
+        self.dbsetup.add_role('resource-manager')
+        self.dbsetup.set_user(user)
+
+        self.client.force_login(user)
+        self.dbsetup.insert_test_data()
+        self.url = '/' + version + '/resource/col1/exp1/channel2/'
+
+    def test_delete_queues_job(self):
+        """
+        Test deleting a channel returns a queued job
+        :return:
+        """
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'Queued')
+        self.assertEqual(response.data['channel_layer_name'], 'channel2')
+
+        response = self.client.get('/' + version + '/delete-job/{}/'.format(response.data['id']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'Queued')
+
+    def test_deleting_hidden(self):
+        """
+        Test a channel that is being deleted can no longer be found
+        :return:
+        """
+        resolve_resources('col1', 'exp1', 'channel2')
+        self.assertEqual(self.client.delete(self.url).status_code, 202)
+
+        with self.assertRaises(BossError):
+            resolve_resources('col1', 'exp1', 'channel2')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+
+        response = self.client.get('/' + version + '/resource/col1/exp1/channels/')
+        self.assertNotIn('channel2', [channel['name'] for channel in response.data])
+
+    def test_deleting_experiment_hidden_from_collection(self):
+        """
+        Test an experiment that is being deleted is no longer listed in its collection
+        :return:
+        """
+        self.dbsetup.add_experiment('col1', 'exp2', 'cf1', 10, 10)
+        url = '/' + version + '/resource/col1/'
+        response = self.client.get(url)
+        self.assertIn('exp2', [experiment['name'] for experiment in response.data['experiments']])
+
+        self.assertEqual(self.client.delete(url + 'exp2/').status_code, 202)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('exp2', [experiment['name'] for experiment in response.data['experiments']])
+
+    def test_delete_linked_channel(self):
+        """
+        Test a channel that layers link to cannot be deleted
+        :return:
+        """
+        response = self.client.delete('/' + version + '/resource/col1/exp1/channel1/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(DeleteJob.objects.exists())
+
+    def test_job_status_other_user(self):
+        """
+        Test other users cannot see a delete job
+        :return:
+        """
+        job_id = self.client.delete(self.url).data['id']
+
+        self.client.force_login(self.dbsetup.create_user('otheruser'))
+        response = self.client.get('/' + version + '/delete-job/{}/'.format(job_id))
+        self.assertEqual(response.status_code, 403)
+
+
+    def test_stale_jobs(self):
+        """
+        Test only jobs without a recent heartbeat are picked up by the periodic command
+        :return:
+        """
+        job_id = self.client.delete(self.url).data['id']
+        jobs = DeleteJob.objects.filter(pk=job_id)
+
+        jobs.update(heartbeat_date=timezone.now())
+        self.assertFalse(filter_stale(jobs, 600).exists())
+
+        jobs.update(heartbeat_date=timezone.now() - timedelta(seconds=601))
+        self.assertTrue(filter_stale(jobs, 600).exists())
+
+
+class FakeRedis(object):
+    """Minimal redis client holding a set of keys"""
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+
+    def scan_iter(self, match, count):
+        return [key for key in sorted(self.keys) if fnmatchcase(key, match)]
+
+    def delete(self, *keys):
+        count = len(self.keys.intersection(keys))
+        self.keys.difference_update(keys)
+        return count
+
+
+class DeleteCacheEntriesTests(SimpleTestCase):
+    """
+    Class to test only the cache entries of the deleted channel or layer are removed
+    """
+
+    def test_overlapping_lookup_keys(self):
+        """
+        Test keys of a channel whose lookup key contains the deleted one are kept
+        :return:
+        """
+        cache = FakeRedis(['CACHED-CUBOID&1&1&1&0&0&12', 'WRITE-CUBOID&1&1&1&0&0&12&abc',
+                           'CACHED-CUBOID&11&1&1&0&0&12', 'WRITE-CUBOID&11&1&1&0&0&12&abc',
+                           'CACHED-CUBOID&2&1&1&1&0&0&12', 'WRITE-CUBOID&2&1&1&1&0&0&12&abc'])
+        state = FakeRedis(['DELAYED-WRITE&1&1&1&0&0&12', 'CUBOID-VERSION&1&1&1&0&0', 'CHANNEL-GENERATION&1&1&1',
+                           'DELAYED-WRITE&11&1&1&0&0&12', 'CUBOID-VERSION&2&1&1&1&0&0', 'CHANNEL-GENERATION&2&1&1&1'])
+
+        clients = [(cache, deletion.CACHE_KEY_PREFIXES, []),
+                   (state, deletion.STATE_KEY_PREFIXES, deletion.STATE_CHANNEL_KEY_PREFIXES)]
+        with patch.object(deletion, 'get_redis_clients', return_value=clients):
+            self.assertEqual(deletion.delete_cache_entries('1&1&1'), 5)
+
+        self.assertEqual(cache.keys, {'CACHED-CUBOID&11&1&1&0&0&12', 'WRITE-CUBOID&11&1&1&0&0&12&abc',
+                                      'CACHED-CUBOID&2&1&1&1&0&0&12', 'WRITE-CUBOID&2&1&1&1&0&0&12&abc'})
+        self.assertEqual(state.keys, {'DELAYED-WRITE&11&1&1&0&0&12', 'CUBOID-VERSION&2&1&1&1&0&0',
+                                      'CHANNEL-GENERATION&2&1&1&1'})
+
+    def test_object_lookup_key(self):
+        """
+        Test the lookup key is parsed from a cuboid object key
+        :return:
+        """
+        self.assertEqual(deletion.get_object_lookup_key('6b1f0c2a&1&1&1&0&0&12'), '1&1&1')
+        self.assertEqual(deletion.get_object_lookup_key('6b1f0c2a&2&1&1&1&0&0&12'), '2&1&1&1')
@@ -0,0 +1,97 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from bosscore.lookup import LookUpKey
+from bosscore.models import BossLookup
+from .setup_db import SetupTestDB
+
+
+class LookUpKeyTests(TestCase):
+    """
+    Class to test the cached bosskey to lookup key mapping
+    """
+
+    def setUp(self):
+        """
+            Initialize the database
+            :return:
+        """
+        user = User.objects.create_superuser(username='testuser', email='test@test.com', password='testuser')
+        dbsetup = SetupTestDB()
+        dbsetup.set_user(user)
+        dbsetup.insert_test_data()
+
+    def test_get_lookup_key_cached(self):
+        """
+        Test repeated lookups are served from the cache in both directions
+        :return:
+        """
+        lookup_key = LookUpKey.get_lookup_key('col1&exp1&channel1').lookup_key
+
+        with self.assertNumQueries(0):
+            self.assertEqual(LookUpKey.get_lookup_key('col1&exp1&channel1').lookup_key, lookup_key)
+            self.assertEqual(LookUpKey.get_boss_key(lookup_key).boss_key, 'col1&exp1&channel1')
+
+    def test_get_lookup_keys_bulk(self):
+        """
+        Test many bosskeys are resolved with a single query and unknown keys are left out
+        :return:
+        """
+        bkeys = ['col1', 'col1&exp1', 'col1&exp1&channel1', 'col1&exp1&channel2', 'col1&exp1&missing']
+        with self.assertNumQueries(1):
+            lookups = LookUpKey.get_lookup_keys(bkeys)
+
+        self.assertEqual(sorted(lookups.keys()), sorted(bkeys[:-1]))
+        with self.assertNumQueries(0):
+            self.assertEqual(LookUpKey.get_lookup_keys(bkeys[:-1]), lookups)
+
+    def test_add_lookup_keeps_other_entries(self):
+        """
+        Test adding a lookup does not invalidate the cached lookups of other resources
+        :return:
+        """
+        lookup_key = LookUpKey.get_lookup_key('col1&exp1&channel1').lookup_key
+        LookUpKey.add_lookup('99&99&99', 'col1&exp1&channel99', 'col1', 'exp1', 'channel99')
+        LookUpKey.add_lookups([('99&99&98', 'col1&exp1&channel98', 'col1', 'exp1', 'channel98')])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(LookUpKey.get_lookup_key('col1&exp1&channel1').lookup_key, lookup_key)
+            self.assertEqual(LookUpKey.get_lookup_key('col1&exp1&channel99').lookup_key, '99&99&99')
+        self.assertEqual(LookUpKey.get_lookup_key('col1&exp1&channel98').lookup_key, '99&99&98')
+
+    def test_update_lookup_invalidates(self):
+        """
+        Test renaming a resource removes the old bosskey from the cache
+        :return:
+        """
+        lookup_key = LookUpKey.get_lookup_key('col1&exp1&channel2').lookup_key
+        LookUpKey.update_lookup(lookup_key, 'col1&exp1&channel3', 'col1', 'exp1', 'channel3')
+
+        with self.assertRaises(BossLookup.DoesNotExist):
+            LookUpKey.get_lookup_key('col1&exp1&channel2')
+        self.assertEqual(LookUpKey.get_lookup_key('col1&exp1&channel3').lookup_key, lookup_key)
+
+    def test_delete_lookup_invalidates(self):
+        """
+        Test deleted lookups are removed from the cache
+        :return:
+        """
+        LookUpKey.get_lookup_key('col1&exp1&channel2')
+        LookUpKey.delete_lookup_key('col1', 'exp1', 'channel2')
+
+        with self.assertRaises(BossLookup.DoesNotExist):
+            LookUpKey.get_lookup_key('col1&exp1&channel2')
@@ -0,0 +1,97 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.test import TestCase
+from django.contrib.auth.models import Group
+from guardian.shortcuts import assign_perm, remove_perm
+
+from bosscore.models import ChannelLayer
+from bosscore.permissions import BossPermissionManager
+from .setup_db import SetupTestDB
+
+
+class PermissionCacheTests(TestCase):
+    """
+    Class to test the cached permission checks
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        dbsetup = SetupTestDB()
+        self.user = dbsetup.create_user('testuser')
+        dbsetup.set_user(self.user)
+        dbsetup.insert_test_data()
+
+        self.channel1 = ChannelLayer.objects.get(name='channel1')
+        self.channel2 = ChannelLayer.objects.get(name='channel2')
+
+    def test_sibling_permissions_prefetched(self):
+        """
+        Test checking one channel loads the permissions of every channel in the experiment
+        :return:
+        """
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'GET'))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'POST'))
+            self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel2, 'GET'))
+            self.assertTrue(BossPermissionManager.check_resource_permissions(self.user, self.channel2, 'PUT'))
+
+    def test_remove_perm_invalidates(self):
+        """
+        Test removing a permission is seen by the next check
+        :return:
+        """
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'GET'))
+        remove_perm('read_volumetric_data', Group.objects.get(name='testuser-primary'), self.channel1)
+        self.assertFalse(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'GET'))
+
+    def test_group_membership_invalidates(self):
+        """
+        Test removing a user from a group is seen by the next check
+        :return:
+        """
+        self.assertTrue(BossPermissionManager.check_resource_permissions(self.user, self.channel1, 'GET'))
+        Group.objects.get(name='testuser-primary').user_set.remove(self.user)
+        self.assertFalse(BossPermissionManager.check_resource_permissions(self.user, self.channel1, 'GET'))
+
+    def test_other_user_changes_keep_cache(self):
+        """
+        Test permission and membership changes of other users do not invalidate the user's cached permissions
+        :return:
+        """
+        other = SetupTestDB().create_user('otheruser')
+        self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'GET'))
+
+        assign_perm('read', Group.objects.get(name='otheruser-primary'), self.channel1)
+        Group.objects.create(name='othergroup').user_set.add(other)
+        other.is_active = False
+        other.save()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(BossPermissionManager.check_data_permissions(self.user, self.channel1, 'GET'))
+
+    def test_superuser_has_all_permissions(self):
+        """
+        Test superusers get every permission of the model
+        :return:
+        """
+        self.user.is_superuser = True
+        self.user.save()
+        perms = BossPermissionManager.get_user_permissions(self.user, self.channel1)
+        self.assertIn('delete_volumetric_data', perms)
+        self.assertIn('assign_group', perms)
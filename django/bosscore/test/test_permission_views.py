@@ -344,3 +344,72 @@ class PermissionViewsChannelLayerTests(APITestCase):
         resp = json.loads(response.content.decode('utf-8'))
         self.assertEqual(response.status_code, 201)
         self.assertEqual(len(resp['permissions']), 0)
+
+
+class BulkPermissionViewTests(APITestCase):
+    """
+    Class to test granting permissions on many resources to many groups
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        dbsetup = SetupTestDB()
+        user = dbsetup.create_user('testuser')
+        dbsetup.add_role('resource-manager')
+        dbsetup.set_user(user)
+
+        self.client.force_login(user)
+        dbsetup.create_group('test')
+        dbsetup.create_group('test2')
+        dbsetup.insert_test_data()
+
+    def test_bulk_grant(self):
+        """
+        Grant permissions on several resources to several groups and check they are visible per resource
+
+        """
+        url = '/' + version + '/permission/bulk/'
+        data = {'groups': ['test', 'test2'],
+                'permissions': ['read', 'update'],
+                'resources': [{'collection': 'col1', 'experiment': 'exp1', 'channel_layer': 'channel1'},
+                              {'collection': 'col1', 'experiment': 'exp1', 'channel_layer': 'channel2'}]}
+
+        response = self.client.post(url, data=data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 8)
+
+        response = self.client.get('/' + version + '/permission/test2/col1/exp1/channel2')
+        resp = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(sorted(resp['permissions']), ['read', 'update'])
+
+        # Repeating the grant creates nothing
+        response = self.client.post(url, data=data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 0)
+
+    def test_bulk_grant_invalid(self):
+        """
+        Missing groups, missing resources and unknown permissions are rejected
+
+        """
+        url = '/' + version + '/permission/bulk/'
+        resources = [{'collection': 'col1', 'experiment': 'exp1'}]
+
+        response = self.client.post(url, data={'groups': ['nogroup'], 'permissions': ['read'],
+                                               'resources': resources}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(url, data={'groups': ['test'], 'permissions': ['read'],
+                                               'resources': [{'collection': 'col1', 'experiment': 'exp9'}]},
+                                    format='json')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(url, data={'groups': ['test'], 'permissions': ['read_volumetric_data'],
+                                               'resources': resources}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(url, data={'groups': ['test'], 'resources': resources}, format='json')
+        self.assertEqual(response.status_code, 400)
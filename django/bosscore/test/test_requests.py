@@ -298,5 +298,22 @@ class BossCoreRequestTests(APITestCase):
         with self.assertRaises(BossError):
             BossRequest(drfrequest)
 
-
-
+    def test_request_cutout_cached_resources(self):
+        """
+        Test that cutout arguments are set when the resources are resolved from the resource cache
+        :return:
+        """
+        url = '/' + version + '/cutout/col1/exp1/channel1/0/0:5/0:6/0:2/'
+
+        for _ in range(2):
+            req = HttpRequest()
+            req.META = {'PATH_INFO': url}
+            drfrequest = Request(req)
+            drfrequest.version = version
+            ret = BossRequest(drfrequest)
+
+            self.assertEqual(ret.get_channel_layer(), 'channel1')
+            self.assertEqual(ret.get_resolution(), 0)
+            self.assertEqual((ret.get_x_start(), ret.get_x_stop()), (0, 5))
+            self.assertEqual((ret.get_y_start(), ret.get_y_stop()), (0, 6))
+            self.assertEqual((ret.get_z_start(), ret.get_z_stop()), (0, 2))
@@ -0,0 +1,91 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from bosscore.error import BossError, ErrorCodes
+from bosscore.models import Experiment
+from bosscore.resolver import resolve_resources, RESOURCE_CACHE
+from .setup_db import SetupTestDB
+
+
+class ResourceResolverTests(TestCase):
+    """
+    Class to test the cached resource resolver
+    """
+
+    def setUp(self):
+        """
+            Initialize the database
+            :return:
+        """
+        user = User.objects.create_superuser(username='testuser', email='test@test.com', password='testuser')
+        dbsetup = SetupTestDB()
+        dbsetup.set_user(user)
+        dbsetup.insert_test_data()
+        RESOURCE_CACHE.invalidate()
+
+    def test_resolve_channel_single_query(self):
+        """
+        Test a channel, its parents and the coordinate frame are loaded in one query and then cached
+        :return:
+        """
+        with self.assertNumQueries(1):
+            collection, experiment, channel = resolve_resources('col1', 'exp1', 'channel1')
+            self.assertEqual(experiment.coord_frame.name, 'cf1')
+
+        self.assertEqual(collection.name, 'col1')
+        self.assertEqual(experiment.name, 'exp1')
+        self.assertEqual(channel.name, 'channel1')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_resources('col1', 'exp1', 'channel1')[2].name, 'channel1')
+
+    def test_resolve_partial(self):
+        """
+        Test resolving only a collection or an experiment
+        :return:
+        """
+        self.assertEqual(resolve_resources('col1'), (resolve_resources('col1')[0], None, None))
+        collection, experiment, channel = resolve_resources('col1', 'exp1')
+        self.assertEqual(experiment.name, 'exp1')
+        self.assertIsNone(channel)
+
+    def test_resolve_not_found(self):
+        """
+        Test the missing level of the hierarchy is reported
+        :return:
+        """
+        with self.assertRaises(BossError) as err:
+            resolve_resources('col1', 'exp2', 'channel1')
+        self.assertEqual(err.exception.args[0], 'Experiment exp2 not found')
+        self.assertEqual(err.exception.args[1], ErrorCodes.RESOURCE_NOT_FOUND)
+
+        with self.assertRaises(BossError) as err:
+            resolve_resources('col1', 'exp1', 'channel9')
+        self.assertEqual(err.exception.args[0], 'Channel/Layer channel9 not found')
+
+    def test_save_invalidates(self):
+        """
+        Test saving a resource clears the cache
+        :return:
+        """
+        self.assertEqual(resolve_resources('col1', 'exp1')[1].max_time_sample, 10)
+
+        experiment = Experiment.objects.get(name='exp1')
+        experiment.max_time_sample = 20
+        experiment.save()
+
+        self.assertEqual(resolve_resources('col1', 'exp1')[1].max_time_sample, 20)
@@ -0,0 +1,193 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from bosscore.models import Experiment
+from .setup_db import SetupTestDB
+
+version = settings.BOSS_VERSION
+
+
+class ResourceQueryCountTests(APITestCase):
+    """
+    Class to test the resource views make the same number of queries however many rows they serialize
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        self.dbsetup = SetupTestDB()
+        user = self.dbsetup.create_user('testuser')
+        self.dbsetup.set_user(user)
+
+        self.client.force_login(user)
+        self.dbsetup.insert_test_data()
+
+    def count_queries(self, url):
+        """
+        Count the queries made by a GET request after a warm up request
+        :param url: URL to get
+        :return: Number of queries
+        """
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return len(queries)
+
+    def add_rows(self, count):
+        """
+        Add experiments, channels, layers and layer links
+        :param count: Number of each to add
+        :return: None
+        """
+        for idx in range(count):
+            self.dbsetup.add_experiment('col1', 'extra_exp{}'.format(idx), 'cf1', 10, 10)
+            self.dbsetup.add_channel('col1', 'exp1', 'extra_channel{}'.format(idx), 0, 0, 'uint8')
+            self.dbsetup.add_layer('col1', 'exp1', 'extra_layer{}'.format(idx), 0, 0, 'uint8')
+            self.dbsetup.add_channel_layer_map('col1', 'exp1', 'extra_channel{}'.format(idx),
+                                               'extra_layer{}'.format(idx))
+            self.dbsetup.add_collection('extra_col{}'.format(idx), 'Extra collection')
+            self.dbsetup.add_coordinate_frame('extra_cf{}'.format(idx), 'Extra frame', 0, 10, 0, 10, 0, 10, 4, 4, 4, 1)
+
+    def assertConstantQueries(self, url):
+        """
+        Check the number of queries for a URL does not grow with the number of rows
+        :param url: URL to get
+        :return: None
+        """
+        before = self.count_queries(url)
+        self.add_rows(5)
+        self.assertEqual(self.count_queries(url), before)
+
+    def test_collection_list(self):
+        self.assertConstantQueries('/' + version + '/resource/collections/')
+
+    def test_collection_detail(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/')
+
+    def test_experiment_list(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/experiments/')
+
+    def test_experiment_detail(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/exp1/')
+
+    def test_channel_list(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/exp1/channels/')
+
+    def test_layer_list(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/exp1/layers/')
+
+    def test_channel_detail(self):
+        self.assertConstantQueries('/' + version + '/resource/col1/exp1/channel1/')
+
+    def test_coordinate_frame_list(self):
+        self.assertConstantQueries('/' + version + '/resource/coordinateframes/')
+
+    def test_tree(self):
+        self.assertConstantQueries('/' + version + '/resource-tree/')
+
+    def test_collection_tree(self):
+        self.assertConstantQueries('/' + version + '/resource-tree/col1/')
+
+
+class ResourceTreeTests(APITestCase):
+    """
+    Class to test the resource tree view
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        self.dbsetup = SetupTestDB()
+        user = self.dbsetup.create_user('testuser')
+        self.dbsetup.set_user(user)
+
+        self.client.force_login(user)
+        self.dbsetup.insert_test_data()
+        self.url = '/' + version + '/resource-tree/col1/'
+
+    def get_tree(self, response):
+        """
+        Decode a streamed tree
+        :param response: Tree response
+        :return: Decoded tree
+        """
+        return json.loads(b''.join(response.streaming_content).decode())
+
+    def test_tree_content(self):
+        """
+        Test the tree nests the experiments, channels and layers of the collection
+        :return:
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        tree = self.get_tree(response)
+
+        self.assertEqual([col['name'] for col in tree['collections']], ['col1'])
+        experiment = tree['collections'][0]['experiments'][0]
+        self.assertEqual(experiment['name'], 'exp1')
+        self.assertEqual(experiment['creator'], 'testuser')
+        names = {channel_layer['name']: channel_layer for channel_layer in experiment['channel_layers']}
+        self.assertEqual(set(names), {'channel1', 'channel2', 'layer1'})
+        self.assertEqual(names['channel1']['linked_channel_layers'], [names['layer1']['id']])
+        self.assertEqual([frame['name'] for frame in tree['coord_frames']], ['cf1'])
+
+    def test_tree_not_found(self):
+        """
+        Test the tree of a collection that does not exist
+        :return:
+        """
+        response = self.client.get('/' + version + '/resource-tree/col10/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tree_not_permitted(self):
+        """
+        Test other users do not see the tree
+        :return:
+        """
+        self.client.force_login(self.dbsetup.create_user('otheruser'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get('/' + version + '/resource-tree/')
+        self.assertEqual(self.get_tree(response)['collections'], [])
+
+    def test_tree_etag(self):
+        """
+        Test the ETag matches until a resource changes
+        :return:
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        experiment = Experiment.objects.get(name='exp1')
+        experiment.description = 'Changed'
+        experiment.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
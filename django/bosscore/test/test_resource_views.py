@@ -144,7 +144,7 @@ class ResourceViewsCollectionTests(APITestCase):
 
         # Get an existing collection
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_delete_collection_invalid(self):
         """
@@ -352,7 +352,7 @@ class ResourceViewsExperimentTests(APITestCase):
         url = '/' + version + '/resource/col1/exp2'
 
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_delete_experiment_invalid(self):
         """
@@ -688,7 +688,7 @@ class ResourceViewsChannelTests(APITestCase):
 
         url = '/' + version + '/resource/col1/exp1/channel10'
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_delete_channel_invalid(self):
         """
@@ -964,7 +964,7 @@ class ResourceViewsLayerTests(APITestCase):
 
         url = '/' + version + '/resource/col1/exp1/layer10'
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 202)
 
     def test_delete_channel_doesnotexist(self):
         """
@@ -986,3 +986,95 @@ class ResourceViewsLayerTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data[0]['name'], 'layer1')
+
+
+class ResourceViewsBulkTests(APITestCase):
+    """
+    Class to test bulk resource creation
+    """
+
+    def setUp(self):
+        """
+        Initialize the database
+        :return:
+        """
+        dbsetup = SetupTestDB()
+        user = dbsetup.create_user('testuser')
+        dbsetup.add_role('resource-manager')
+        dbsetup.set_user(user)
+
+        self.client.force_login(user)
+        dbsetup.insert_test_data()
+        self.url = '/' + version + '/resource-bulk/'
+
+    def test_bulk_create(self):
+        """
+        Create a collection with an experiment, a channel and a layer, and a channel in an existing experiment
+
+        """
+        data = {'collections': [{'name': 'col2', 'description': 'Bulk collection'}],
+                'experiments': [{'collection': 'col2', 'name': 'exp2', 'coord_frame': 'cf1',
+                                 'hierarchy_method': 'slice'}],
+                'channel_layers': [{'collection': 'col2', 'experiment': 'exp2', 'name': 'channel10',
+                                    'is_channel': True, 'datatype': 'uint8'},
+                                   {'collection': 'col2', 'experiment': 'exp2', 'name': 'layer10',
+                                    'is_channel': False, 'datatype': 'uint64', 'channels': ['channel10']},
+                                   {'collection': 'col1', 'experiment': 'exp1', 'name': 'channel11',
+                                    'is_channel': True, 'datatype': 'uint16'}]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['channel_layers']), 3)
+
+        response = self.client.get('/' + version + '/resource/col2/exp2/layer10/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['linked_channel_layers']), 1)
+
+        response = self.client.get('/' + version + '/resource/col1/exp1/channels/')
+        self.assertIn('channel11', [channel['name'] for channel in response.data])
+
+    def test_bulk_create_layer_channel_ids(self):
+        """
+        Layers can reference existing channels by id, as in the single resource API, but only in their experiment
+
+        """
+        channel_id = self.client.get('/' + version + '/resource/col1/exp1/channel1/').data['id']
+        data = {'channel_layers': [{'collection': 'col1', 'experiment': 'exp1', 'name': 'layer10',
+                                    'is_channel': False, 'datatype': 'uint64', 'channels': [channel_id]}]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/' + version + '/resource/col1/exp1/layer10/')
+        self.assertEqual(response.data['linked_channel_layers'], [channel_id])
+
+        data = {'collections': [{'name': 'col2'}],
+                'experiments': [{'collection': 'col2', 'name': 'exp2', 'coord_frame': 'cf1',
+                                 'hierarchy_method': 'slice'}],
+                'channel_layers': [{'collection': 'col2', 'experiment': 'exp2', 'name': 'layer11',
+                                    'is_channel': False, 'datatype': 'uint64', 'channels': [channel_id]}]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_create_invalid(self):
+        """
+        Nothing is created if any resource is invalid
+
+        """
+        data = {'collections': [{'name': 'col2'}],
+                'experiments': [{'collection': 'col2', 'name': 'exp2', 'coord_frame': 'cf1',
+                                 'hierarchy_method': 'unknown'}]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/' + version + '/resource/col2/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_create_exists(self):
+        """
+        Resources that already exist are rejected
+
+        """
+        data = {'channel_layers': [{'collection': 'col1', 'experiment': 'exp1', 'name': 'channel1',
+                                    'is_channel': True, 'datatype': 'uint8'}]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['code'], 6002)
@@ -18,7 +18,8 @@ from django.core.urlresolvers import resolve
 from django.conf import settings
 
 from bosscore.views.views_resource import CollectionList, CollectionDetail, ExperimentList, ExperimentDetail, \
-    ChannelList, LayerList, ChannelLayerDetail, CoordinateFrameList, CoordinateFrameDetail
+    ChannelList, LayerList, ChannelLayerDetail, CoordinateFrameList, CoordinateFrameDetail, ResourceTree, \
+    BulkResourceCreate, DeleteJobStatus
 from bosscore.views.views_permission import ResourceUserPermission
 from bosscore.views.views_group import BossGroupMember, BossGroup
 from bosscore.views.views_user import BossUserRole, BossUser, BossUserGroups
@@ -88,6 +89,56 @@ class BossCoreResourceRoutingTests(APITestCase):
         match = resolve('/' + version + '/resource/coordinateframes/cf1/')
         self.assertEqual(match.func.__name__, CoordinateFrameDetail.as_view().__name__)
 
+    def test_resource_tree_resolves(self):
+        """
+        Test that the resource tree urls resolve correctly
+
+        Returns: None
+
+        """
+
+        match = resolve('/' + version + '/resource-tree/')
+        self.assertEqual(match.func.__name__, ResourceTree.as_view().__name__)
+
+        match = resolve('/' + version + '/resource-tree/col1')
+        self.assertEqual(match.func.__name__, ResourceTree.as_view().__name__)
+        self.assertEqual(match.kwargs['collection'], 'col1')
+
+    def test_resource_bulk_resolves(self):
+        """
+        Test that the bulk resource url resolves correctly
+
+        Returns: None
+
+        """
+
+        match = resolve('/' + version + '/resource-bulk/')
+        self.assertEqual(match.func.__name__, BulkResourceCreate.as_view().__name__)
+
+    def test_resources_named_like_endpoints_resolve(self):
+        """
+        Test that collections named bulk or tree are not shadowed by the bulk and tree urls
+
+        Returns: None
+
+        """
+        for name in ('bulk', 'tree'):
+            match = resolve('/' + version + '/resource/{}/'.format(name))
+            self.assertEqual(match.func.__name__, CollectionDetail.as_view().__name__)
+            self.assertEqual(match.kwargs['collection'], name)
+
+    def test_delete_job_resolves(self):
+        """
+        Test that the delete job url resolves correctly
+
+        Returns: None
+
+        """
+
+        match = resolve('/' + version + '/delete-job/12/')
+        self.assertEqual(match.func.__name__, DeleteJobStatus.as_view().__name__)
+        self.assertEqual(match.kwargs['job_id'], '12')
+
 class BossCorePermissionRoutingTests(APITestCase):
 
     def test_permission_collection_resolves(self):
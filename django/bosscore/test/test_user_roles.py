@@ -13,10 +13,10 @@
 # limitations under the License.
 
 from rest_framework.test import APITestCase
-from django.test import TestCase
+from django.test import TestCase, RequestFactory
 from django.conf import settings
 from .setup_db import SetupTestDB
-from bosscore.privileges import BossPrivilegeManager
+from bosscore.privileges import BossPrivilegeManager, get_request_roles
 
 version = settings.BOSS_VERSION
 
@@ -57,3 +57,27 @@ class UserPrivilegeTests(TestCase):
 
 
 
+
+    def test_roles_cached(self):
+        """
+        Test roles are only loaded from the database once and are refreshed when they change
+        """
+        BossPrivilegeManager('testuser')
+
+        user = self.dbsetup.get_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(BossPrivilegeManager(user).has_role('user-manager'), True)
+
+        self.dbsetup.add_role('resource-manager', user)
+        self.assertEqual(BossPrivilegeManager(user).has_role('resource-manager'), True)
+
+    def test_request_roles(self):
+        """
+        Test the roles of the requesting user are exposed on the request
+        """
+        request = RequestFactory().get('/')
+        request.user = self.dbsetup.get_user()
+
+        roles = get_request_roles(request)
+        self.assertEqual(roles, frozenset(['default', 'user-manager']))
+        self.assertEqual(request.boss_roles, roles)
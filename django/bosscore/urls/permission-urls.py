@@ -17,6 +17,9 @@ from bosscore.views import views_permission
 
 urlpatterns = [
 
+    # URL to grant permissions on many resources to many groups
+    url(r'^bulk/?$', views_permission.BulkResourcePermission.as_view()),
+
     # URLS for permissions - Group to resource
     url(r'(?P<group_name>[\w_-]+)/(?P<collection>[\w_-]+)/?(?P<experiment>[\w_-]+)?/?(?P<channel_layer>[\w_-]+)?/?',
         views_permission.ResourceUserPermission.as_view()),
@@ -180,3 +180,109 @@ class ResourceUserPermission(APIView):
                                  ErrorCodes.UNRECOGNIZED_PERMISSION)
         except BossError as err:
             return err.to_http()
+
+
+class BulkResourcePermission(APIView):
+    """
+    View to grant permissions on many resources to many groups in one request
+
+    """
+
+    @staticmethod
+    def get_objects(resources):
+        """ Return the resources named in a bulk request
+
+        Resources are loaded with one query per collection or experiment that they belong to.
+
+        Args:
+            resources: List of dicts with a 'collection' and optional 'experiment' and 'channel_layer' names
+
+        Returns:
+            List of resource instances
+
+        Raises:
+            BossError: If a resource is missing or not fully specified
+
+        """
+        collections = set()
+        experiments = {}
+        channel_layers = {}
+        for resource in resources:
+            collection = resource.get('collection')
+            experiment = resource.get('experiment')
+            channel_layer = resource.get('channel_layer')
+            if not collection or (channel_layer and not experiment):
+                raise BossError("Invalid resource {}".format(resource), ErrorCodes.INVALID_POST_ARGUMENT)
+
+            if channel_layer:
+                channel_layers.setdefault((collection, experiment), set()).add(channel_layer)
+            elif experiment:
+                experiments.setdefault(collection, set()).add(experiment)
+            else:
+                collections.add(collection)
+
+        objs = []
+        if collections:
+            found = list(Collection.objects.filter(name__in=collections))
+            missing = collections - {obj.name for obj in found}
+            if missing:
+                raise BossError("{} does not exist".format(', '.join(sorted(missing))), ErrorCodes.RESOURCE_NOT_FOUND)
+            objs.extend(found)
+
+        for collection, names in experiments.items():
+            found = list(Experiment.objects.filter(collection__name=collection, name__in=names))
+            missing = names - {obj.name for obj in found}
+            if missing:
+                raise BossError("{} does not exist".format(', '.join(sorted(missing))), ErrorCodes.RESOURCE_NOT_FOUND)
+            objs.extend(found)
+
+        for (collection, experiment), names in channel_layers.items():
+            found = list(ChannelLayer.objects.filter(experiment__collection__name=collection,
+                                                     experiment__name=experiment, name__in=names))
+            missing = names - {obj.name for obj in found}
+            if missing:
+                raise BossError("{} does not exist".format(', '.join(sorted(missing))), ErrorCodes.RESOURCE_NOT_FOUND)
+            objs.extend(found)
+
+        return objs
+
+    @check_role("resource-manager")
+    def post(self, request):
+        """ Add permissions to many resources for many groups
+
+        The request body contains the list of 'groups', the list of 'permissions' and the list of 'resources' as
+        dicts with a 'collection' and optional 'experiment' and 'channel_layer' name. Every permission is granted to
+        every group on every resource in one transaction. Permissions that already exist are skipped.
+
+        Args:
+            request: Django rest framework request
+
+        Returns:
+            Http status code and the number of permissions created
+
+        """
+        for field in ('groups', 'permissions', 'resources'):
+            if not request.data.get(field):
+                return BossHTTPError("{} are not included in the request".format(field.capitalize()),
+                                     ErrorCodes.INVALID_POST_ARGUMENT)
+
+        try:
+            groups = list(Group.objects.filter(name__in=request.data['groups']))
+            missing = set(request.data['groups']) - {group.name for group in groups}
+            if missing:
+                return BossGroupNotFoundError(', '.join(sorted(missing)))
+
+            objs = self.get_objects(request.data['resources'])
+            for obj in objs:
+                if 'assign_group' not in BossPermissionManager.get_user_permissions(request.user, obj):
+                    return BossPermissionError('assign group', obj.name)
+
+            created = BossPermissionManager.bulk_grant([(group, perm, obj) for group in groups
+                                                        for perm in request.data['permissions'] for obj in objs])
+            return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+        except Permission.DoesNotExist:
+            return BossHTTPError("Invalid permissions in post {}".format(request.data['permissions']),
+                                 ErrorCodes.UNRECOGNIZED_PERMISSION)
+        except BossError as err:
+            return err.to_http()
@@ -12,24 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models.deletion import ProtectedError
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from guardian.shortcuts import get_objects_for_user
 from functools import wraps
 
+from bosscore.acl import get_readable, paginated_response
+from bosscore.deletion import start_delete_job
 from bosscore.error import BossHTTPError, BossPermissionError, BossResourceNotFoundError, ErrorCodes
 from bosscore.lookup import LookUpKey
-from bosscore.permissions import BossPermissionManager
+from bosscore.permissions import BossPermissionManager, PERMISSION_CACHE, get_default_permissions, permission_group
 from bosscore.privileges import check_role
+from bosscore.resolver import RESOURCE_CACHE
 
 from bosscore.serializers import CollectionSerializer, ExperimentSerializer, ChannelLayerSerializer,\
-    LayerSerializer, CoordinateFrameSerializer, CoordinateFrameUpdateSerializer, ChannelLayerMapSerializer
-from bosscore.models import Collection, Experiment, ChannelLayer, CoordinateFrame
+    LayerSerializer, CoordinateFrameSerializer, CoordinateFrameUpdateSerializer, ChannelLayerMapSerializer,\
+    DeleteJobSerializer
+from bosscore.models import Collection, Experiment, ChannelLayer, CoordinateFrame, ChannelLayerMap, DeleteJob
 
 
 class CollectionDetail(APIView):
@@ -49,7 +60,8 @@ class CollectionDetail(APIView):
             Collection
         """
         try:
-            collection_obj = Collection.objects.get(name=collection)
+            collection_obj = CollectionSerializer.eager_load(Collection.objects.all()).get(name=collection,
+                                                                                          deleting=False)
 
             # Check for permissions
             if request.user.has_perm("read", collection_obj):
@@ -136,28 +148,22 @@ class CollectionDetail(APIView):
             request: DRF Request object
             collection:  Name of collection to delete
         Returns:
-            Http status
+            Delete job that removes the collection
         """
         try:
-            collection_obj = Collection.objects.get(name=collection)
+            collection_obj = Collection.objects.get(name=collection, deleting=False)
             if request.user.has_perm("delete", collection_obj):
-                collection_obj.delete()
-                # # get the lookup key and delete all the meta data for this object
-                # lkey = LookUpKey.get_lookup_key(collection)
-                # mdb = MetaDB()
-                # mdb.delete_meta_keys(lkey.lookup_key)
+                if collection_obj.experiments.exists():
+                    return BossHTTPError("Cannot delete {}. It has experiments that reference it.".format(collection),
+                                         ErrorCodes.INTEGRITY_ERROR)
 
-                # delete the lookup key for this object
-                LookUpKey.delete_lookup_key(collection, None, None)
-
-                return HttpResponse(status=204)
+                # The metadata and the lookup key are removed by a background job
+                job = start_delete_job(request.user, collection_obj, collection)
+                return Response(DeleteJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             else:
                 return BossPermissionError('delete', collection)
         except Collection.DoesNotExist:
             return BossResourceNotFoundError(collection)
-        except ProtectedError:
-            return BossHTTPError("Cannot delete {}. It has experiments that reference it.".format(collection),
-                                 ErrorCodes.INTEGRITY_ERROR)
 
 
 class CoordinateFrameDetail(APIView):
@@ -280,7 +286,8 @@ class ExperimentDetail(APIView):
         """
         try:
             collection_obj = Collection.objects.get(name=collection)
-            experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
+            experiment_obj = ExperimentSerializer.eager_load(Experiment.objects.all())\
+                .get(name=experiment, collection=collection_obj, deleting=False)
             # Check for permissions
             if request.user.has_perm("read", experiment_obj):
                 serializer = ExperimentSerializer(experiment_obj)
@@ -387,31 +394,25 @@ class ExperimentDetail(APIView):
             collection:  Name of collection
             experiment: Experiment name to delete
         Returns:
-            Http status
+            Delete job that removes the experiment
         """
         try:
             collection_obj = Collection.objects.get(name=collection)
-            experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
+            experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj, deleting=False)
             if request.user.has_perm("delete", experiment_obj):
-                experiment_obj.delete()
-                # # get the lookup key and delete all the meta data for this object
-                # bosskey = collection + '&' + experiment
-                # lkey = LookUpKey.get_lookup_key(bosskey)
-                # mdb = MetaDB()
-                # mdb.delete_meta_keys(lkey)
-
-                # delete the lookup key for this object
-                LookUpKey.delete_lookup_key(collection, experiment, None)
-                return HttpResponse(status=204)
+                if experiment_obj.channellayer.exists():
+                    return BossHTTPError("Cannot delete {}. It has channels or layers that reference "
+                                         "it.".format(experiment), ErrorCodes.INTEGRITY_ERROR)
+
+                # The metadata and the lookup key are removed by a background job
+                job = start_delete_job(request.user, experiment_obj, collection, experiment)
+                return Response(DeleteJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             else:
                 return BossPermissionError('delete', experiment)
         except Collection.DoesNotExist:
             return BossResourceNotFoundError(collection)
         except Experiment.DoesNotExist:
             return BossResourceNotFoundError(experiment)
-        except ProtectedError:
-            return BossHTTPError("Cannot delete {}. It has channels or layers that reference "
-                                      "it.".format(experiment), ErrorCodes.INTEGRITY_ERROR)
 
 
 class ChannelLayerDetail(APIView):
@@ -459,7 +460,8 @@ class ChannelLayerDetail(APIView):
         try:
             collection_obj = Collection.objects.get(name=collection)
             experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
-            channel_layer_obj = ChannelLayer.objects.get(name=channel_layer, experiment=experiment_obj)
+            channel_layer_obj = ChannelLayerSerializer.eager_load(ChannelLayer.objects.all())\
+                .get(name=channel_layer, experiment=experiment_obj, deleting=False)
 
             # Check for permissions
             if request.user.has_perm("read", channel_layer_obj):
@@ -612,19 +614,22 @@ class ChannelLayerDetail(APIView):
             channel_layer: Channel or Layer name
 
         Returns :
-            Http status
+            Delete job that removes the channel or layer
         """
         try:
             collection_obj = Collection.objects.get(name=collection)
             experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
-            channel_layer_obj = ChannelLayer.objects.get(name=channel_layer, experiment=experiment_obj)
+            channel_layer_obj = ChannelLayer.objects.get(name=channel_layer, experiment=experiment_obj,
+                                                         deleting=False)
 
             if request.user.has_perm("delete", channel_layer_obj):
-                channel_layer_obj.delete()
+                if ChannelLayerMap.objects.filter(channel=channel_layer_obj).exists():
+                    return BossHTTPError("Cannot delete {}. It has layers that reference it.".format(channel_layer),
+                                         ErrorCodes.INTEGRITY_ERROR)
 
-                # delete the lookup key for this object
-                LookUpKey.delete_lookup_key(collection, experiment, channel_layer)
-                return HttpResponse(status=204)
+                # The cuboids, cache entries, metadata and lookup key are removed by a background job
+                job = start_delete_job(request.user, channel_layer_obj, collection, experiment, channel_layer)
+                return Response(DeleteJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             else:
                 return BossPermissionError('delete', channel_layer)
 
@@ -634,9 +639,6 @@ class ChannelLayerDetail(APIView):
             return BossResourceNotFoundError(experiment)
         except ChannelLayer.DoesNotExist:
             return BossResourceNotFoundError(channel_layer)
-        except ProtectedError:
-            return BossHTTPError("Cannot delete {}. It has layers that reference it.".format(channel_layer),
-                                 ErrorCodes.INTEGRITY_ERROR)
 
 
 class CollectionList(generics.ListAPIView):
@@ -655,13 +657,12 @@ class CollectionList(generics.ListAPIView):
             *args:
             **kwargs:
 
-        Returns: Collections that user has view permissions on
+        Returns: Collections that user has view permissions on, paginated with the 'limit' and 'after' query
+        arguments
 
         """
-        # queryset = self.get_queryset()
-        collections = get_objects_for_user(request.user, 'read', klass=Collection)
-        serializer = CollectionSerializer(collections, many=True)
-        return Response(serializer.data)
+        collections = CollectionSerializer.eager_load(get_readable(request.user, Collection)).filter(deleting=False)
+        return paginated_response(collections, request, CollectionSerializer)
 
 
 class ExperimentList(generics.ListAPIView):
@@ -681,14 +682,13 @@ class ExperimentList(generics.ListAPIView):
             *args:
             **kwargs:
 
-        Returns: Experiments that user has view permissions on
+        Returns: Experiments that user has view permissions on, paginated with the 'limit' and 'after' query
+        arguments
 
         """
-        collection_obj = Collection.objects.get(name=collection)
-        all_experiments = get_objects_for_user(request.user, 'read', klass=Experiment)
-        experiments = all_experiments.filter(collection=collection_obj)
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
+        experiments = ExperimentSerializer.eager_load(get_readable(request.user, Experiment))\
+            .filter(collection__name=collection, deleting=False)
+        return paginated_response(experiments, request, ExperimentSerializer)
 
 
 class ChannelList(generics.ListAPIView):
@@ -709,15 +709,13 @@ class ChannelList(generics.ListAPIView):
             *args:
             **kwargs:
 
-        Returns: Channel_Layers that user has view permissions on
+        Returns: Channel_Layers that user has view permissions on, paginated with the 'limit' and 'after' query
+        arguments
 
         """
-        collection_obj = Collection.objects.get(name=collection)
-        experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
-        channel_layers = get_objects_for_user(request.user, 'read',
-                                              klass=ChannelLayer).filter(is_channel=True, experiment=experiment_obj)
-        serializer = ChannelLayerSerializer(channel_layers, many=True)
-        return Response(serializer.data)
+        channel_layers = ChannelLayerSerializer.eager_load(get_readable(request.user, ChannelLayer)).filter(
+            is_channel=True, experiment__name=experiment, experiment__collection__name=collection, deleting=False)
+        return paginated_response(channel_layers, request, ChannelLayerSerializer)
 
 
 class LayerList(generics.ListAPIView):
@@ -735,15 +733,13 @@ class LayerList(generics.ListAPIView):
             *args:
             **kwargs:
 
-        Returns: Channel_Layers that user has view permissions on
+        Returns: Channel_Layers that user has view permissions on, paginated with the 'limit' and 'after' query
+        arguments
 
         """
-        collection_obj = Collection.objects.get(name=collection)
-        experiment_obj = Experiment.objects.get(name=experiment, collection=collection_obj)
-        channel_layers = get_objects_for_user(request.user, 'read',
-                                              klass=ChannelLayer).filter(is_channel=False, experiment=experiment_obj)
-        serializer = ChannelLayerSerializer(channel_layers, many=True)
-        return Response(serializer.data)
+        channel_layers = ChannelLayerSerializer.eager_load(get_readable(request.user, ChannelLayer)).filter(
+            is_channel=False, experiment__name=experiment, experiment__collection__name=collection, deleting=False)
+        return paginated_response(channel_layers, request, ChannelLayerSerializer)
 
 
 class CoordinateFrameList(generics.ListCreateAPIView):
@@ -761,9 +757,406 @@ class CoordinateFrameList(generics.ListCreateAPIView):
             *args:
             **kwargs:
 
-        Returns: Coordinate frames that user has view permissions on
+        Returns: Coordinate frames that user has view permissions on, paginated with the 'limit' and 'after' query
+        arguments
+
+        """
+        coords = get_readable(request.user, CoordinateFrame)
+        return paginated_response(coords, request, CoordinateFrameSerializer)
+
+
+def get_tree_etag(request, collection=None):
+    """
+    Compute the ETag of a resource tree
+
+    The tree only changes when a resource or one of the user's permissions changes, so the ETag is built from the
+    shared version counter of the resource cache and the user's generation in the permission cache, which are bumped
+    on every such change.
+
+    Args:
+        request: Django request
+        collection: Collection name or None for every collection
+
+    Returns:
+        str: Unquoted ETag
+    """
+    digest = hashlib.sha1()
+    digest.update('{}|{}|{}|{}'.format(request.user.pk, request.get_full_path(), RESOURCE_CACHE.get_version(),
+                                       PERMISSION_CACHE.get_generation(permission_group(request.user.pk))).encode())
+    return digest.hexdigest()
+
+
+class ResourceTree(APIView):
+    """
+    View to get every resource a user can read under one or all collections
+
+    """
+    COLLECTION_FIELDS = ('id', 'name', 'description')
+    EXPERIMENT_FIELDS = ('id', 'name', 'description', 'collection', 'coord_frame', 'num_hierarchy_levels',
+                         'hierarchy_method', 'max_time_sample')
+    CHANNEL_LAYER_FIELDS = ('id', 'name', 'description', 'experiment', 'is_channel', 'default_time_step', 'datatype',
+                            'base_resolution')
+
+    @staticmethod
+    def get_rows(queryset, fields):
+        """
+        Load resources as dictionaries with the creator user name
+
+        Args:
+            queryset: Resource queryset
+            fields: Fields to load
+
+        Returns:
+            list[dict]: Resources
+        """
+        rows = list(queryset.values('creator__username', *fields))
+        for row in rows:
+            row['creator'] = row.pop('creator__username')
+        return rows
+
+    @staticmethod
+    def stream(collections, coord_frames):
+        """
+        Encode a tree one collection at a time
+
+        Args:
+            collections: Collection dictionaries with nested experiments, channels and layers
+            coord_frames: Coordinate frame dictionaries
+
+        Returns:
+            Generator of JSON text
+        """
+        yield '{"collections": ['
+        for idx, collection in enumerate(collections):
+            yield (', ' if idx else '') + json.dumps(collection)
+        yield '], "coord_frames": ' + json.dumps(coord_frames) + '}'
+
+    @method_decorator(condition(etag_func=get_tree_etag))
+    def get(self, request, collection=None):
+        """
+        Get the collections, experiments, channels, layers and coordinate frames a user can read
+
+        The tree is loaded with a fixed number of queries and streamed to the client. Responses carry an ETag that
+        changes whenever a resource or permission changes.
+
+        Args:
+            request: DRF Request object
+            collection: Collection name or None for every collection
+
+        Returns:
+            StreamingHttpResponse: JSON object with 'collections' and 'coord_frames' lists
+        """
+        collections = get_readable(request.user, Collection).filter(deleting=False)
+        if collection:
+            collections = collections.filter(name=collection)
+        collections = self.get_rows(collections, self.COLLECTION_FIELDS)
+
+        if collection and not collections:
+            if Collection.objects.filter(name=collection, deleting=False).exists():
+                return BossPermissionError('read', collection)
+            return BossResourceNotFoundError(collection)
+
+        experiments = []
+        channel_layers = []
+        links = []
+        coord_frames = []
+        if collections:
+            experiments = self.get_rows(get_readable(request.user, Experiment).filter(
+                collection__in=[col['id'] for col in collections], deleting=False), self.EXPERIMENT_FIELDS)
+        if experiments:
+            experiment_ids = [exp['id'] for exp in experiments]
+            channel_layers = self.get_rows(get_readable(request.user, ChannelLayer).filter(
+                experiment__in=experiment_ids, deleting=False), self.CHANNEL_LAYER_FIELDS)
+            coord_frames = list(CoordinateFrame.objects.filter(id__in={exp['coord_frame'] for exp in experiments})
+                                .order_by('pk').values(*CoordinateFrameSerializer.Meta.fields))
+        if channel_layers:
+            links = ChannelLayerMap.objects.filter(channel__experiment__in=experiment_ids)\
+                .values_list('channel_id', 'layer_id')
+
+        linked = {}
+        for channel_id, layer_id in links:
+            linked.setdefault(channel_id, []).append(layer_id)
+        by_experiment = {}
+        for channel_layer in channel_layers:
+            channel_layer['linked_channel_layers'] = linked.get(channel_layer['id'], [])
+            by_experiment.setdefault(channel_layer['experiment'], []).append(channel_layer)
+        by_collection = {}
+        for experiment in experiments:
+            experiment['channel_layers'] = by_experiment.get(experiment['id'], [])
+            by_collection.setdefault(experiment['collection'], []).append(experiment)
+        for col in collections:
+            col['experiments'] = by_collection.get(col['id'], [])
+
+        return StreamingHttpResponse(self.stream(collections, coord_frames), content_type='application/json')
+
+
+class BulkResourceCreate(APIView):
+    """
+    View to create many collections, experiments, channels and layers in a single transaction
+
+    """
+    COLLECTION_FIELDS = ('name', 'description')
+    EXPERIMENT_FIELDS = ('name', 'description', 'num_hierarchy_levels', 'hierarchy_method', 'max_time_sample')
+    CHANNEL_LAYER_FIELDS = ('name', 'description', 'is_channel', 'default_time_step', 'base_resolution', 'datatype')
+
+    @staticmethod
+    def build(model, item, fields, parents, errors, label):
+        """
+        Build an unsaved resource and validate its fields
+
+        Args:
+            model: Resource model class
+            item: Dictionary from the request data
+            fields: Model fields that can be set from the request data
+            parents: Names of the parent references the item must contain
+            errors: Dictionary that validation errors are added to
+            label: Key of the item in the errors dictionary
+
+        Returns:
+            The unsaved resource, or None if the item is not a dictionary
+        """
+        if not isinstance(item, dict):
+            errors[label] = 'Expected an object'
+            return None
+
+        obj = model(**{field: item[field] for field in fields if field in item})
+        try:
+            obj.full_clean(exclude=['creator', 'collection', 'experiment', 'coord_frame'], validate_unique=False)
+        except ValidationError as err:
+            errors[label] = err.message_dict
+
+        for parent in parents:
+            if not isinstance(item.get(parent), str):
+                errors.setdefault(label, {})[parent] = ['This field is required.']
+        return obj
+
+    @transaction.atomic
+    @check_role("resource-manager")
+    def post(self, request):
+        """Create many resources
+
+        The request data has optional 'collections', 'experiments' and 'channel_layers' lists. Experiments reference
+        their collection and coordinate frame by name, and channels and layers reference their collection and
+        experiment by name, so a request can create a collection together with its experiments and channels. Layers
+        list the channels they link to in 'channels', either by id as in the single resource API or by name, which
+        also allows channels created in the same request. The channels must be in the layer's experiment.
+
+        Every resource is validated before any row is written. The resources, lookup keys, channel/layer links and
+        permissions are then inserted with one bulk insert each.
 
+        Args:
+            request: DRF Request object
+
+        Returns:
+            Created collections, experiments and channels/layers
         """
-        coords = get_objects_for_user(request.user, 'read', klass=CoordinateFrame)
-        serializer = CoordinateFrameSerializer(coords, many=True)
-        return Response(serializer.data)
+        user = request.user
+        try:
+            collection_items = list(request.data.get('collections', []))
+            experiment_items = list(request.data.get('experiments', []))
+            channel_layer_items = list(request.data.get('channel_layers', []))
+        except (AttributeError, TypeError):
+            return BossHTTPError("Invalid Request. Expected lists of collections, experiments and channel_layers",
+                                 ErrorCodes.INVALID_POST_ARGUMENT)
+
+        total = len(collection_items) + len(experiment_items) + len(channel_layer_items)
+        if not 0 < total <= settings.RESOURCE_BULK_MAX_ITEMS:
+            return BossHTTPError("Invalid Request. Between 1 and {} resources can be created in a request"
+                                 .format(settings.RESOURCE_BULK_MAX_ITEMS), ErrorCodes.INVALID_POST_ARGUMENT)
+
+        # Build and validate every resource before writing anything
+        errors = {}
+        collections = {}
+        for idx, item in enumerate(collection_items):
+            label = 'collections[{}]'.format(idx)
+            obj = self.build(Collection, item, self.COLLECTION_FIELDS, (), errors, label)
+            if obj is not None:
+                if obj.name in collections:
+                    errors[label] = 'Duplicate collection {}'.format(obj.name)
+                obj.creator = user
+                collections[obj.name] = obj
+
+        experiments = {}
+        experiment_frames = {}
+        for idx, item in enumerate(experiment_items):
+            label = 'experiments[{}]'.format(idx)
+            obj = self.build(Experiment, item, self.EXPERIMENT_FIELDS, ('collection', 'coord_frame'), errors, label)
+            if obj is not None:
+                key = (item.get('collection'), obj.name)
+                if key in experiments:
+                    errors[label] = 'Duplicate experiment {}'.format(obj.name)
+                obj.creator = user
+                experiments[key] = obj
+                experiment_frames[key] = item.get('coord_frame')
+
+        channel_layers = {}
+        layer_channels = {}
+        for idx, item in enumerate(channel_layer_items):
+            label = 'channel_layers[{}]'.format(idx)
+            obj = self.build(ChannelLayer, item, self.CHANNEL_LAYER_FIELDS, ('collection', 'experiment'), errors,
+                             label)
+            if obj is not None:
+                key = (item.get('collection'), item.get('experiment'), obj.name)
+                if key in channel_layers:
+                    errors[label] = 'Duplicate channel or layer {}'.format(obj.name)
+                obj.creator = user
+                channel_layers[key] = obj
+                if obj.is_channel is False:
+                    channels = item.get('channels', [])
+                    if not channels or not isinstance(channels, list) or \
+                            not all(isinstance(channel, (int, str)) and not isinstance(channel, bool)
+                                    for channel in channels):
+                        errors[label] = 'Invalid Request.Please specify a valid channel for the layer'
+                    else:
+                        layer_channels[key] = channels
+
+        if errors:
+            return BossHTTPError("{}".format(errors), ErrorCodes.INVALID_POST_ARGUMENT)
+
+        # Resolve the channels referenced by id to names
+        channel_pks = {channel for channels in layer_channels.values() for channel in channels
+                       if isinstance(channel, int)}
+        channels_by_pk = {obj.pk: (obj.experiment.collection.name, obj.experiment.name, obj.name) for obj in
+                          ChannelLayer.objects.select_related('experiment__collection').filter(pk__in=channel_pks)}
+        for key, channels in layer_channels.items():
+            resolved = []
+            for channel in channels:
+                if isinstance(channel, str):
+                    resolved.append(key[:2] + (channel,))
+                elif channel in channels_by_pk and channels_by_pk[channel][:2] == key[:2]:
+                    resolved.append(channels_by_pk[channel])
+                else:
+                    return BossResourceNotFoundError(str(channel))
+            layer_channels[key] = resolved
+
+        # Load the existing parents, checking the new resources do not exist yet
+        parent_collections = {key[0] for key in experiments} | {key[0] for key in channel_layers}
+        existing_collections = {obj.name: obj for obj in
+                                Collection.objects.filter(name__in=parent_collections | set(collections))}
+        parent_experiments = {key[:2] for key in channel_layers}
+        existing_experiments = {(obj.collection.name, obj.name): obj for obj in
+                                Experiment.objects.select_related('collection')
+                                .filter(collection__name__in=parent_collections,
+                                        name__in={key[1] for key in parent_experiments | set(experiments)})}
+        channel_names = {key[2] for key in channel_layers}
+        for channels in layer_channels.values():
+            channel_names.update(key[2] for key in channels)
+        existing_channel_layers = {(obj.experiment.collection.name, obj.experiment.name, obj.name): obj for obj in
+                                   ChannelLayer.objects.select_related('experiment__collection')
+                                   .filter(experiment__in=existing_experiments.values(), name__in=channel_names)}
+        coord_frames = dict(CoordinateFrame.objects.filter(name__in=set(experiment_frames.values()))
+                            .values_list('name', 'pk'))
+
+        for new, existing in ((collections, existing_collections), (experiments, existing_experiments),
+                              (channel_layers, existing_channel_layers)):
+            conflicts = set(new) & set(existing)
+            if conflicts:
+                return BossHTTPError("Resources already exist: {}".format(sorted(conflicts)),
+                                     ErrorCodes.RESOURCE_EXISTS)
+
+        for name in parent_collections - set(collections):
+            if name not in existing_collections:
+                return BossResourceNotFoundError(name)
+        for name in {key[0] for key in experiments} - set(collections):
+            if 'add' not in BossPermissionManager.get_user_permissions(user, existing_collections[name]):
+                return BossPermissionError('add', name)
+        for key in parent_experiments - set(experiments):
+            if key not in existing_experiments:
+                return BossResourceNotFoundError(key[1])
+            if 'add' not in BossPermissionManager.get_user_permissions(user, existing_experiments[key]):
+                return BossPermissionError('add', key[1])
+        for name in set(experiment_frames.values()) - set(coord_frames):
+            return BossResourceNotFoundError(name)
+        for channels in layer_channels.values():
+            for key in channels:
+                channel = channel_layers.get(key, existing_channel_layers.get(key))
+                if channel is None or not channel.is_channel:
+                    return BossResourceNotFoundError(key[2])
+
+        # Insert each level and read back the primary keys, which bulk inserts do not return on every database
+        Collection.objects.bulk_create(collections.values())
+        collection_ids = {name: obj.pk for name, obj in existing_collections.items()}
+        collection_ids.update(Collection.objects.filter(name__in=collections).values_list('name', 'pk'))
+
+        for key, obj in experiments.items():
+            obj.collection_id = collection_ids[key[0]]
+            obj.coord_frame_id = coord_frames[experiment_frames[key]]
+        Experiment.objects.bulk_create(experiments.values())
+        experiment_ids = {key: obj.pk for key, obj in existing_experiments.items()}
+        experiment_ids.update(((col, name), pk) for col, name, pk in Experiment.objects.filter(
+            collection__in=[collection_ids[key[0]] for key in experiments], name__in={key[1] for key in experiments})
+            .values_list('collection__name', 'name', 'pk') if (col, name) in experiments)
+
+        for key, obj in channel_layers.items():
+            obj.experiment_id = experiment_ids[key[:2]]
+        ChannelLayer.objects.bulk_create(channel_layers.values())
+        channel_layer_ids = {key: obj.pk for key, obj in existing_channel_layers.items()}
+        channel_layer_ids.update(((col, exp, name), pk) for col, exp, name, pk in ChannelLayer.objects.filter(
+            experiment__in=[experiment_ids[key[:2]] for key in channel_layers],
+            name__in={key[2] for key in channel_layers})
+            .values_list('experiment__collection__name', 'experiment__name', 'name', 'pk')
+            if (col, exp, name) in channel_layers)
+
+        ChannelLayerMap.objects.bulk_create([ChannelLayerMap(channel_id=channel_layer_ids[channel],
+                                                             layer_id=channel_layer_ids[layer])
+                                             for layer, channels in layer_channels.items() for channel in channels])
+
+        lookups = [(str(collection_ids[name]), name, name, None, None) for name in collections]
+        lookups += [('{}&{}'.format(collection_ids[col], experiment_ids[(col, exp)]), '{}&{}'.format(col, exp),
+                     col, exp, None) for col, exp in experiments]
+        lookups += [('{}&{}&{}'.format(collection_ids[col], experiment_ids[(col, exp)],
+                                       channel_layer_ids[(col, exp, name)]),
+                     '{}&{}&{}'.format(col, exp, name), col, exp, name) for col, exp, name in channel_layers]
+        LookUpKey.add_lookups(lookups)
+
+        new_collections = list(CollectionSerializer.eager_load(Collection.objects.filter(
+            pk__in=[collection_ids[name] for name in collections])))
+        new_experiments = list(ExperimentSerializer.eager_load(Experiment.objects.filter(
+            pk__in=[experiment_ids[key] for key in experiments])))
+        new_channel_layers = list(ChannelLayerSerializer.eager_load(ChannelLayer.objects.filter(
+            pk__in=[channel_layer_ids[key] for key in channel_layers])))
+
+        # Grant the same permissions as the single resource views: everything to the user's primary group, and
+        # everything on collections to the admin group
+        primary_group = Group.objects.get_or_create(name=user.username + '-primary')[0]
+        user.groups.add(primary_group.pk)
+        grants = [(primary_group, perm, obj) for obj in new_collections + new_experiments + new_channel_layers
+                  for perm in get_default_permissions(obj)]
+        if new_collections:
+            admin_group = Group.objects.get_or_create(name='admin')[0]
+            grants += [(admin_group, perm, obj) for obj in new_collections for perm in get_default_permissions(obj)]
+        BossPermissionManager.bulk_grant(grants)
+
+        # Bulk inserts do not send the signals that normally clear the resource cache
+        RESOURCE_CACHE.invalidate()
+
+        return Response({'collections': CollectionSerializer(new_collections, many=True).data,
+                         'experiments': ExperimentSerializer(new_experiments, many=True).data,
+                         'channel_layers': ChannelLayerSerializer(new_channel_layers, many=True).data},
+                        status=status.HTTP_201_CREATED)
+
+
+class DeleteJobStatus(APIView):
+    """
+    View to get the progress of a resource delete job
+
+    """
+    def get(self, request, job_id):
+        """
+        Get the status of a delete job
+
+        Args:
+            request: DRF Request object
+            job_id: Delete job id
+
+        Returns:
+            Delete job
+        """
+        try:
+            job = DeleteJob.objects.get(pk=job_id)
+        except DeleteJob.DoesNotExist:
+            return BossHTTPError("Delete job {} not found".format(job_id), ErrorCodes.OBJECT_NOT_FOUND)
+
+        if job.creator_id != request.user.pk and not request.user.is_superuser:
+            return BossPermissionError('read', 'delete job {}'.format(job_id))
+        return Response(DeleteJobSerializer(job).data)
@@ -24,7 +24,7 @@ from bosscore.error import BossHTTPError
 from bosscore.models import BossRole
 from bosscore.serializers import GroupSerializer, UserSerializer, BossRoleSerializer
 from bosscore.privileges import BossPrivilegeManager
-from bosscore.privileges import check_role
+from bosscore.privileges import check_role, set_local_role
 
 from bossutils.keycloak import KeyCloakClient
 from bossutils.logger import BossLogger
@@ -219,6 +219,7 @@ class BossUserRole(APIView):
 
             with KeyCloakClient('BOSS') as kc:
                 response = kc.map_role_to_user(user_name, role_name)
+                set_local_role(user_name, role_name, True)
                 return Response(serializer.data, status=201)
 
         except Exception as e:
@@ -243,6 +244,7 @@ class BossUserRole(APIView):
                 return BossHTTPError(404, "Invalid role name {}".format(role_name), 30000)
             with KeyCloakClient('BOSS') as kc:
                 response = kc.remove_role_from_user(user_name, role_name)
+                set_local_role(user_name, role_name, False)
                 return Response(status=204)
 
         except Exception as e:
@@ -14,7 +14,16 @@
 
 import json
 import os
-
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.config import Config
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
 from ingest.core.config import Configuration
 from ingest.core.backend import BossBackend
 
@@ -23,7 +32,9 @@ from bossingest.models import IngestJob
 
 from bosscore.error import BossError, ErrorCodes, BossResourceNotFoundError
 from bosscore.models import Collection, Experiment, ChannelLayer
+from bosscore.jobs import Heartbeat
 from bosscore.lookup import LookUpKey
+from bossspatialdb import versioning
 
 from ndingest.ndqueue.uploadqueue import UploadQueue
 from ndingest.ndqueue.ingestqueue import IngestQueue
@@ -32,12 +43,73 @@ from ndingest.ndbucket.tilebucket import TileBucket
 from ndingest.nddynamo.boss_tileindexdb import BossTileIndexDB
 from ndingest.ndbucket.tilebucket import TileBucket
 
+from bossutils.aws import get_session
 from bossutils.ingestcreds import IngestCredentials
+from bossutils.logger import BossLogger
 from ndingest.util.bossutil import BossUtil
 import jsonschema
 
 CONNECTER = '&'
 
+# Number of z slices in a chunk
+CHUNK_SIZE_Z = 16
+
+# Maximum number of messages in an SQS SendMessageBatch request
+UPLOAD_TASK_BATCH_SIZE = 10
+
+# Number of times messages SQS failed to accept are resent, with exponential backoff starting at
+# UPLOAD_TASK_RETRY_DELAY seconds
+UPLOAD_TASK_MAX_RETRIES = 5
+UPLOAD_TASK_RETRY_DELAY = 0.1
+
+
+def start_upload_task_generation(job_id):
+    """
+    Generate the upload tasks of an ingest job in a background thread
+
+    The thread starts once the current transaction commits. It stops when the web worker restarts, so the
+    resume_ingest_jobs management command must be scheduled to run periodically to resume interrupted jobs.
+
+    Args:
+        job_id (int): Id of the ingest job
+
+    Returns:
+        None
+    """
+    transaction.on_commit(lambda: threading.Thread(target=run_upload_task_generation, args=(job_id,),
+                                                   daemon=True).start())
+
+
+def run_upload_task_generation(job_id):
+    """
+    Generate the remaining upload tasks of a Preparing ingest job, then mark the job as Uploading
+
+    Errors are recorded in the job message, and the job stays Preparing so the generation can be resumed.
+
+    Args:
+        job_id (int): Id of the ingest job
+
+    Returns:
+        None
+    """
+    log = BossLogger().logger
+    try:
+        with Heartbeat(IngestJob, job_id):
+            IngestJob.objects.filter(pk=job_id, tasks_start_date=None).update(tasks_start_date=timezone.now())
+            IngestJob.objects.filter(pk=job_id).update(message='')
+
+            count = IngestManager().generate_upload_tasks(job_id)
+            log.info("Ingest job {}: generated {} upload tasks".format(job_id, count))
+
+            # The job may have been deleted while the tasks were generated
+            IngestJob.objects.filter(pk=job_id, status=0).update(status=1)
+
+    except Exception as err:
+        log.error("Ingest job {}: upload task generation failed: {}".format(job_id, err))
+        IngestJob.objects.filter(pk=job_id).update(message=str(err))
+    finally:
+        connection.close()
+
 
 class IngestManager:
     """
@@ -141,14 +213,17 @@ class IngestManager:
                 ingest_queue = self.create_ingest_queue()
                 self.job.ingest_queue = ingest_queue.url
 
-                self.generate_upload_tasks()
                 tile_bucket = TileBucket(self.job.collection + '&' + self.job.experiment)
 
                 self.create_ingest_credentials(upload_queue, tile_bucket)
 
-                # Update status
-                self.job.status = 1
+                # Generate the upload tasks in the background. The job stays Preparing until every task is sent.
+                self.job.tasks_total = self.count_upload_tasks(self.job)
                 self.job.save()
+                start_upload_task_generation(self.job.id)
+
+                # Cuboids written by the ingest are not versioned, so no ETags are returned until the job ends
+                versioning.start_ingest(self.get_lookup_key(self.job), self.job.id)
 
             # TODO create channel if needed
 
@@ -210,6 +285,20 @@ class IngestManager:
             raise BossError("The ingest job with id {} does not exist".format(str(ingest_job_id)),
                             ErrorCodes.OBJECT_NOT_FOUND)
 
+    @staticmethod
+    def get_lookup_key(ingest_job):
+        """
+        Get the lookup key of the channel or layer an ingest job writes to
+
+        Args:
+            ingest_job (IngestJob): Ingest job
+
+        Returns:
+            str: Lookup key
+        """
+        bosskey = ingest_job.collection + CONNECTER + ingest_job.experiment + CONNECTER + ingest_job.channel_layer
+        return LookUpKey.get_lookup_key(bosskey).lookup_key
+
     def delete_ingest_job(self, ingest_job_id):
         """
 
@@ -237,6 +326,9 @@ class IngestManager:
             ingest_job.status = 3
             ingest_job.save()
 
+            experiment = Experiment.objects.get(name=ingest_job.experiment, collection__name=ingest_job.collection)
+            versioning.end_ingest(self.get_lookup_key(ingest_job), ingest_job.id, experiment.num_hierarchy_levels)
+
             # Remove ingest credentials for a job
             self.remove_ingest_credentials(ingest_job_id)
 
@@ -292,11 +384,18 @@ class IngestManager:
 
     def generate_upload_tasks(self, job_id=None):
         """
+        Generate the upload tasks of an ingest job and send them to its upload queue
+
+        The job is split into slabs of chunks that a pool of INGEST_TASK_WORKERS threads generates in parallel.
+        Messages are sent in batches. Progress is saved on the job after each slab, in slab order, and generation
+        starts from the first slab that was not completed. The tasks of slabs that were in flight when a previous
+        run stopped are sent again.
 
         Args:
-            job_id:
+            job_id: Id of the ingest job. Default = the job set up by this manager
 
         Returns:
+            int: Number of upload tasks sent by this call
 
         """
 
@@ -314,45 +413,125 @@ class IngestManager:
 
         # Generate upload tasks for the ingest job
         # Get the project information
-        bosskey = ingest_job.collection + CONNECTER + ingest_job.experiment + CONNECTER + ingest_job.channel_layer
-        lookup_key = (LookUpKey.get_lookup_key(bosskey)).lookup_key
+        lookup_key = self.get_lookup_key(ingest_job)
         [col_id, exp_id, ch_id] = lookup_key.split('&')
         project_info = [col_id, exp_id, ch_id]
 
-        for time_step in range(ingest_job.t_start, ingest_job.t_stop, 1):
-            # For each time step, compute the chunks and tile keys
-
-            for z in range(ingest_job.z_start, ingest_job.z_stop, 16):
-                for y in range(ingest_job.y_start, ingest_job.y_stop, ingest_job.tile_size_y):
-                    for x in range(ingest_job.x_start, ingest_job.x_stop, ingest_job.tile_size_x):
-
-                        # compute the chunk indices
-                        chunk_x = int(x/ingest_job.tile_size_x)
-                        chunk_y = int(y/ingest_job.tile_size_y)
-                        chunk_z = int(z/16)
-
-                        # Compute the number of tiles in the chunk
-                        if ingest_job.z_stop-z >= 16:
-                            num_of_tiles = 16
-                        else:
-                            num_of_tiles = ingest_job.z_stop-z
-
-                        # Generate the chunk key
-                        chunk_key = (BossBackend(self.config)).encode_chunk_key(num_of_tiles, project_info,
-                                                                                ingest_job.resolution,
-                                                                                chunk_x, chunk_y, chunk_z, time_step)
-                        # get the tiles keys for this chunk
-                        for tile in range(0, num_of_tiles):
-                            # get the tile key
-                            tile_key = (BossBackend(self.config)).encode_tile_key(project_info, ingest_job.resolution,
-                                                                                  chunk_x, chunk_y, tile, time_step)
-
-                            # Generate the upload task msg
-                            msg = self.create_upload_task_message(ingest_job.id, chunk_key, tile_key,
-                                                                  ingest_job.upload_queue, ingest_job.ingest_queue)
-
-                            # Upload the message
-                            self.send_upload_task_message(msg)
+        # Key encoding has no state, so one backend is shared by every slab
+        config = self.config if self.config is not None else Configuration(json.loads(ingest_job.config_data))
+        backend = BossBackend(config)
+
+        # Low level clients are thread safe. Give every worker a connection.
+        workers = settings.INGEST_TASK_WORKERS
+        sqs = get_session().client('sqs', config=Config(max_pool_connections=workers))
+
+        def generate(slab):
+            return self.generate_slab_upload_tasks(ingest_job, backend, project_info, sqs, *slab)
+
+        def record(count):
+            IngestJob.objects.filter(pk=ingest_job.pk).update(slabs_generated=F('slabs_generated') + 1,
+                                                              tasks_generated=F('tasks_generated') + count)
+            return count
+
+        # Each (time step, z) slab of chunks is generated and sent by one worker. Only a few slabs are queued ahead of
+        # the oldest unfinished one, which bounds the work repeated after a crash.
+        total = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for slab in self.get_upload_task_slabs(ingest_job)[ingest_job.slabs_generated:]:
+                    pending.append(executor.submit(generate, slab))
+                    if len(pending) >= 2 * workers:
+                        total += record(pending.popleft().result())
+                while pending:
+                    total += record(pending.popleft().result())
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        return total
+
+    @staticmethod
+    def count_upload_tasks(ingest_job):
+        """
+        Count the upload tasks of an ingest job
+
+        Args:
+            ingest_job: Ingest job model
+
+        Returns:
+            int: Number of tiles in the job
+        """
+        num_x = len(range(ingest_job.x_start, ingest_job.x_stop, ingest_job.tile_size_x))
+        num_y = len(range(ingest_job.y_start, ingest_job.y_stop, ingest_job.tile_size_y))
+        num_t = len(range(ingest_job.t_start, ingest_job.t_stop, 1))
+        return num_x * num_y * num_t * max(ingest_job.z_stop - ingest_job.z_start, 0)
+
+    @staticmethod
+    def get_upload_task_slabs(ingest_job):
+        """
+        Split an ingest job into slabs of chunks that can be generated independently
+
+        Args:
+            ingest_job: Ingest job model
+
+        Returns:
+            list[(int, int)]: (time step, z start) of every slab, in order
+        """
+        return [(time_step, z) for time_step in range(ingest_job.t_start, ingest_job.t_stop, 1)
+                for z in range(ingest_job.z_start, ingest_job.z_stop, CHUNK_SIZE_Z)]
+
+    def generate_slab_upload_tasks(self, ingest_job, backend, project_info, sqs, time_step, z):
+        """
+        Generate and send the upload tasks of every chunk in one slab of an ingest job
+
+        Args:
+            ingest_job: Ingest job model
+            backend (BossBackend): Backend used to encode the chunk and tile keys
+            project_info (list): Collection, experiment and channel ids
+            sqs: SQS client
+            time_step (int): Time step of the slab
+            z (int): First z slice of the slab
+
+        Returns:
+            int: Number of upload tasks sent
+        """
+        chunk_z = int(z/CHUNK_SIZE_Z)
+
+        # Compute the number of tiles in the chunk
+        if ingest_job.z_stop-z >= CHUNK_SIZE_Z:
+            num_of_tiles = CHUNK_SIZE_Z
+        else:
+            num_of_tiles = ingest_job.z_stop-z
+
+        count = 0
+        batch = []
+        for y in range(ingest_job.y_start, ingest_job.y_stop, ingest_job.tile_size_y):
+            for x in range(ingest_job.x_start, ingest_job.x_stop, ingest_job.tile_size_x):
+
+                # compute the chunk indices
+                chunk_x = int(x/ingest_job.tile_size_x)
+                chunk_y = int(y/ingest_job.tile_size_y)
+
+                # Generate the chunk key
+                chunk_key = backend.encode_chunk_key(num_of_tiles, project_info, ingest_job.resolution,
+                                                     chunk_x, chunk_y, chunk_z, time_step)
+                # get the tiles keys for this chunk
+                for tile in range(0, num_of_tiles):
+                    # get the tile key
+                    tile_key = backend.encode_tile_key(project_info, ingest_job.resolution,
+                                                       chunk_x, chunk_y, tile, time_step)
+
+                    # Generate the upload task msg
+                    batch.append(self.create_upload_task_message(ingest_job.id, chunk_key, tile_key,
+                                                                 ingest_job.upload_queue, ingest_job.ingest_queue))
+                    if len(batch) == UPLOAD_TASK_BATCH_SIZE:
+                        count += self.send_upload_task_messages(sqs, ingest_job.upload_queue, batch)
+                        batch = []
+
+        if batch:
+            count += self.send_upload_task_messages(sqs, ingest_job.upload_queue, batch)
+        return count
 
     @staticmethod
     def create_upload_task_message(job_id, chunk_key, tile_key, upload_queue_arn, ingest_queue_arn):
@@ -388,6 +567,37 @@ class IngestManager:
         queue = UploadQueue(self.nd_proj, endpoint_url=None)
         queue.sendMessage(msg)
 
+    @staticmethod
+    def send_upload_task_messages(sqs, queue_url, msgs):
+        """
+        Send up to UPLOAD_TASK_BATCH_SIZE upload task messages in one request
+
+        Messages that SQS fails to accept are resent with exponential backoff.
+
+        Args:
+            sqs: SQS client
+            queue_url (str): Url of the upload queue
+            msgs (list[str]): Messages
+
+        Returns:
+            int: Number of messages sent
+
+        Raises:
+            BossError: If some messages are still not accepted after UPLOAD_TASK_MAX_RETRIES retries
+        """
+        entries = [{'Id': str(idx), 'MessageBody': msg} for idx, msg in enumerate(msgs)]
+        for attempt in range(UPLOAD_TASK_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(UPLOAD_TASK_RETRY_DELAY * 2 ** (attempt - 1))
+            response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            failed = {failure['Id'] for failure in response.get('Failed', [])}
+            entries = [entry for entry in entries if entry['Id'] in failed]
+            if not entries:
+                return len(msgs)
+
+        raise BossError("Unable to send {} upload tasks to the upload queue".format(len(entries)),
+                        ErrorCodes.BOSS_SYSTEM_ERROR)
+
     def delete_tiles(self, ingest_job):
         """
         Delete all remaining tiles from the tile index database and tile bucket
@@ -53,6 +53,17 @@ class IngestJob(models.Model):
     tile_size_z = models.IntegerField()
     tile_size_t = models.IntegerField()
 
+    # Progress of the upload task generation, which runs in the background while the job is Preparing
+    tasks_total = models.BigIntegerField(default=0)
+    tasks_generated = models.BigIntegerField(default=0)
+    # Number of (time step, z) slabs whose tasks have all been sent. Generation resumes from here after a crash.
+    slabs_generated = models.IntegerField(default=0)
+    tasks_start_date = models.DateTimeField(null=True)
+    # Error that stopped the task generation
+    message = models.TextField(blank=True)
+    # Last time the thread generating the upload tasks reported it was alive
+    heartbeat_date = models.DateTimeField(null=True)
+
     class Meta:
         db_table = u"ingest_job"
 
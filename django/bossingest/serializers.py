@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django.utils import timezone
 from rest_framework import serializers
 from .models import IngestJob
 
@@ -27,8 +28,27 @@ class IngestJobCreateSerializer(serializers.ModelSerializer):
 class IngestJobListSerializer(serializers.ModelSerializer):
     """
     Serializer to create and ingest job
+
+    Includes the progress of the upload task generation, with the generation rate in tasks per second and the
+    estimated number of seconds left. Both are None until tasks have been generated.
     """
+    tasks_per_second = serializers.SerializerMethodField()
+    eta_seconds = serializers.SerializerMethodField()
+
     class Meta:
         model = IngestJob
-        fields = ('id', 'collection', 'experiment', 'channel_layer', 'status', 'ingest_queue', 'upload_queue')
+        fields = ('id', 'collection', 'experiment', 'channel_layer', 'status', 'ingest_queue', 'upload_queue',
+                  'tasks_total', 'tasks_generated', 'tasks_per_second', 'eta_seconds', 'message')
+
+    def get_tasks_per_second(self, job):
+        if not job.tasks_start_date or not job.tasks_generated:
+            return None
+        elapsed = (timezone.now() - job.tasks_start_date).total_seconds()
+        return job.tasks_generated / elapsed if elapsed > 0 else None
+
+    def get_eta_seconds(self, job):
+        rate = self.get_tasks_per_second(job)
+        if not rate:
+            return None
+        return max(job.tasks_total - job.tasks_generated, 0) / rate
 
@@ -13,11 +13,14 @@
 # limitations under the License.
 from __future__ import absolute_import
 import json
+from datetime import timedelta
 
 from bossingest.ingest_manager import IngestManager
+from bossingest.serializers import IngestJobListSerializer
 from bossingest.test.setup import SetupTests
 from bosscore.test.setup_db import SetupTestDB
 from django.contrib.auth.models import User
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
 
@@ -87,6 +90,80 @@ class BossIngestManagerTest(APITestCase):
         msg = json.loads(msg)
         assert (msg['job_id'] == 595)
 
+    def test_get_upload_task_slabs(self):
+        """Test splitting a job into slabs of chunks"""
+        ingest_mgmr = IngestManager()
+        ingest_mgmr.validate_config_file(self.example_config_data)
+        ingest_mgmr.validate_properties()
+        ingest_mgmr.owner = self.user.pk
+        job = ingest_mgmr.create_ingest_job()
+        assert (ingest_mgmr.get_upload_task_slabs(job) == [(0, 0)])
+
+        job.z_stop = 40
+        job.t_stop = 2
+        assert (ingest_mgmr.get_upload_task_slabs(job) == [(0, 0), (0, 16), (0, 32), (1, 0), (1, 16), (1, 32)])
+
+    def test_generate_slab_upload_tasks(self):
+        """Test the upload tasks of a slab are sent in batches, resending messages SQS failed to accept"""
+
+        class KeyBackend:
+            def encode_chunk_key(self, num_of_tiles, project_info, resolution, x, y, z, t):
+                return 'chunk&{}&{}&{}'.format(x, y, z)
+
+            def encode_tile_key(self, project_info, resolution, x, y, tile, t):
+                return 'tile&{}&{}&{}'.format(x, y, tile)
+
+        class QueueClient:
+            def __init__(self):
+                self.requests = []
+
+            def send_message_batch(self, QueueUrl, Entries):
+                self.requests.append(Entries)
+                # Fail the first message of the first request
+                return {'Failed': [{'Id': Entries[0]['Id']}]} if len(self.requests) == 1 else {}
+
+        ingest_mgmr = IngestManager()
+        ingest_mgmr.validate_config_file(self.example_config_data)
+        ingest_mgmr.validate_properties()
+        ingest_mgmr.owner = self.user.pk
+        job = ingest_mgmr.create_ingest_job()
+        job.y_stop = 3072
+
+        sqs = QueueClient()
+        count = ingest_mgmr.generate_slab_upload_tasks(job, KeyBackend(), ['1', '1', '1'], sqs, 0, 0)
+
+        # 6 chunks of 2 tiles
+        assert (count == 12)
+        assert ([len(entries) for entries in sqs.requests] == [10, 1, 2])
+        assert (sqs.requests[1][0]['MessageBody'] == sqs.requests[0][0]['MessageBody'])
+        assert (json.loads(sqs.requests[2][1]['MessageBody'])['tile_key'] == 'tile&0&5&1')
+
+    def test_upload_task_progress(self):
+        """Test counting the upload tasks of a job and reporting the generation progress"""
+        ingest_mgmr = IngestManager()
+        ingest_mgmr.validate_config_file(self.example_config_data)
+        ingest_mgmr.validate_properties()
+        ingest_mgmr.owner = self.user.pk
+        job = ingest_mgmr.create_ingest_job()
+
+        # 1 x 2 tiles in each of 2 z slices
+        assert (ingest_mgmr.count_upload_tasks(job) == 4)
+        job.z_stop = 40
+        job.t_stop = 2
+        assert (ingest_mgmr.count_upload_tasks(job) == 160)
+
+        job.tasks_total = 160
+        data = IngestJobListSerializer(job).data
+        assert (data['status'] == 0)
+        assert (data['tasks_per_second'] is None)
+        assert (data['eta_seconds'] is None)
+
+        job.tasks_generated = 40
+        job.tasks_start_date = timezone.now() - timedelta(seconds=10)
+        data = IngestJobListSerializer(job).data
+        assert (3 < data['tasks_per_second'] <= 4)
+        assert (30 <= data['eta_seconds'] < 40)
+
     def test_tile_bucket_name(self):
         """ Test get tile bucket name"""
 
@@ -21,6 +21,7 @@ class IngestJobView(APIView):
 
     def get(self, request, ingest_job_id):
         """
+        Get an ingest job, including the progress of its upload task generation
 
         Args:
             job_id:
@@ -103,6 +104,9 @@ class IngestJobView(APIView):
         """
         Post a new config job and create a new ingest job
 
+        The job is returned as soon as its queues and credentials exist, with status 0 (Preparing). The upload tasks
+        are generated in the background, and the job moves to status 1 (Uploading) once they have all been sent.
+
         Args:
             ingest_config_data:
 
@@ -0,0 +1,103 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def time_operation(name, func, args, threads=1):
+    """
+    Time an operation over a list of arguments
+
+    Args:
+        name (str): Name of the operation
+        func (callable): Function called once with each argument
+        args (list): Arguments
+        threads (int): Number of threads calling the function
+
+    Returns:
+        dict: operation, count, seconds, ops_per_second, p50_ms and p95_ms
+    """
+    def timed(arg):
+        start = time.perf_counter()
+        func(arg)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = list(executor.map(timed, args))
+    else:
+        latencies = [timed(arg) for arg in args]
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {'operation': name,
+            'count': len(latencies),
+            'seconds': seconds,
+            'ops_per_second': len(latencies) / seconds if seconds else 0,
+            'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+            'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0}
+
+
+def run_benchmark(backend, items=1000, batch_size=100, threads=1):
+    """
+    Run the same metadata workload against a backend
+
+    The workload writes, reads, updates, lists, searches and deletes keys of a temporary object, one key at a time and
+    in batches. Reads are timed both from the database and through the metadata cache. The object's metadata is
+    removed when the run ends.
+
+    Args:
+        backend (bossmeta.metadb.MetaBackend): Backend to measure
+        items (int): Number of keys
+        batch_size (int): Number of keys per batch and page
+        threads (int): Number of threads sending single key requests
+
+    Returns:
+        list[dict]: Timings of each operation, see time_operation()
+    """
+    lookup_key = 'benchmark&{}'.format(uuid.uuid4().hex)
+    keys = ['key{:06}'.format(idx) for idx in range(items)]
+    batches = [keys[start:start + batch_size] for start in range(0, items, batch_size)]
+
+    def list_pages(_):
+        start_key = None
+        while True:
+            _, start_key = backend.get_meta_page(lookup_key, limit=batch_size, start_key=start_key)
+            if not start_key:
+                break
+
+    results = []
+    try:
+        results.append(time_operation('write', lambda key: backend.write_meta(lookup_key, key, 'value-' + key),
+                                      keys, threads))
+        results.append(time_operation('get', lambda key: backend._get_item(lookup_key, key), keys, threads))
+        results.append(time_operation('get cached', lambda key: backend.get_meta(lookup_key, key), keys, threads))
+        results.append(time_operation('update', lambda key: backend.update_meta(lookup_key, key, 'updated-' + key),
+                                      keys, threads))
+        results.append(time_operation('search', lambda key: backend.search_meta(key, value='updated-' + key),
+                                      keys, threads))
+        results.append(time_operation('list all pages', list_pages, [None]))
+        results.append(time_operation('delete', lambda key: backend.delete_meta(lookup_key, key), keys, threads))
+        results.append(time_operation('batch write', lambda batch: backend.batch_write_meta(
+            [(lookup_key, key, 'value-' + key) for key in batch]), batches))
+        results.append(time_operation('batch get', lambda batch: backend.batch_get_meta(
+            [(lookup_key, key) for key in batch]), batches))
+        results.append(time_operation('batch delete', lambda batch: backend.batch_delete_meta(
+            [(lookup_key, key) for key in batch]), batches))
+    finally:
+        backend.delete_meta_keys(lookup_key)
+    return results
@@ -0,0 +1,41 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from bossmeta.benchmark import run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compare the latency and throughput of metadata backends under the same workload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', action='append', dest='backends',
+                            help='Dotted path of a backend class. Repeat to compare backends. '
+                                 'Default = the META_BACKEND setting')
+        parser.add_argument('--items', type=int, default=1000, help='Number of keys')
+        parser.add_argument('--batch-size', type=int, default=100, help='Number of keys per batch and page')
+        parser.add_argument('--threads', type=int, default=1, help='Number of threads sending single key requests')
+
+    def handle(self, *args, **options):
+        row = '{:<40} {:<16} {:>8} {:>10} {:>12} {:>10} {:>10}'
+        self.stdout.write(row.format('backend', 'operation', 'count', 'seconds', 'ops/s', 'p50 ms', 'p95 ms'))
+        for path in options['backends'] or [settings.META_BACKEND]:
+            backend = import_string(path)()
+            for result in run_benchmark(backend, options['items'], options['batch_size'], options['threads']):
+                self.stdout.write(row.format(path, result['operation'], result['count'],
+                                             '{:.3f}'.format(result['seconds']),
+                                             '{:.1f}'.format(result['ops_per_second']),
+                                             '{:.2f}'.format(result['p50_ms']), '{:.2f}'.format(result['p95_ms'])))
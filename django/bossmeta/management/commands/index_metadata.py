@@ -0,0 +1,24 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from django.core.management.base import BaseCommand
+
+from bossmeta.metadb import get_metadb
+
+
+class Command(BaseCommand):
+    help = 'Add metadata written before the search index existed to the index'
+
+    def handle(self, *args, **options):
+        count = get_metadb().index_search_values()
+        self.stdout.write('Indexed {} metadata values'.format(count))
@@ -17,72 +17,467 @@ import bossutils
 import boto3
 import os
 import sys
+import threading
+import time
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 
 from bossutils.aws import *
-from boto3.dynamodb.conditions import Key
+from django.conf import settings
+from django.utils.module_loading import import_string
+from boto3.dynamodb.conditions import Attr, Key
+from bosscore.caching import GenerationalLRUCache
+from bosscore.error import BossError, ErrorCodes
 
 # Get the table name from boss.config
 config = bossutils.configuration.BossConfig()
-tablename = config["aws"]["meta-db"]
 
-# Get the table name from boss.config
-config = bossutils.configuration.BossConfig()
+# Maximum number of items in a DynamoDB BatchGetItem and BatchWriteItem request
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
 
+# Number of batch requests sent in parallel
+BATCH_WORKERS = 8
 
-class MetaDB:
-    def __init__(self):
-        """
-        Initialize the data base
-        Returns:
+# Number of times unprocessed items are resent, with exponential backoff starting at BATCH_RETRY_DELAY seconds
+BATCH_MAX_RETRIES = 8
+BATCH_RETRY_DELAY = 0.05
 
-        """
-        self.__local_dynamo = os.environ.get('USING_DJANGO_TESTRUNNER') is not None
-        if not self.__local_dynamo:
-            session = get_session()
-            dynamodb = session.resource('dynamodb')
+# Global secondary index on key and search_value, used to find objects by metadata value
+SEARCH_INDEX = 'key-search-value-index'
+
+# Maximum size in bytes of a DynamoDB index sort key. Longer values are truncated in search_value.
+SEARCH_VALUE_BYTES = 1024
+
+# Botocore configuration of the metadata table. The pool holds a connection for every parallel batch request.
+CLIENT_CONFIG = Config(max_pool_connections=BATCH_WORKERS * 2, connect_timeout=5, read_timeout=10,
+                       retries={'max_attempts': 5})
+
+# Metadata items and listings, grouped by lookup key so a write only invalidates the metadata of one resource
+META_CACHE = GenerationalLRUCache('meta', settings.META_CACHE_TTL, settings.META_CACHE_MAX_ENTRIES)
+
+# Thread pool of the current process for concurrent reads. Its threads keep their table handles between requests.
+_executor = None
+_executor_pid = None
+
+# Session of the current process and the table handle of each of its threads
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_table():
+    """
+    Get the metadata table handle of the current thread
+
+    The boto3 session is created once per process, on first use, and recreated after a fork so a child never shares
+    connections with its parent. boto3 resources are not thread safe, so each thread gets its own table built from
+    the process session; its connection pool is reused by every request the thread serves.
+
+    Returns:
+        DynamoDB.Table: Metadata table
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) == pid:
+        return _local.table
+
+    with _session_lock:
+        local_dynamo = os.environ.get('USING_DJANGO_TESTRUNNER') is not None
+        if _session_pid != pid:
+            if local_dynamo:
+                _session = boto3.Session(aws_access_key_id='foo', aws_secret_access_key='foo')
+            else:
+                _session = get_session()
+            _session_pid = pid
+
+        if local_dynamo:
+            tablename = config["aws"]["meta-db"]
+            dynamodb = _session.resource('dynamodb', region_name='us-east-1', endpoint_url='http://localhost:8000',
+                                         config=CLIENT_CONFIG)
+        else:
             if 'test' in sys.argv:
                 tablename = 'test.' + config["aws"]["meta-db"]
             else:
                 tablename = config["aws"]["meta-db"]
-        else:
-            tablename = config["aws"]["meta-db"]
-            session = boto3.Session(aws_access_key_id='foo', aws_secret_access_key='foo')
-            dynamodb = session.resource('dynamodb', region_name='us-east-1', endpoint_url='http://localhost:8000')
+            dynamodb = _session.resource('dynamodb', config=CLIENT_CONFIG)
+
+    _local.table = dynamodb.Table(tablename)
+    _local.pid = pid
+    return _local.table
+
+
+def get_executor():
+    """
+    Get the thread pool of the current process, creating it on first use and after a fork
+
+    Returns:
+        ThreadPoolExecutor: Thread pool
+    """
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    with _session_lock:
+        if _executor_pid != pid:
+            _executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+            _executor_pid = pid
+    return _executor
+
+
+def get_search_value(value):
+    """
+    Get the indexed form of a metadata value
+
+    Args:
+        value (str): Metadata value
+
+    Returns:
+        str: The value truncated to the maximum size of an index key
+    """
+    return value.encode()[:SEARCH_VALUE_BYTES].decode(errors='ignore')
+
+
+def is_condition_failure(err):
+    """
+    Check if a DynamoDB request failed because its condition expression was false
+
+    Args:
+        err (botocore.exceptions.ClientError): Request error
+
+    Returns:
+        bool: True if the condition check failed
+    """
+    return err.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
 
-        self.table = dynamodb.Table(tablename)
 
-    def write_meta(self, lookup_key, key, value):
+def new_version():
+    """
+    Get the version of an item that is created or replaced unconditionally
+
+    Versions are microsecond timestamps, so they are larger than any version the key held before and clients holding
+    an earlier version see a conflict on their next versioned update.
+
+    Returns:
+        int: Version
+    """
+    return int(time.time() * 1000000)
+
+
+def get_metadb():
+    """
+    Get the metadata backend selected by the META_BACKEND setting
+
+    Returns:
+        MetaBackend: Backend instance
+    """
+    return import_string(settings.META_BACKEND)()
+
+
+class MetaBackend(object):
+    """
+    Interface of the metadata stores
+
+    Metadata items are dictionaries with 'lookup_key', 'key', 'metavalue' and 'version'. Backends implement the
+    database operations. Reads of single keys and full listings are cached here in META_CACHE, and backends
+    invalidate the lookup keys they write.
+    """
+
+    def get_meta(self, lookup_key, key):
+        """
+        Retrieve the meta data for a given key
+
+        Items are served from META_CACHE when possible and must not be modified.
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+
+        Returns:
+
+        """
+        return META_CACHE.get_or_load(lookup_key, 'item:' + key, lambda: self._get_item(lookup_key, key))
+
+    def get_meta_list(self, lookup_key):
+        """
+        Retrieve all the meta data for a given object using the lookupley
+
+        The list is served from META_CACHE when possible and must not be modified.
+        Args:
+            lookup_key: Key for the object requested
+        Returns:
+            list: Every metadata item of the object
+
+        """
+        return META_CACHE.get_or_load(lookup_key, 'list', lambda: [item for page in self.iter_meta_pages(lookup_key)
+                                                                   for item in page])
+
+    def get_meta_keys(self, lookup_key):
+        """
+        Retrieve all the meta data keys for a given object
+
+        The list is served from META_CACHE when possible and must not be modified.
+        Args:
+            lookup_key: Key for the object requested
+        Returns:
+            list: Every metadata key of the object
+
+        """
+        return META_CACHE.get_or_load(lookup_key, 'keys', lambda: [
+            item['key'] for page in self.iter_meta_pages(lookup_key, keys_only=True) for item in page])
+
+    def get_meta_lists(self, lookup_keys):
+        """
+        Retrieve all the meta data of several objects
+        Args:
+            lookup_keys: Keys for the objects requested
+        Returns:
+            list: The items of each object, in the order of lookup_keys. Lists must not be modified.
+
+        """
+        return [self.get_meta_list(lookup_key) for lookup_key in lookup_keys]
+
+    def iter_meta_pages(self, lookup_key, keys_only=False):
+        """
+        Retrieve all the meta data for a given object one page at a time
+        Args:
+            lookup_key: Key for the object requested
+            keys_only: True to only return the metadata keys, without the values
+
+        Returns:
+            Generator of lists of items
+
+        """
+        start_key = None
+        while True:
+            items, start_key = self.get_meta_page(lookup_key, start_key=start_key, keys_only=keys_only)
+            yield items
+            if not start_key:
+                break
+
+    def _get_item(self, lookup_key, key):
+        """
+        Read the meta data for a given key from the database, bypassing the cache
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+
+        Returns:
+            dict: The item, or None if the key does not exist
+
+        """
+        raise NotImplementedError
+
+    def write_meta(self, lookup_key, key, value, overwrite=True):
+        """
+        Write the meta data for a key at version 1
+        Args:
+            lookup_key: Key for the object requested
+            key: Meta data key
+            value: Metadata value
+            overwrite: Replace an existing item. Default = True
+
+        Returns:
+
+        Raises:
+            BossError: If overwrite is False and the key already exists
+
+        """
+        raise NotImplementedError
+
+    def update_meta(self, lookup_key, key, new_value, version=None):
+        """
+        Update the Value for an existing key, optionally only if it is at the given version
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+            new_value: New meta data value
+            version: Version the client last read. Default = None, update any version
+
+        Returns:
+            int: Version of the updated item
+
+        Raises:
+            BossError: If the key does not exist or its version does not match
+
+        """
+        raise NotImplementedError
+
+    def delete_meta(self, lookup_key, key):
+        """
+        Delete the meta data item for the specified key
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+
+        Returns:
+            bool: True if the key existed
+
+        """
+        raise NotImplementedError
+
+    def delete_meta_keys(self, lookup_key):
+        """
+        Delete all the meta data for a given object
+        Args:
+            lookup_key: Key for the object
+
+        Returns:
+            int: Number of items deleted
+
+        """
+        raise NotImplementedError
+
+    def get_meta_page(self, lookup_key, limit=None, start_key=None, keys_only=False):
+        """
+        Retrieve one page of the meta data for a given object, ordered by key
+        Args:
+            lookup_key: Key for the object requested
+            limit: Maximum number of items in the page
+            start_key: Key returned with the previous page, or None for the first page
+            keys_only: True to only return the metadata keys, without the values
+
+        Returns:
+            (list, dict): The items and the key to pass to get the next page, or None if this is the last page.
+            Page keys are dictionaries of strings.
+
+        """
+        raise NotImplementedError
+
+    def search_meta(self, key, value=None, prefix=None, limit=None, start_key=None):
+        """
+        Find the objects with a metadata key whose value equals a value or starts with a prefix
+        Args:
+            key: Metadata key
+            value: Value to match exactly
+            prefix: Value prefix to match, used if value is None
+            limit: Maximum number of items read for the page
+            start_key: Key returned with the previous page, or None for the first page
+
+        Returns:
+            (list, dict): The items and the key to pass to get the next page, or None if this is the last page.
+            Page keys are dictionaries of strings with 'lookup_key', 'key' and 'search_value'.
+
+        """
+        raise NotImplementedError
+
+    def batch_get_meta(self, keys):
+        """
+        Retrieve the meta data values of many keys
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            dict: Values keyed by (lookup_key, key). Keys that do not exist are left out.
+
+        """
+        raise NotImplementedError
+
+    def batch_write_meta(self, items):
+        """
+        Write the meta data for many keys, creating or replacing each value
+        Args:
+            items: Iterable of (lookup_key, key, value) tuples. If a key is repeated the last value is written.
+
+        Returns:
+            int: Number of keys written
+
+        """
+        raise NotImplementedError
+
+    def batch_delete_meta(self, keys):
+        """
+        Delete the meta data for many keys
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            int: Number of keys deleted. Keys that do not exist are counted too.
+
+        """
+        raise NotImplementedError
+
+    def index_search_values(self):
+        """
+        Add the search value to items written before the search index existed
+        Returns:
+            int: Number of items updated
+
+        """
+        return 0
+
+
+class MetaDB(MetaBackend):
+    """
+    Metadata backend storing items in a DynamoDB table
+    """
+
+    def __init__(self):
+        """
+        Initialize the data base
+
+        Uses the table handle shared by the current thread, so creating a MetaDB per request is cheap.
+        Returns:
+
+        """
+        self.table = get_table()
+        self.tablename = self.table.name
+
+    def write_meta(self, lookup_key, key, value, overwrite=True):
         """
         Write the  meta data to dyanmodb
+
+        Without overwrite the write is conditional on the key not existing, so concurrent creates of the same key
+        cannot both succeed, and the new item starts at version 1. Replaced items get a new version from
+        new_version().
         Args:
             lookup_key: Key for the object requested
             key: Meta data key
             value: Metadata value
+            overwrite: Replace an existing item. Default = True
 
         Returns:
 
+        Raises:
+            BossError: If overwrite is False and the key already exists
+
         """
+        args = {}
+        if not overwrite:
+            args['ConditionExpression'] = 'attribute_not_exists(#k)'
+            args['ExpressionAttributeNames'] = {'#k': 'key'}
 
-        response = self.table.put_item(
-            Item={
-                'lookup_key': lookup_key,
-                'key': key,
-                'metavalue': value,
-            }
-        )
+        try:
+            response = self.table.put_item(
+                Item={
+                    'lookup_key': lookup_key,
+                    'key': key,
+                    'metavalue': value,
+                    'search_value': get_search_value(value),
+                    'version': new_version() if overwrite else 1,
+                },
+                **args
+            )
+        except ClientError as err:
+            if is_condition_failure(err):
+                raise BossError("Invalid request. The key {} already exists".format(key),
+                                ErrorCodes.INVALID_POST_ARGUMENT)
+            raise
+        META_CACHE.invalidate(lookup_key)
         return response
 
-    def get_meta(self, lookup_key, key):
+    def _get_item(self, lookup_key, key):
         """
-        Retrieve the meta data for a given key
+        Read the meta data for a given key from the database, bypassing the cache
         Args:
             lookup_key: Key for the object requested
             key: Metadata key
 
         Returns:
+            dict: The item, or None if the key does not exist
 
         """
-
         response = self.table.get_item(
             Key={
                 'lookup_key': lookup_key,
@@ -102,6 +497,7 @@ class MetaDB:
             key: Metadata key
 
         Returns:
+            bool: True if the key existed
 
         """
 
@@ -112,46 +508,320 @@ class MetaDB:
             },
             ReturnValues='ALL_OLD'
         )
-        return response
+        META_CACHE.invalidate(lookup_key)
+        return 'Attributes' in response
+
+    def delete_meta_keys(self, lookup_key):
+        """
+        Delete all the meta data for a given object
+        Args:
+            lookup_key: Key for the object
+
+        Returns:
+            int: Number of items deleted
+
+        """
+        count = 0
+        try:
+            with self.table.batch_writer() as batch:
+                for items in self.iter_meta_pages(lookup_key, keys_only=True):
+                    for item in items:
+                        batch.delete_item(Key={'lookup_key': item['lookup_key'], 'key': item['key']})
+                        count += 1
+        finally:
+            META_CACHE.invalidate(lookup_key)
+        return count
+
+    def _batch_request(self, operation, request_items, unprocessed_field):
+        """
+        Send one batch request, resending unprocessed items until DynamoDB accepts them all
+        Args:
+            operation: Low level client method, batch_get_item or batch_write_item
+            request_items: Request for the table
+            unprocessed_field: Response field holding the unprocessed items
+
+        Returns:
+            list: Items returned by every attempt
+
+        Raises:
+            BossError: If items are still unprocessed after the maximum number of retries
+
+        """
+        items = []
+        pending = {self.tablename: request_items}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(BATCH_RETRY_DELAY * 2 ** (attempt - 1))
+            response = operation(RequestItems=pending)
+            items.extend(response.get('Responses', {}).get(self.tablename, []))
+            pending = response.get(unprocessed_field)
+            if not pending:
+                return items
+        raise BossError("Unable to complete the metadata batch request. DynamoDB throughput exceeded",
+                        ErrorCodes.IO_ERROR)
+
+    def _run_batches(self, operation, pages, unprocessed_field):
+        """
+        Send batch requests in parallel
+        Args:
+            operation: Low level client method, batch_get_item or batch_write_item
+            pages: Requests for the table, one per batch request
+            unprocessed_field: Response field holding the unprocessed items
+
+        Returns:
+            list: Items returned by every request
+
+        """
+        if len(pages) == 1:
+            return self._batch_request(operation, pages[0], unprocessed_field)
+
+        items = []
+        with ThreadPoolExecutor(max_workers=min(len(pages), BATCH_WORKERS)) as executor:
+            for page_items in executor.map(lambda page: self._batch_request(operation, page, unprocessed_field),
+                                           pages):
+                items.extend(page_items)
+        return items
+
+    @staticmethod
+    def _key(lookup_key, key):
+        return {'lookup_key': {'S': lookup_key}, 'key': {'S': key}}
+
+    def batch_get_meta(self, keys):
+        """
+        Retrieve the meta data for many keys, across any number of objects
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            dict: Metadata values keyed by (lookup_key, key). Keys that do not exist are left out.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        pages = [{'Keys': [self._key(lookup_key, key) for lookup_key, key in keys[start:start + BATCH_GET_SIZE]]}
+                 for start in range(0, len(keys), BATCH_GET_SIZE)]
+        if not pages:
+            return {}
+
+        client = self.table.meta.client
+        items = self._run_batches(client.batch_get_item, pages, 'UnprocessedKeys')
+        return {(item['lookup_key']['S'], item['key']['S']): item['metavalue']['S'] for item in items}
+
+    def batch_write_meta(self, items):
+        """
+        Write the meta data for many keys, creating or replacing each value
+
+        Batch writes cannot be conditional. Every item gets a new version from new_version(), so clients holding an
+        earlier version of a replaced key see a conflict on their next versioned update.
+        Args:
+            items: Iterable of (lookup_key, key, value) tuples. If a key is repeated the last value is written.
+
+        Returns:
+            int: Number of keys written
 
-    def update_meta(self, lookup_key, key, new_value):
+        """
+        values = {(lookup_key, key): value for lookup_key, key, value in items}
+        version = {'N': str(new_version())}
+        requests = [{'PutRequest': {'Item': dict(self._key(lookup_key, key), metavalue={'S': value},
+                                                 search_value={'S': get_search_value(value)}, version=version)}}
+                    for (lookup_key, key), value in values.items()]
+        return self._write_batches(requests, {lookup_key for lookup_key, _ in values})
+
+    def batch_delete_meta(self, keys):
+        """
+        Delete the meta data for many keys
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            int: Number of keys deleted. Keys that do not exist are counted too.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        requests = [{'DeleteRequest': {'Key': self._key(lookup_key, key)}} for lookup_key, key in keys]
+        return self._write_batches(requests, {lookup_key for lookup_key, _ in keys})
+
+    def _write_batches(self, requests, lookup_keys):
+        """
+        Send write requests in batches
+        Args:
+            requests: PutRequest and DeleteRequest items
+            lookup_keys: Lookup keys of the objects written, whose cached meta data is invalidated
+
+        Returns:
+            int: Number of requests
+
+        """
+        pages = [requests[start:start + BATCH_WRITE_SIZE] for start in range(0, len(requests), BATCH_WRITE_SIZE)]
+        try:
+            if pages:
+                self._run_batches(self.table.meta.client.batch_write_item, pages, 'UnprocessedItems')
+        finally:
+            # Some batches may have been written even if others failed
+            for lookup_key in lookup_keys:
+                META_CACHE.invalidate(lookup_key)
+        return len(requests)
+
+    def update_meta(self, lookup_key, key, new_value, version=None):
         """
         Update the Value for the given key
+
+        The update is conditional on the key existing. If a version is given it is also conditional on the stored
+        version matching, so read-modify-write clients can detect concurrent updates. Items written before versions
+        were tracked are at version 0.
         Args:
             lookup_key: Key for the object requested
             key: Metadata key
             new_value: New meta data value
+            version: Version the client last read. Default = None, update any version
 
         Returns:
+            int: Version of the updated item
+
+        Raises:
+            BossError: If the key does not exist or its version does not match
 
         """
+        condition = 'attribute_exists(#k)'
+        names = {'#k': 'key', '#v': 'version'}
+        values = {':val1': new_value, ':search': get_search_value(new_value), ':zero': 0, ':one': 1}
+        if version is not None:
+            if version == 0:
+                condition += ' AND attribute_not_exists(#v)'
+            else:
+                condition += ' AND #v = :version'
+                values[':version'] = version
 
-        response = self.table.update_item(
-            Key={
-                'lookup_key': lookup_key,
-                'key': key,
-            },
-            UpdateExpression='SET metavalue = :val1',
-            ExpressionAttributeValues={
-                ':val1': new_value
-            },
-            ReturnValues='UPDATED_NEW'
-        )
-        return response
+        try:
+            response = self.table.update_item(
+                Key={
+                    'lookup_key': lookup_key,
+                    'key': key,
+                },
+                UpdateExpression='SET metavalue = :val1, search_value = :search, '
+                                 '#v = if_not_exists(#v, :zero) + :one',
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='UPDATED_NEW'
+            )
+        except ClientError as err:
+            if not is_condition_failure(err):
+                raise
+            if version is not None and self._get_item(lookup_key, key):
+                raise BossError("The key {} was modified since version {}".format(key, version),
+                                ErrorCodes.VERSION_CONFLICT)
+            raise BossError("Invalid request. The key {} does not exists".format(key),
+                            ErrorCodes.INVALID_POST_ARGUMENT)
+        META_CACHE.invalidate(lookup_key)
+        return int(response['Attributes']['version'])
 
-    def get_meta_list(self, lookup_key):
+    def get_meta_lists(self, lookup_keys):
         """
-        Retrieve all the meta data for a given object using the lookupley
+        Retrieve all the meta data of several objects, querying the objects concurrently
+        Args:
+            lookup_keys: Keys for the objects requested
+        Returns:
+            list: The items of each object, in the order of lookup_keys. Lists must not be modified.
+
+        """
+        if len(lookup_keys) < 2:
+            return super(MetaDB, self).get_meta_lists(lookup_keys)
+        # Each pool thread reads through its own table handle
+        return list(get_executor().map(lambda lookup_key: MetaDB().get_meta_list(lookup_key), lookup_keys))
+
+    def get_meta_page(self, lookup_key, limit=None, start_key=None, keys_only=False):
+        """
+        Retrieve one page of the meta data for a given object
         Args:
             lookup_key: Key for the object requested
+            limit: Maximum number of items in the page. DynamoDB also ends a page after 1 MB of data.
+            start_key: Key returned with the previous page, or None for the first page
+            keys_only: True to only return the metadata keys, without the values
+
         Returns:
+            (list, dict): The items and the key to pass to get the next page, or None if this is the last page
 
         """
-        response = self.table.query(
-            KeyConditionExpression=Key('lookup_key').eq(lookup_key)
-        )
+        query_args = {'KeyConditionExpression': Key('lookup_key').eq(lookup_key)}
+        if keys_only:
+            query_args['ProjectionExpression'] = 'lookup_key, #k'
+            query_args['ExpressionAttributeNames'] = {'#k': 'key'}
+        if limit:
+            query_args['Limit'] = limit
+        if start_key:
+            query_args['ExclusiveStartKey'] = start_key
 
-        if 'Items' in response:
-            return response['Items']
+        response = self.table.query(**query_args)
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+    def search_meta(self, key, value=None, prefix=None, limit=None, start_key=None):
+        """
+        Find the objects with a metadata key whose value equals a value or starts with a prefix
+
+        Runs one query on the search index. Values longer than the indexed part are compared in full with a filter.
+        Args:
+            key: Metadata key
+            value: Value to match exactly
+            prefix: Value prefix to match, used if value is None
+            limit: Maximum number of index items read. DynamoDB also ends a page after 1 MB of data.
+            start_key: Key returned with the previous page, or None for the first page
+
+        Returns:
+            (list, dict): The items, with lookup_key, key and metavalue, and the key to pass to get the next page, or
+            None if this is the last page
+
+        """
+        search = value if value is not None else prefix
+        indexed = get_search_value(search)
+        if value is not None:
+            condition = Key('key').eq(key) & Key('search_value').eq(indexed)
+            full_filter = Attr('metavalue').eq(value)
         else:
-            return None
+            condition = Key('key').eq(key) & Key('search_value').begins_with(indexed)
+            full_filter = Attr('metavalue').begins_with(prefix)
+
+        query_args = {'IndexName': SEARCH_INDEX, 'KeyConditionExpression': condition}
+        if indexed != search:
+            query_args['FilterExpression'] = full_filter
+        if limit:
+            query_args['Limit'] = limit
+        if start_key:
+            query_args['ExclusiveStartKey'] = start_key
+
+        response = self.table.query(**query_args)
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+    def index_search_values(self):
+        """
+        Add the search value to items written before the search index existed
+        Returns:
+            int: Number of items updated
+
+        """
+        count = 0
+        scan_args = {'FilterExpression': Attr('search_value').not_exists(),
+                     'ProjectionExpression': 'lookup_key, #k, metavalue',
+                     'ExpressionAttributeNames': {'#k': 'key'}}
+        while True:
+            response = self.table.scan(**scan_args)
+            for item in response.get('Items', []):
+                if not isinstance(item.get('metavalue'), str):
+                    continue
+                try:
+                    self.table.update_item(
+                        Key={'lookup_key': item['lookup_key'], 'key': item['key']},
+                        UpdateExpression='SET search_value = :search',
+                        ConditionExpression='metavalue = :val',
+                        ExpressionAttributeValues={':search': get_search_value(item['metavalue']),
+                                                   ':val': item['metavalue']}
+                    )
+                    count += 1
+                except ClientError as err:
+                    # The item was changed or deleted since the scan, and the writer set its search value
+                    if not is_condition_failure(err):
+                        raise
+
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return count
@@ -1,3 +1,24 @@
 from django.db import models
 
-# Create your models here.
+
+class MetaValue(models.Model):
+    """
+    Metadata item stored by the SQL metadata backend (see bossmeta.sqlmetadb)
+
+    """
+    # Indexed columns are at most 191 characters, the longest MySQL can index with utf8mb4 without large prefixes
+    # (767 bytes per column)
+    lookup_key = models.CharField(max_length=64)
+    key = models.CharField(max_length=191)
+    metavalue = models.TextField()
+    # Value truncated to the indexed length, used by searches
+    search_value = models.CharField(max_length=191)
+    version = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = u"meta_value"
+        unique_together = ('lookup_key', 'key')
+        index_together = ('key', 'search_value', 'lookup_key')
+
+    def __str__(self):
+        return 'Lookup key = {}, key = {}'.format(self.lookup_key, self.key)
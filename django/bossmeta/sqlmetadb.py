@@ -0,0 +1,342 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from bosscore.error import BossError, ErrorCodes
+from .metadb import META_CACHE, MetaBackend, new_version
+from .models import MetaValue
+
+# Number of characters of a value stored in the indexed search_value column
+SEARCH_VALUE_LENGTH = MetaValue._meta.get_field('search_value').max_length
+
+# Maximum number of characters of a metadata key
+KEY_LENGTH = MetaValue._meta.get_field('key').max_length
+
+# Maximum number of keys in the IN clause of a batch query
+BATCH_SIZE = 500
+
+# Fields of the items returned by the backend
+ITEM_FIELDS = ('lookup_key', 'key', 'metavalue', 'version')
+
+
+def get_search_value(value):
+    """
+    Get the indexed form of a metadata value
+
+    Args:
+        value (str): Metadata value
+
+    Returns:
+        str: The value truncated to the length of the search_value column
+    """
+    return value[:SEARCH_VALUE_LENGTH]
+
+
+def check_key(key):
+    """
+    Check a metadata key fits in the key column
+
+    Args:
+        key (str): Metadata key
+
+    Returns:
+        None
+
+    Raises:
+        BossError: If the key is too long
+    """
+    if len(key) > KEY_LENGTH:
+        raise BossError("Invalid key. Keys are limited to {} characters".format(KEY_LENGTH),
+                        ErrorCodes.INVALID_POST_ARGUMENT)
+
+
+def group_keys(keys):
+    """
+    Group metadata keys by lookup key, in chunks that fit in one query
+
+    Args:
+        keys: Iterable of (lookup_key, key) tuples
+
+    Returns:
+        Generator of (lookup_key, list of keys) tuples
+    """
+    grouped = {}
+    for lookup_key, key in keys:
+        grouped.setdefault(lookup_key, []).append(key)
+    for lookup_key, names in grouped.items():
+        for start in range(0, len(names), BATCH_SIZE):
+            yield lookup_key, names[start:start + BATCH_SIZE]
+
+
+class SqlMetaDB(MetaBackend):
+    """
+    Metadata backend storing items in the Django database
+
+    Suited to small deployments and tests, where metadata is then read and written in process. Items are stored in
+    the meta_value table, which is indexed for lookups by object and for searches by key and value.
+    """
+
+    def _get_item(self, lookup_key, key):
+        """
+        Read the meta data for a given key from the database, bypassing the cache
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+
+        Returns:
+            dict: The item, or None if the key does not exist
+
+        """
+        return MetaValue.objects.filter(lookup_key=lookup_key, key=key).values(*ITEM_FIELDS).first()
+
+    def write_meta(self, lookup_key, key, value, overwrite=True):
+        """
+        Write the meta data for a key
+
+        New items start at version 1. Replaced items get a new version from new_version().
+        Args:
+            lookup_key: Key for the object requested
+            key: Meta data key
+            value: Metadata value
+            overwrite: Replace an existing item. Default = True
+
+        Returns:
+
+        Raises:
+            BossError: If the key is too long, or overwrite is False and the key already exists
+
+        """
+        check_key(key)
+        defaults = {'metavalue': value, 'search_value': get_search_value(value),
+                    'version': new_version() if overwrite else 1}
+        if overwrite:
+            MetaValue.objects.update_or_create(lookup_key=lookup_key, key=key, defaults=defaults)
+        else:
+            try:
+                with transaction.atomic():
+                    MetaValue.objects.create(lookup_key=lookup_key, key=key, **defaults)
+            except IntegrityError:
+                raise BossError("Invalid request. The key {} already exists".format(key),
+                                ErrorCodes.INVALID_POST_ARGUMENT)
+        META_CACHE.invalidate(lookup_key)
+
+    def update_meta(self, lookup_key, key, new_value, version=None):
+        """
+        Update the Value for an existing key, optionally only if it is at the given version
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+            new_value: New meta data value
+            version: Version the client last read. Default = None, update any version
+
+        Returns:
+            int: Version of the updated item
+
+        Raises:
+            BossError: If the key does not exist or its version does not match
+
+        """
+        items = MetaValue.objects.filter(lookup_key=lookup_key, key=key)
+        matching = items if version is None else items.filter(version=version)
+        with transaction.atomic():
+            if not matching.update(metavalue=new_value, search_value=get_search_value(new_value),
+                                   version=F('version') + 1):
+                if version is not None and items.exists():
+                    raise BossError("The key {} was modified since version {}".format(key, version),
+                                    ErrorCodes.VERSION_CONFLICT)
+                raise BossError("Invalid request. The key {} does not exists".format(key),
+                                ErrorCodes.INVALID_POST_ARGUMENT)
+            new_version = items.values_list('version', flat=True).get()
+        META_CACHE.invalidate(lookup_key)
+        return new_version
+
+    def delete_meta(self, lookup_key, key):
+        """
+        Delete the meta data item for the specified key
+        Args:
+            lookup_key: Key for the object requested
+            key: Metadata key
+
+        Returns:
+            bool: True if the key existed
+
+        """
+        deleted, _ = MetaValue.objects.filter(lookup_key=lookup_key, key=key).delete()
+        META_CACHE.invalidate(lookup_key)
+        return deleted > 0
+
+    def delete_meta_keys(self, lookup_key):
+        """
+        Delete all the meta data for a given object
+        Args:
+            lookup_key: Key for the object
+
+        Returns:
+            int: Number of items deleted
+
+        """
+        deleted, _ = MetaValue.objects.filter(lookup_key=lookup_key).delete()
+        META_CACHE.invalidate(lookup_key)
+        return deleted
+
+    @staticmethod
+    def _page(items, limit, page_key):
+        """
+        Read one page of an ordered query
+        Args:
+            items: Ordered values() QuerySet
+            limit: Maximum number of items, or None for all of them
+            page_key: Function returning the page key of an item
+
+        Returns:
+            (list, dict): The items and the key of the last item if there are more pages, else None
+
+        """
+        if not limit:
+            return list(items), None
+
+        # Fetch one extra item to find out if there is another page
+        page = list(items[:limit + 1])
+        if len(page) > limit:
+            return page[:limit], page_key(page[limit - 1])
+        return page, None
+
+    def get_meta_page(self, lookup_key, limit=None, start_key=None, keys_only=False):
+        """
+        Retrieve one page of the meta data for a given object, ordered by key
+        Args:
+            lookup_key: Key for the object requested
+            limit: Maximum number of items in the page
+            start_key: Key returned with the previous page, or None for the first page
+            keys_only: True to only return the metadata keys, without the values
+
+        Returns:
+            (list, dict): The items and the key to pass to get the next page, or None if this is the last page
+
+        """
+        items = MetaValue.objects.filter(lookup_key=lookup_key).order_by('key')
+        if start_key:
+            items = items.filter(key__gt=start_key['key'])
+        items = items.values(*(('lookup_key', 'key') if keys_only else ITEM_FIELDS))
+        return self._page(items, limit, lambda item: {'lookup_key': lookup_key, 'key': item['key']})
+
+    def search_meta(self, key, value=None, prefix=None, limit=None, start_key=None):
+        """
+        Find the objects with a metadata key whose value equals a value or starts with a prefix
+
+        Uses the (key, search_value, lookup_key) index. Values longer than the indexed part are compared in full.
+        Args:
+            key: Metadata key
+            value: Value to match exactly
+            prefix: Value prefix to match, used if value is None
+            limit: Maximum number of items in the page
+            start_key: Key returned with the previous page, or None for the first page
+
+        Returns:
+            (list, dict): The items and the key to pass to get the next page, or None if this is the last page
+
+        """
+        items = MetaValue.objects.filter(key=key)
+        if value is not None:
+            items = items.filter(search_value=get_search_value(value), metavalue=value)
+        else:
+            items = items.filter(search_value__startswith=get_search_value(prefix), metavalue__startswith=prefix)
+        items = items.order_by('search_value', 'lookup_key')
+        if start_key:
+            items = items.filter(Q(search_value__gt=start_key['search_value']) |
+                                 Q(search_value=start_key['search_value'], lookup_key__gt=start_key['lookup_key']))
+        items = items.values('search_value', *ITEM_FIELDS)
+        return self._page(items, limit, lambda item: {'lookup_key': item['lookup_key'], 'key': key,
+                                                      'search_value': item['search_value']})
+
+    def batch_get_meta(self, keys):
+        """
+        Retrieve the meta data values of many keys, with one query per object
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            dict: Values keyed by (lookup_key, key). Keys that do not exist are left out.
+
+        """
+        values = {}
+        for lookup_key, names in group_keys(dict.fromkeys(keys)):
+            for key, value in MetaValue.objects.filter(lookup_key=lookup_key, key__in=names)\
+                    .values_list('key', 'metavalue'):
+                values[(lookup_key, key)] = value
+        return values
+
+    @staticmethod
+    def _delete_keys(keys):
+        """
+        Delete many keys, with one query per object
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            None
+
+        """
+        for lookup_key, names in group_keys(keys):
+            MetaValue.objects.filter(lookup_key=lookup_key, key__in=names).delete()
+
+    def batch_write_meta(self, items):
+        """
+        Write the meta data for many keys in one transaction, creating or replacing each value at a new version
+        from new_version()
+        Args:
+            items: Iterable of (lookup_key, key, value) tuples. If a key is repeated the last value is written.
+
+        Returns:
+            int: Number of keys written
+
+        Raises:
+            BossError: If a key is too long
+
+        """
+        values = {(lookup_key, key): value for lookup_key, key, value in items}
+        for _, key in values:
+            check_key(key)
+        version = new_version()
+        try:
+            with transaction.atomic():
+                self._delete_keys(values)
+                MetaValue.objects.bulk_create([MetaValue(lookup_key=lookup_key, key=key, metavalue=value,
+                                                         search_value=get_search_value(value), version=version)
+                                               for (lookup_key, key), value in values.items()], batch_size=BATCH_SIZE)
+        finally:
+            for lookup_key in {lookup_key for lookup_key, _ in values}:
+                META_CACHE.invalidate(lookup_key)
+        return len(values)
+
+    def batch_delete_meta(self, keys):
+        """
+        Delete the meta data for many keys in one transaction
+        Args:
+            keys: Iterable of (lookup_key, key) tuples
+
+        Returns:
+            int: Number of keys deleted. Keys that do not exist are counted too.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        try:
+            with transaction.atomic():
+                self._delete_keys(keys)
+        finally:
+            for lookup_key in {lookup_key for lookup_key, _ in keys}:
+                META_CACHE.invalidate(lookup_key)
+        return len(keys)
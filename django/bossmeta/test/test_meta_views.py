@@ -20,6 +20,8 @@ import unittest
 from rest_framework.test import APITestCase
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
 
 from bosscore.test.setup_db import SetupTestDB
 
@@ -45,6 +47,8 @@ class MetaServiceViewTestsMixin(object):
             Initialize the database
             :return:
             """
+        # Metadata read in earlier tests may still be cached
+        cache.clear()
         user = User.objects.create_superuser(username='testuser', email='test@test.com', password='testuser')
         dbsetup = SetupTestDB()
         dbsetup.set_user(user)
@@ -307,6 +311,207 @@ class MetaServiceViewTestsMixin(object):
         response = self.client.put(baseurl + '?key=test')
         self.assertEqual(response.status_code, 400)
 
+    def test_meta_service_batch(self):
+        """
+        Test writing, reading and deleting keys of several resources in one request
+        :return:
+        """
+        baseurl = '/' + version + '/meta-batch/'
+        items = [{'key': 'batchkey{}'.format(idx), 'value': 'value{}'.format(idx)} for idx in range(60)]
+        items.append({'experiment': 'exp1', 'channel_layer': 'channel1', 'key': 'channelkey', 'value': 'cvalue'})
+
+        response = self.client.post(baseurl, data={'collection': 'col1', 'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 61)
+
+        keys = [{'key': item['key'], 'experiment': item.get('experiment'), 'channel_layer': item.get('channel_layer')}
+                for item in items] + [{'key': 'notakey'}]
+        response = self.client.post(baseurl + 'get/', data={'collection': 'col1', 'items': keys}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 61)
+        self.assertEqual([item['key'] for item in response.data['missing']], ['notakey'])
+        values = {item['key']: item['value'] for item in response.data['items']}
+        self.assertEqual(values['batchkey7'], 'value7')
+        self.assertEqual(values['channelkey'], 'cvalue')
+
+        response = self.client.delete(baseurl, data={'collection': 'col1', 'items': keys}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/' + version + '/meta/col1/')
+        self.assertEqual(response.data['keys'], [])
+
+    def test_meta_service_versions(self):
+        """
+        Test conditional creates and versioned updates
+        :return:
+        """
+        baseurl = '/' + version + '/meta/col1/exp1/'
+
+        response = self.client.post(baseurl + '?key=versionkey&value=v1')
+        self.assertEqual(response.status_code, 201)
+
+        # Creating the key again fails
+        response = self.client.post(baseurl + '?key=versionkey&value=v2')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(baseurl + '?key=versionkey')
+        self.assertEqual(response.data['value'], 'v1')
+        self.assertEqual(response.data['version'], 1)
+
+        # Update from the version that was read
+        response = self.client.put(baseurl + '?key=versionkey&value=v2&version=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 2)
+
+        # A stale version is rejected
+        response = self.client.put(baseurl + '?key=versionkey&value=v3&version=1')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.get(baseurl + '?key=versionkey')
+        self.assertEqual(response.data['value'], 'v2')
+
+        # Updates without a version always apply
+        response = self.client.put(baseurl + '?key=versionkey&value=v3')
+        self.assertEqual(response.data['version'], 3)
+
+        response = self.client.put(baseurl + '?key=versionkey&value=v4&version=abc')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.put(baseurl + '?key=missingkey&value=v1&version=1')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.delete(baseurl + '?key=versionkey')
+        self.assertEqual(response.status_code, 200)
+
+    def test_meta_service_search(self):
+        """
+        Test finding resources by metadata value and value prefix
+        :return:
+        """
+        items = [{'collection': 'col1', 'key': 'stain', 'value': 'GFP'},
+                 {'collection': 'col1', 'experiment': 'exp1', 'key': 'stain', 'value': 'GFP-2'},
+                 {'collection': 'col1', 'experiment': 'exp1', 'channel_layer': 'channel1', 'key': 'stain',
+                  'value': 'DAPI'}]
+        response = self.client.post('/' + version + '/meta-batch/', data={'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/' + version + '/meta-search/?key=stain&value=GFP')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['items'], [{'collection': 'col1', 'key': 'stain', 'value': 'GFP'}])
+
+        # Page through the prefix matches
+        found = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get('/' + version + '/meta-search/?key=stain&prefix=GFP&limit=1&cursor=' + cursor)
+            self.assertEqual(response.status_code, 200)
+            found.extend(item['value'] for item in response.data['items'])
+            cursor = response.data['next_cursor']
+        self.assertEqual(found, ['GFP', 'GFP-2'])
+
+        response = self.client.get('/' + version + '/meta-search/?key=stain&value=GFP&prefix=G')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/' + version + '/meta-search/?value=GFP')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/' + version + '/meta-search/?key=stain&value=GFP&cursor=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_meta_service_hierarchy(self):
+        """
+        Test getting the metadata of a channel together with its parents
+        :return:
+        """
+        items = [{'collection': 'col1', 'key': 'scale', 'value': '4nm'},
+                 {'collection': 'col1', 'key': 'stain', 'value': 'none'},
+                 {'collection': 'col1', 'experiment': 'exp1', 'key': 'stain', 'value': 'GFP'},
+                 {'collection': 'col1', 'experiment': 'exp1', 'channel_layer': 'channel1', 'key': 'gain',
+                  'value': '2'}]
+        response = self.client.post('/' + version + '/meta-batch/', data={'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        baseurl = '/' + version + '/meta/col1/exp1/channel1/'
+        response = self.client.get(baseurl + '?hierarchy=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'collection': {'scale': '4nm', 'stain': 'none'},
+                                         'experiment': {'stain': 'GFP'},
+                                         'channel_layer': {'gain': '2'}})
+
+        response = self.client.get(baseurl + '?hierarchy=true&inherit=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['metadata'], {'scale': '4nm', 'stain': 'GFP', 'gain': '2'})
+        self.assertEqual(response.data['sources'], {'scale': 'collection', 'stain': 'experiment',
+                                                    'gain': 'channel_layer'})
+
+        response = self.client.get(baseurl + '?hierarchy=true&inherit=true&key=stain')
+        self.assertEqual(response.data['metadata'], {'stain': 'GFP'})
+
+        response = self.client.get('/' + version + '/meta/col1/?hierarchy=true')
+        self.assertEqual(response.data, {'collection': {'scale': '4nm', 'stain': 'none'}})
+
+    def test_meta_service_list_pages(self):
+        """
+        Test listing keys one page at a time, with and without values
+        :return:
+        """
+        baseurl = '/' + version + '/meta/col1/'
+        items = [{'key': 'pagekey{:02}'.format(idx), 'value': 'value{}'.format(idx)} for idx in range(25)]
+        response = self.client.post('/' + version + '/meta-batch/', data={'collection': 'col1', 'items': items},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+
+        keys = []
+        cursor = None
+        while True:
+            args = {'limit': 10}
+            if cursor:
+                args['cursor'] = cursor
+            response = self.client.get(baseurl, args)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['keys']), 10)
+            keys.extend(response.data['keys'])
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(keys, [item['key'] for item in items])
+
+        response = self.client.get(baseurl, {'values': 'true'})
+        self.assertEqual(response.status_code, 200)
+        listing = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual(listing['items'], items)
+
+        response = self.client.get('/' + version + '/meta/col1/exp1/', {'cursor': cursor or 'e30='})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(baseurl, {'limit': 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_meta_service_batch_invalid(self):
+        """
+        Test batch requests with missing values or resources are rejected
+        :return:
+        """
+        baseurl = '/' + version + '/meta-batch/'
+        response = self.client.post(baseurl, data={'collection': 'col1', 'items': [{'key': 'k'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(baseurl, data={'items': [{'key': 'k', 'value': 'v'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(baseurl, data={'collection': 'col1', 'channel_layer': 'channel1',
+                                                   'items': [{'key': 'k', 'value': 'v'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('needs an experiment', response.json()['message'])
+
+        response = self.client.post(baseurl, data={'collection': 'col10', 'items': [{'key': 'k', 'value': 'v'}]},
+                                    format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(META_BACKEND='bossmeta.sqlmetadb.SqlMetaDB')
+class SqlMetaServiceViewTests(MetaServiceViewTestsMixin, APITestCase):
+    """
+    Class to tests the bosscore views for the metadata service with the SQL backend
+    """
+
 
 # Assume there is no local DynamoDB unless the env variable set by jenkins.sh
 # present.
@@ -0,0 +1,45 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from django.test import SimpleTestCase
+
+from bossmeta.metadb import MetaDB, get_table
+
+
+class MetaDBTableTests(SimpleTestCase):
+    """
+    Class to test the metadata table handles are shared
+    """
+
+    def test_table_reused(self):
+        """
+        Test every MetaDB created by a thread uses the same table handle
+        :return:
+        """
+        self.assertIs(MetaDB().table, MetaDB().table)
+        self.assertIs(MetaDB().table, get_table())
+
+    def test_table_per_thread(self):
+        """
+        Test other threads get their own table handle
+        :return:
+        """
+        tables = []
+        thread = threading.Thread(target=lambda: tables.append(get_table()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(tables[0], get_table())
+        self.assertEqual(tables[0].name, get_table().name)
@@ -0,0 +1,116 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from bosscore.error import BossError, ErrorCodes
+from bossmeta.benchmark import run_benchmark
+from bossmeta.sqlmetadb import SqlMetaDB
+
+
+class SqlMetaDBTests(TestCase):
+    """
+    Class to test the SQL metadata backend
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.mdb = SqlMetaDB()
+
+    def test_write_update_delete(self):
+        """
+        Test conditional writes, versioned updates and deletes
+        :return:
+        """
+        self.mdb.write_meta('1&2', 'stain', 'GFP', overwrite=False)
+        with self.assertRaises(BossError):
+            self.mdb.write_meta('1&2', 'stain', 'DAPI', overwrite=False)
+
+        self.assertEqual(self.mdb.get_meta('1&2', 'stain')['metavalue'], 'GFP')
+        self.assertEqual(self.mdb.update_meta('1&2', 'stain', 'DAPI', version=1), 2)
+        self.assertEqual(self.mdb.get_meta('1&2', 'stain')['metavalue'], 'DAPI')
+
+        with self.assertRaises(BossError) as err:
+            self.mdb.update_meta('1&2', 'stain', 'RFP', version=1)
+        self.assertEqual(err.exception.args[1], ErrorCodes.VERSION_CONFLICT)
+
+        self.assertTrue(self.mdb.delete_meta('1&2', 'stain'))
+        self.assertFalse(self.mdb.delete_meta('1&2', 'stain'))
+        self.assertIsNone(self.mdb.get_meta('1&2', 'stain'))
+
+    def test_batch_write_new_version(self):
+        """
+        Test a batch write replaces the version of a key, so updates from the old version are rejected
+        :return:
+        """
+        self.mdb.write_meta('1&2', 'stain', 'GFP', overwrite=False)
+        self.mdb.batch_write_meta([('1&2', 'stain', 'DAPI')])
+
+        version = self.mdb.get_meta('1&2', 'stain')['version']
+        self.assertGreater(version, 1)
+        with self.assertRaises(BossError) as err:
+            self.mdb.update_meta('1&2', 'stain', 'RFP', version=1)
+        self.assertEqual(err.exception.args[1], ErrorCodes.VERSION_CONFLICT)
+        self.assertEqual(self.mdb.update_meta('1&2', 'stain', 'RFP', version=version), version + 1)
+
+    def test_long_key_rejected(self):
+        """
+        Test keys longer than the indexed key column are rejected
+        :return:
+        """
+        with self.assertRaises(BossError):
+            self.mdb.write_meta('1&2', 'k' * 192, 'value')
+        with self.assertRaises(BossError):
+            self.mdb.batch_write_meta([('1&2', 'k' * 192, 'value')])
+        self.mdb.write_meta('1&2', 'k' * 191, 'value')
+
+    def test_pages_and_search(self):
+        """
+        Test listing pages and searching values
+        :return:
+        """
+        self.mdb.batch_write_meta([('1&2', 'key{}'.format(idx), 'value{}'.format(idx)) for idx in range(5)] +
+                                  [('1&3', 'key1', 'value1')])
+
+        keys = []
+        start_key = None
+        while True:
+            items, start_key = self.mdb.get_meta_page('1&2', limit=2, start_key=start_key, keys_only=True)
+            keys.extend(item['key'] for item in items)
+            if not start_key:
+                break
+        self.assertEqual(keys, ['key{}'.format(idx) for idx in range(5)])
+        self.assertEqual(self.mdb.get_meta_keys('1&2'), keys)
+
+        items, start_key = self.mdb.search_meta('key1', value='value1', limit=1)
+        self.assertEqual([item['lookup_key'] for item in items], ['1&2'])
+        items, start_key = self.mdb.search_meta('key1', value='value1', limit=1, start_key=start_key)
+        self.assertEqual([item['lookup_key'] for item in items], ['1&3'])
+        self.assertIsNone(start_key)
+
+        self.assertEqual(self.mdb.batch_get_meta([('1&2', 'key0'), ('1&3', 'key1'), ('1&3', 'key9')]),
+                         {('1&2', 'key0'): 'value0', ('1&3', 'key1'): 'value1'})
+        self.assertEqual(self.mdb.delete_meta_keys('1&2'), 5)
+        self.assertEqual(self.mdb.get_meta_keys('1&2'), [])
+
+    def test_benchmark(self):
+        """
+        Test the benchmark workload runs and cleans up after itself
+        :return:
+        """
+        results = run_benchmark(self.mdb, items=10, batch_size=4)
+        self.assertEqual(results[0]['operation'], 'write')
+        self.assertEqual(results[0]['count'], 10)
+        self.assertEqual(self.mdb.search_meta('key000001', prefix='value'), ([], None))
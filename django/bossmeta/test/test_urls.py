@@ -15,7 +15,7 @@
 from rest_framework.test import APITestCase
 from django.core.urlresolvers import resolve
 from django.conf import settings
-from bossmeta.views import BossMeta
+from bossmeta.views import BossMeta, BossMetaBatch, BossMetaBatchGet, BossMetaSearch
 
 version = settings.BOSS_VERSION
 
@@ -37,3 +37,45 @@ class BossCoreMetaServiceRoutingTests(APITestCase):
 
         match = resolve('/' + version + '/meta/col1/exp1/ch1/')
         self.assertEqual(match.func.__name__, BossMeta.as_view().__name__)
+
+    def test_meta_batch_urls_resolve(self):
+        """
+        Test to make sure the batch URLs resolve to the batch views
+
+        Returns: None
+        """
+        match = resolve('/' + version + '/meta-batch/')
+        self.assertEqual(match.func.__name__, BossMetaBatch.as_view().__name__)
+
+        match = resolve('/' + version + '/meta-batch/get/')
+        self.assertEqual(match.func.__name__, BossMetaBatchGet.as_view().__name__)
+
+    def test_collection_named_batch_resolves_to_BossMeta_view(self):
+        """
+        Test to make sure a collection named like the batch endpoint still resolves to the meta view
+
+        Returns: None
+        """
+        match = resolve('/' + version + '/meta/batch/')
+        self.assertEqual(match.func.__name__, BossMeta.as_view().__name__)
+
+        match = resolve('/' + version + '/meta/batch/get/')
+        self.assertEqual(match.func.__name__, BossMeta.as_view().__name__)
+
+    def test_meta_search_url_resolves(self):
+        """
+        Test to make sure the search URL resolves to the search view
+
+        Returns: None
+        """
+        match = resolve('/' + version + '/meta-search/')
+        self.assertEqual(match.func.__name__, BossMetaSearch.as_view().__name__)
+
+    def test_collection_named_search_resolves_to_BossMeta_view(self):
+        """
+        Test to make sure a collection named like the search endpoint still resolves to the meta view
+
+        Returns: None
+        """
+        match = resolve('/' + version + '/meta/search/')
+        self.assertEqual(match.func.__name__, BossMeta.as_view().__name__)
@@ -1,12 +1,113 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 
 from bosscore.request import BossRequest
 from bosscore.error import BossError, BossHTTPError, ErrorCodes
+from bosscore.lookup import LookUpKey
+from bosscore.permissions import BossPermissionManager
+from bosscore.resolver import resolve_resources
 from . import metadb
 
 
+class DecimalEncoder(json.JSONEncoder):
+    """
+    JSON encoder for metadata values, which DynamoDB returns as Decimal when they are numbers
+    """
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def encode_cursor(start_key):
+    """
+    Encode the key of the next page of a metadata listing as an opaque cursor
+
+    Args:
+        start_key (dict): Page key returned by the metadata backend, or None
+
+    Returns:
+        str: The cursor, or None if there are no more pages
+    """
+    if not start_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(start_key, sort_keys=True).encode()).decode()
+
+
+def load_cursor(cursor, fields):
+    """
+    Decode a metadata cursor
+
+    Args:
+        cursor (str): Cursor returned with the previous page
+        fields (iterable): Names of the string fields of the key
+
+    Returns:
+        dict: Key to start the next page from
+
+    Raises:
+        BossError: If the cursor is invalid
+    """
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if not all(isinstance(start_key[field], str) for field in fields):
+            raise ValueError
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise BossError("Invalid cursor {}".format(cursor), ErrorCodes.INVALID_URL)
+    return {field: start_key[field] for field in fields}
+
+
+def decode_cursor(cursor, lookup_key):
+    """
+    Decode a metadata listing cursor
+
+    Args:
+        cursor (str): Cursor returned with the previous page, or None
+        lookup_key (str): Lookup key of the object being listed
+
+    Returns:
+        dict: Key to start the next page from, or None for the first page
+
+    Raises:
+        BossError: If the cursor is invalid or belongs to another object
+    """
+    if not cursor:
+        return None
+    start_key = load_cursor(cursor, ('lookup_key', 'key'))
+    if start_key['lookup_key'] != lookup_key:
+        raise BossError("Invalid cursor {}".format(cursor), ErrorCodes.INVALID_URL)
+    return start_key
+
+
+def decode_search_cursor(cursor, key):
+    """
+    Decode a metadata search cursor
+
+    Args:
+        cursor (str): Cursor returned with the previous page, or None
+        key (str): Metadata key being searched
+
+    Returns:
+        dict: Key to start the next page from, or None for the first page
+
+    Raises:
+        BossError: If the cursor is invalid or belongs to another search
+    """
+    if not cursor:
+        return None
+    start_key = load_cursor(cursor, ('lookup_key', 'key', 'search_value'))
+    if start_key['key'] != key:
+        raise BossError("Invalid cursor {}".format(cursor), ErrorCodes.INVALID_URL)
+    return start_key
+
+
 class BossMeta(APIView):
     """
     View to handle read,write,update and delete metadata queries
@@ -37,29 +138,146 @@ class BossMeta(APIView):
         if not lookup_key or lookup_key == "":
             return BossHTTPError("Invalid request. Unable to parse the datamodel arguments", )
 
+        if request.query_params.get('hierarchy', '').lower() in ('true', '1'):
+            try:
+                return self.hierarchy_meta(request, req)
+            except BossError as err:
+                return err.to_http()
+
         if 'key' not in request.query_params:
             # List all keys that are valid for the query
-            mdb = metadb.MetaDB()
-            mdata = mdb.get_meta_list(lookup_key)
-            keys = []
-            if mdata:
-                for meta in mdata:
-                    keys.append(meta['key'])
-            data = {'keys': keys}
-            return Response(data)
+            try:
+                return self.list_meta(request, lookup_key)
+            except BossError as err:
+                return err.to_http()
 
         else:
 
             mkey = request.query_params['key']
-            mdb = metadb.MetaDB()
+            mdb = metadb.get_metadb()
             mdata = mdb.get_meta(lookup_key, mkey)
             if mdata:
-                data = {'key': mdata['key'], 'value': mdata['metavalue']}
+                data = {'key': mdata['key'], 'value': mdata['metavalue'], 'version': int(mdata.get('version', 0))}
                 return Response(data)
             else:
                 return BossHTTPError("Invalid request. Key {} Not found in the database".format(mkey),
                                      ErrorCodes.INVALID_POST_ARGUMENT)
 
+    @staticmethod
+    def hierarchy_meta(request, req):
+        """
+        Get the metadata of a resource together with the metadata of its parents
+
+        The lookup keys of every level are resolved together and the levels are read concurrently.
+
+        Query arguments:
+            inherit: 'true' to merge the levels into a single 'metadata' object, in which channel and layer values
+                override experiment values and experiment values override collection values. 'sources' then gives
+                the level each value comes from.
+            key: Only return this metadata key
+
+        Without inherit the response has the key/value metadata of each level under 'collection', 'experiment' and
+        'channel_layer'.
+
+        Args:
+            request: DRF Request object
+            req: BossRequest for the resource
+
+        Returns:
+            Response
+
+        Raises:
+            BossError: If the user is missing permissions on a level or a lookup key is missing
+        """
+        levels = req.get_boss_key_hierarchy()
+        for _, obj, _ in levels:
+            if not BossPermissionManager.check_resource_permissions(request.user, obj, 'GET'):
+                raise BossError("This user does not have the required permissions on {}".format(obj.name),
+                                ErrorCodes.MISSING_PERMISSION)
+
+        lookups = LookUpKey.get_lookup_keys([boss_key for _, _, boss_key in levels])
+        missing = [boss_key for _, _, boss_key in levels if boss_key not in lookups]
+        if missing:
+            raise BossError("Unable to find the lookup keys of {}".format(', '.join(missing)),
+                            ErrorCodes.UNABLE_TO_VALIDATE)
+
+        item_lists = metadb.get_metadb().get_meta_lists([lookups[boss_key].lookup_key for _, _, boss_key in levels])
+        mkey = request.query_params.get('key')
+        data = {}
+        for (level, _, _), items in zip(levels, item_lists):
+            data[level] = {item['key']: item['metavalue'] for item in items if mkey is None or item['key'] == mkey}
+
+        if request.query_params.get('inherit', '').lower() not in ('true', '1'):
+            return Response(data)
+
+        merged = {}
+        sources = {}
+        for level, _, _ in levels:
+            merged.update(data[level])
+            sources.update(dict.fromkeys(data[level], level))
+        return Response({'metadata': merged, 'sources': sources})
+
+    @staticmethod
+    def list_meta(request, lookup_key):
+        """
+        List the metadata of an object
+
+        Query arguments:
+            values: 'true' to include the values. Items are then returned as key/value objects in 'items'.
+            limit: Maximum number of keys to return, between 1 and META_LIST_MAX_LIMIT. The response then has a
+                'next_cursor' to pass as the 'cursor' query argument to get the next page, which is None on the last
+                page.
+
+        Without a limit every key is returned. A full listing with values is streamed as it is read from the database.
+
+        Args:
+            request: DRF Request object
+            lookup_key: Lookup key of the object
+
+        Returns:
+            Response or StreamingHttpResponse
+
+        Raises:
+            BossError: If the query arguments are invalid
+        """
+        with_values = request.query_params.get('values', '').lower() in ('true', '1')
+        limit = request.query_params.get('limit')
+        try:
+            if limit is not None:
+                limit = int(limit)
+                if not 0 < limit <= settings.META_LIST_MAX_LIMIT:
+                    raise ValueError
+        except ValueError:
+            raise BossError("Invalid limit. The limit must be between 1 and {}".format(settings.META_LIST_MAX_LIMIT),
+                            ErrorCodes.INVALID_URL)
+        start_key = decode_cursor(request.query_params.get('cursor'), lookup_key)
+
+        field = 'items' if with_values else 'keys'
+
+        def format_items(items):
+            if with_values:
+                return [{'key': item['key'], 'value': item['metavalue']} for item in items]
+            return [item['key'] for item in items]
+
+        mdb = metadb.get_metadb()
+        if limit is not None or start_key:
+            items, next_key = mdb.get_meta_page(lookup_key, limit=limit, start_key=start_key,
+                                                keys_only=not with_values)
+            return Response({field: format_items(items), 'next_cursor': encode_cursor(next_key)})
+
+        if not with_values:
+            return Response({'keys': list(mdb.get_meta_keys(lookup_key))})
+
+        def stream():
+            yield '{"items": ['
+            separator = ''
+            for page in mdb.iter_meta_pages(lookup_key):
+                for item in format_items(page):
+                    yield separator + json.dumps(item, cls=DecimalEncoder)
+                    separator = ', '
+            yield ']}'
+        return StreamingHttpResponse(stream(), content_type='application/json')
+
     def post(self, request, collection, experiment=None, channel_layer=None):
         """
         View to handle POST requests for metadata
@@ -90,12 +308,12 @@ class BossMeta(APIView):
         mkey = request.query_params['key']
         value = request.query_params['value']
 
-        # Post Metadata the dynamodb database
-        mdb = metadb.MetaDB()
-        if mdb.get_meta(lookup_key, mkey):
-            return BossHTTPError("Invalid request. The key {} already exists".format(mkey),
-                                 ErrorCodes.INVALID_POST_ARGUMENT)
-        mdb.write_meta(lookup_key, mkey, value)
+        # Post Metadata the metadata database
+        mdb = metadb.get_metadb()
+        try:
+            mdb.write_meta(lookup_key, mkey, value, overwrite=False)
+        except BossError as err:
+            return err.to_http()
         return HttpResponse(status=201)
 
     def delete(self, request, collection, experiment=None, channel_layer=None):
@@ -126,11 +344,9 @@ class BossMeta(APIView):
 
         mkey = request.query_params['key']
 
-        # Delete metadata from the dynamodb database
-        mdb = metadb.MetaDB()
-        response = mdb.delete_meta(lookup_key, mkey)
-
-        if 'Attributes' in response:
+        # Delete metadata from the metadata database
+        mdb = metadb.get_metadb()
+        if mdb.delete_meta(lookup_key, mkey):
             return HttpResponse(status=200)
         else:
             return BossHTTPError("[ERROR]- Key {} not found ".format(mkey), ErrorCodes.INVALID_POST_ARGUMENT)
@@ -138,6 +354,9 @@ class BossMeta(APIView):
     def put(self, request, collection, experiment=None, channel_layer=None):
         """
         View to handle update requests for metadata
+
+        An optional 'version' query argument makes the update conditional on the stored version, for
+        read-modify-write clients. A stale version returns a 409 error.
         Args:
             request: DRF Request object
             collection: Collection Name. Default = None
@@ -164,11 +383,242 @@ class BossMeta(APIView):
 
         mkey = request.query_params['key']
         value = request.query_params['value']
+        version = request.query_params.get('version')
+        if version is not None:
+            try:
+                version = int(version)
+            except ValueError:
+                return BossHTTPError("Invalid version {}".format(version), ErrorCodes.INVALID_POST_ARGUMENT)
+
+        # Post Metadata the metadata database
+        mdb = metadb.get_metadb()
+        try:
+            new_version = mdb.update_meta(lookup_key, mkey, value, version=version)
+        except BossError as err:
+            return err.to_http()
+        return Response({'key': mkey, 'version': new_version})
 
-        # Post Metadata the dynamodb database
-        mdb = metadb.MetaDB()
-        if not mdb.get_meta(lookup_key, mkey):
-            return BossHTTPError("Invalid request. The key {} does not exists".format(mkey),
-                                 ErrorCodes.INVALID_POST_ARGUMENT)
-        mdb.update_meta(lookup_key, mkey, value)
-        return HttpResponse(status=200)
+
+class BossMetaSearch(APIView):
+    """
+    View to find the collections, experiments, channels and layers with a metadata value
+
+    """
+
+    def get(self, request):
+        """
+        Search a metadata key for a value or a value prefix
+
+        Query arguments:
+            key: Metadata key
+            value: Value to match exactly
+            prefix: Value prefix to match, if value is not given
+            limit: Maximum number of index entries read for the page. Default and maximum = META_LIST_MAX_LIMIT
+            cursor: 'next_cursor' of the previous page
+
+        Only resources the user can read are returned, so a page may hold fewer items than the limit. The last page
+        has a next_cursor of None.
+
+        Args:
+            request: DRF Request object
+
+        Returns:
+            Response: 'items', each with the resource names, key and value, and 'next_cursor'
+        """
+        params = request.query_params
+        key = params.get('key')
+        value = params.get('value')
+        prefix = params.get('prefix')
+        if not key or (not value) == (not prefix):
+            return BossHTTPError("Invalid request. A search needs a key and either a value or a prefix",
+                                 ErrorCodes.INVALID_URL)
+
+        try:
+            limit = int(params.get('limit', settings.META_LIST_MAX_LIMIT))
+            if not 0 < limit <= settings.META_LIST_MAX_LIMIT:
+                raise ValueError
+        except ValueError:
+            return BossHTTPError("Invalid limit. The limit must be between 1 and {}"
+                                 .format(settings.META_LIST_MAX_LIMIT), ErrorCodes.INVALID_URL)
+
+        try:
+            start_key = decode_search_cursor(params.get('cursor'), key)
+        except BossError as err:
+            return err.to_http()
+
+        items, next_key = metadb.get_metadb().search_meta(key, value=value or None, prefix=prefix or None,
+                                                          limit=limit, start_key=start_key)
+
+        lookups = LookUpKey.get_boss_keys(list({item['lookup_key'] for item in items}))
+        readable = {}
+        results = []
+        for item in items:
+            lookup_obj = lookups.get(item['lookup_key'])
+            if lookup_obj is None:
+                continue
+            names = (lookup_obj.collection_name, lookup_obj.experiment_name, lookup_obj.channel_layer_name)
+            if names not in readable:
+                try:
+                    resources = resolve_resources(*names)
+                    obj = [resource for resource in resources if resource is not None][-1]
+                    readable[names] = BossPermissionManager.check_resource_permissions(request.user, obj, 'GET')
+                except BossError:
+                    # The resource is being deleted
+                    readable[names] = False
+            if readable[names]:
+                results.append(BossMetaBatch.item_data(names, item['key'], item['metavalue']))
+
+        return Response({'items': results, 'next_cursor': encode_cursor(next_key)})
+
+
+class BossMetaBatch(APIView):
+    """
+    View to write and delete many metadata keys in one request
+
+    The request data has an 'items' list. Each item names its resource with 'collection', 'experiment' and
+    'channel_layer' and has a metadata 'key', plus a 'value' when writing. Resource names given at the top level of the
+    request data are used for items that do not name their own resource.
+
+    """
+    RESOURCE_FIELDS = ('collection', 'experiment', 'channel_layer')
+
+    @staticmethod
+    def get_items(request, method, with_values=False):
+        """
+        Parse the items of a batch request, check permissions and resolve the lookup keys
+
+        Args:
+            request: DRF Request object
+            method: Method used to check the resource permissions
+            with_values: True if every item must have a value
+
+        Returns:
+            list[tuple]: (lookup_key, key, value, resource names) for every item
+
+        Raises:
+            BossError: If the request is invalid or the user is missing permissions on a resource
+        """
+        data = request.data
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise BossError("Invalid request. Expected a list of items", ErrorCodes.INVALID_POST_ARGUMENT)
+        if len(items) > settings.META_BATCH_MAX_ITEMS:
+            raise BossError("Invalid request. At most {} items can be processed in a request"
+                            .format(settings.META_BATCH_MAX_ITEMS), ErrorCodes.REQUEST_TOO_LARGE)
+
+        parsed = []
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('key'), str) or \
+                    (with_values and not isinstance(item.get('value'), str)):
+                raise BossError("Invalid request. Every item needs a key{}"
+                                .format(" and a value" if with_values else ""), ErrorCodes.INVALID_POST_ARGUMENT)
+            names = tuple(item.get(field, data.get(field)) or None for field in BossMetaBatch.RESOURCE_FIELDS)
+            if names[0] is None:
+                raise BossError("Invalid request. Every item needs a collection", ErrorCodes.INVALID_POST_ARGUMENT)
+            if names[2] is not None and names[1] is None:
+                raise BossError("Invalid request. An item with a channel or layer needs an experiment",
+                                ErrorCodes.INVALID_POST_ARGUMENT)
+            parsed.append((names, item['key'], item.get('value')))
+
+        # Check permissions once per resource
+        for names in {names for names, _, _ in parsed}:
+            resources = resolve_resources(*names)
+            obj = [resource for resource in resources if resource is not None][-1]
+            if not BossPermissionManager.check_resource_permissions(request.user, obj, method):
+                raise BossError("This user does not have the required permissions on {}".format(obj.name),
+                                ErrorCodes.MISSING_PERMISSION)
+
+        boss_keys = {names: '&'.join(name for name in names if name) for names, _, _ in parsed}
+        lookups = LookUpKey.get_lookup_keys(list(set(boss_keys.values())))
+        missing = set(boss_keys.values()) - set(lookups)
+        if missing:
+            raise BossError("Unable to find the lookup keys of {}".format(', '.join(sorted(missing))),
+                            ErrorCodes.UNABLE_TO_VALIDATE)
+        return [(lookups[boss_keys[names]].lookup_key, key, value, names) for names, key, value in parsed]
+
+    @staticmethod
+    def item_data(names, key, value=None):
+        """
+        Format an item of a batch response
+
+        Args:
+            names: Collection, experiment and channel or layer names
+            key: Metadata key
+            value: Metadata value
+
+        Returns:
+            dict: The item
+        """
+        data = {field: name for field, name in zip(BossMetaBatch.RESOURCE_FIELDS, names) if name}
+        data['key'] = key
+        if value is not None:
+            data['value'] = value
+        return data
+
+    def post(self, request):
+        """
+        Create or replace the values of many metadata keys
+
+        Args:
+            request: DRF Request object
+
+        Returns:
+            Number of keys written
+        """
+        try:
+            items = self.get_items(request, 'POST', with_values=True)
+            count = metadb.get_metadb().batch_write_meta([(lookup_key, key, value)
+                                                      for lookup_key, key, value, _ in items])
+        except BossError as err:
+            return err.to_http()
+        return Response({'count': count}, status=201)
+
+    def delete(self, request):
+        """
+        Delete many metadata keys
+
+        Args:
+            request: DRF Request object
+
+        Returns:
+            Number of keys deleted
+        """
+        try:
+            items = self.get_items(request, 'DELETE')
+            count = metadb.get_metadb().batch_delete_meta([(lookup_key, key) for lookup_key, key, _, _ in items])
+        except BossError as err:
+            return err.to_http()
+        return Response({'count': count})
+
+
+class BossMetaBatchGet(BossMetaBatch):
+    """
+    View to read many metadata keys in one request. POST is used because the keys are sent in the request body.
+
+    """
+    http_method_names = ['post', 'options']
+
+    def post(self, request):
+        """
+        Get the values of many metadata keys
+
+        Args:
+            request: DRF Request object
+
+        Returns:
+            Found items in 'items' and the items that do not exist in 'missing'
+        """
+        try:
+            items = self.get_items(request, 'GET')
+            values = metadb.get_metadb().batch_get_meta([(lookup_key, key) for lookup_key, key, _, _ in items])
+        except BossError as err:
+            return err.to_http()
+
+        found = []
+        missing = []
+        for lookup_key, key, _, names in items:
+            if (lookup_key, key) in values:
+                found.append(self.item_data(names, key, values[(lookup_key, key)]))
+            else:
+                missing.append(self.item_data(names, key))
+        return Response({'items': found, 'missing': missing})
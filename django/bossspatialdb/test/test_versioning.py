@@ -0,0 +1,140 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory
+from django.utils.http import http_date
+
+from .. import versioning
+
+
+class FakePipeline(object):
+    """Minimal redis pipeline that records commands and replays canned results"""
+
+    def __init__(self, results):
+        self.results = results
+        self.commands = []
+
+    def hmget(self, key, fields):
+        self.commands.append((key, fields))
+
+    def scard(self, key):
+        self.commands.append((key,))
+
+    def hincrby(self, key, field, amount):
+        self.commands.append((key, field, amount))
+
+    def hset(self, key, field, value):
+        self.commands.append((key, field, value))
+
+    def hmset(self, key, mapping):
+        self.commands.append((key, mapping))
+
+    def execute(self):
+        return self.results
+
+
+class CuboidVersioningTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_get_cuboid_indices(self):
+        """Test every intersecting cuboid is returned and partial cuboids are included"""
+        with patch.object(versioning, 'CUBOIDSIZE', [[512, 512, 16]]):
+            indices = versioning.get_cuboid_indices((500, 0, 15), (20, 512, 2), 0)
+        self.assertEqual(indices, ['0&0&0', '1&0&0', '0&0&1', '1&0&1'])
+
+    def get_validators(self, results, path='/v0.6/tile/col1/exp1/ch1/xy/512/0/0/0/0', generation=(None, None),
+                       ingest_jobs=0):
+        results = [list(generation), ingest_jobs] + results
+        request = self.factory.get(path)
+        with patch.object(versioning, 'CUBOIDSIZE', [[512, 512, 16]]), \
+                patch.object(versioning, 'get_client') as client:
+            client.return_value.pipeline.return_value = FakePipeline(results)
+            return versioning.get_validators(request, [('1&1&1', 0, range(0, 1), (0, 0, 0), (512, 512, 1))])
+
+    def test_etag_changes_with_version(self):
+        """Test the ETag changes when a covering cuboid is written"""
+        etag, last_modified = self.get_validators([[None], [None]])
+        self.assertIsNone(last_modified)
+
+        new_etag, last_modified = self.get_validators([[b'1'], [b'1000']])
+        self.assertNotEqual(etag, new_etag)
+        self.assertEqual(last_modified, 1000)
+
+        self.assertEqual(new_etag, self.get_validators([[b'1'], [b'1000']])[0])
+
+    def test_etag_changes_with_generation(self):
+        """Test the ETag changes when the resolution is invalidated as a whole"""
+        etag, _ = self.get_validators([[b'1'], [b'1000']])
+        new_etag, last_modified = self.get_validators([[b'1'], [b'1000']], generation=(b'1', b'2000'))
+        self.assertNotEqual(etag, new_etag)
+        self.assertEqual(last_modified, 2000)
+
+    def test_no_validators_while_ingesting(self):
+        """Test no validators are returned while an ingest job writes unversioned cuboids"""
+        self.assertEqual(self.get_validators([[b'1'], [b'1000']], ingest_jobs=1), (None, None))
+
+    def test_bump_versions_coarser_resolutions(self):
+        """Test a write bumps the generation of the coarser resolutions only"""
+        pipe = FakePipeline([])
+        with patch.object(versioning, 'CUBOIDSIZE', [[512, 512, 16]] * 4), \
+                patch.object(versioning, 'get_client') as client:
+            client.return_value.pipeline.return_value = pipe
+            versioning.bump_versions('1&1&1', 1, range(0, 1), (0, 0, 0), (512, 512, 16), 4)
+
+        self.assertIn(('CUBOID-VERSION&1&1&1&1&0', '0&0&0', 1), pipe.commands)
+        bumped = [command[1] for command in pipe.commands if command[0] == 'CHANNEL-GENERATION&1&1&1' and
+                  len(command) == 3 and command[2] == 1]
+        self.assertEqual(bumped, ['2', '3'])
+
+    def test_etag_changes_with_path(self):
+        """Test the ETag depends on the request, so different encodings of the same data differ"""
+        etag, _ = self.get_validators([[b'1'], [b'1000']])
+        jpg_etag, _ = self.get_validators([[b'1'], [b'1000']], '/v0.6/tile/col1/exp1/ch1/xy/512/0/0/0/0?format=jpg')
+        self.assertNotEqual(etag, jpg_etag)
+
+    def test_not_modified_if_none_match(self):
+        """Test a matching If-None-Match returns a 304 with the validators"""
+        request = self.factory.get('/', HTTP_IF_NONE_MATCH='"abc", "def"')
+        response = versioning.not_modified(request, '"def"', 1000)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"def"')
+        self.assertEqual(response['Last-Modified'], http_date(1000))
+        self.assertEqual(response['Vary'], 'Accept')
+
+        request = self.factory.get('/', HTTP_IF_NONE_MATCH='"abc"')
+        self.assertIsNone(versioning.not_modified(request, '"def"', 1000))
+
+    def test_not_modified_if_modified_since(self):
+        """Test If-Modified-Since is used when there is no If-None-Match"""
+        request = self.factory.get('/', HTTP_IF_MODIFIED_SINCE=http_date(1000))
+        self.assertEqual(versioning.not_modified(request, '"def"', 1000).status_code, 304)
+        self.assertIsNone(versioning.not_modified(request, '"def"', 1001))
+
+    def test_not_modified_without_state_store(self):
+        """Test requests are served normally if the validators could not be computed"""
+        request = self.factory.get('/', HTTP_IF_NONE_MATCH='*')
+        self.assertIsNone(versioning.not_modified(request, None, None))
+
+    def test_set_validators_vary(self):
+        """Test responses vary on Accept, as the body and the ETag depend on the negotiated media type"""
+        response = versioning.set_validators(HttpResponse(), '"def"', 1000)
+        self.assertEqual(response['Vary'], 'Accept')
+        self.assertEqual(response['ETag'], '"def"')
+
+        response = versioning.set_validators(HttpResponse(), None, None)
+        self.assertEqual(response['Vary'], 'Accept')
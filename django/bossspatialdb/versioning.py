@@ -0,0 +1,274 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import time
+
+import redis
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from bossutils.logger import BossLogger
+from spdb.c_lib.ndtype import CUBOIDSIZE
+
+# Prefixes of the state store hashes holding the version and write time of every cuboid, keyed by
+# lookup key, resolution and time sample. Hash fields are the "x&y&z" cuboid indices.
+VERSION_PREFIX = 'CUBOID-VERSION'
+MODIFIED_PREFIX = 'CUBOID-MODIFIED'
+
+# Prefix of the state store hash holding the generation of every resolution of a channel or layer, keyed by lookup
+# key. Field "<resolution>" is the generation and "<resolution>&modified" the time it last changed. A generation is
+# bumped when cuboids of that resolution change without their versions being bumped, e.g. when they are downsampled
+# from a write at a finer resolution or written by an ingest job.
+GENERATION_PREFIX = 'CHANNEL-GENERATION'
+
+# Prefix of the state store sets holding the ids of the ingest jobs writing to a channel or layer, keyed by lookup
+# key. Cuboids written by an ingest job are not versioned, so no validators are returned while one is running.
+INGEST_PREFIX = 'CHANNEL-INGEST-JOBS'
+
+_client = None
+
+
+def get_client():
+    """
+    Get the shared client for the state store
+
+    Returns:
+        (redis.StrictRedis): Client connected to the cache state database
+    """
+    global _client
+    if _client is None:
+        _client = redis.StrictRedis(host=settings.STATEIO_CONFIG['cache_state_host'],
+                                    db=settings.STATEIO_CONFIG['cache_state_db'])
+    return _client
+
+
+def get_cuboid_indices(corner, extent, resolution):
+    """
+    Get the indices of all cuboids that intersect a region
+
+    Args:
+        corner (tuple[int]): x, y, z corner of the region
+        extent (tuple[int]): x, y, z extent of the region
+        resolution (int): Resolution level of the region
+
+    Returns:
+        (list[str]): "x&y&z" cuboid indices in x fastest order
+    """
+    cube_dim = CUBOIDSIZE[resolution]
+    ranges = [range(corner[dim] // cube_dim[dim], (corner[dim] + extent[dim] - 1) // cube_dim[dim] + 1)
+              for dim in range(3)]
+    return ['{}&{}&{}'.format(x, y, z) for z in ranges[2] for y in ranges[1] for x in ranges[0]]
+
+
+def _hash_key(prefix, lookup_key, resolution, time_sample):
+    return '{}&{}&{}&{}'.format(prefix, lookup_key, resolution, time_sample)
+
+
+def _channel_key(prefix, lookup_key):
+    return '{}&{}'.format(prefix, lookup_key)
+
+
+def _bump_generations(pipe, lookup_key, resolutions, now):
+    generation_key = _channel_key(GENERATION_PREFIX, lookup_key)
+    for resolution in resolutions:
+        pipe.hincrby(generation_key, str(resolution), 1)
+        pipe.hset(generation_key, '{}&modified'.format(resolution), now)
+
+
+def _execute(pipe, action):
+    try:
+        pipe.execute()
+    except redis.RedisError as err:
+        BossLogger().logger.error("Unable to {}: {}".format(action, err))
+
+
+def bump_versions(lookup_key, resolution, time_range, corner, extent, num_resolutions):
+    """
+    Increment the version of every cuboid written by a request, and the generation of the coarser resolutions
+    downsampled from it
+
+    Errors are logged rather than raised, as the data has already been written.
+
+    Args:
+        lookup_key (str): Base lookup key of the channel or layer
+        resolution (int): Resolution level written
+        time_range (range): Time samples written
+        corner (tuple[int]): x, y, z corner of the region written
+        extent (tuple[int]): x, y, z extent of the region written
+        num_resolutions (int): Number of resolution levels of the experiment
+
+    Returns:
+        None
+    """
+    indices = get_cuboid_indices(corner, extent, resolution)
+    now = int(time.time())
+
+    pipe = get_client().pipeline(transaction=False)
+    for time_sample in time_range:
+        version_key = _hash_key(VERSION_PREFIX, lookup_key, resolution, time_sample)
+        modified_key = _hash_key(MODIFIED_PREFIX, lookup_key, resolution, time_sample)
+        for idx in indices:
+            pipe.hincrby(version_key, idx, 1)
+        pipe.hmset(modified_key, dict.fromkeys(indices, now))
+    _bump_generations(pipe, lookup_key, range(resolution + 1, num_resolutions), now)
+    _execute(pipe, "bump cuboid versions")
+
+
+def start_ingest(lookup_key, job_id):
+    """
+    Stop returning validators for a channel or layer while an ingest job writes to it
+
+    Args:
+        lookup_key (str): Base lookup key of the channel or layer
+        job_id (int): Id of the ingest job
+
+    Returns:
+        None
+    """
+    pipe = get_client().pipeline(transaction=False)
+    pipe.sadd(_channel_key(INGEST_PREFIX, lookup_key), job_id)
+    _execute(pipe, "record ingest job")
+
+
+def end_ingest(lookup_key, job_id, num_resolutions):
+    """
+    Resume returning validators for a channel or layer once an ingest job is done, invalidating those returned
+    before it started
+
+    Args:
+        lookup_key (str): Base lookup key of the channel or layer
+        job_id (int): Id of the ingest job
+        num_resolutions (int): Number of resolution levels of the experiment
+
+    Returns:
+        None
+    """
+    pipe = get_client().pipeline(transaction=False)
+    pipe.srem(_channel_key(INGEST_PREFIX, lookup_key), job_id)
+    _bump_generations(pipe, lookup_key, range(num_resolutions), int(time.time()))
+    _execute(pipe, "record ingest job end")
+
+
+def get_validators(request, regions):
+    """
+    Compute the ETag and Last-Modified time of a response built from one or more regions
+
+    The ETag is a hash of the versions of every covering cuboid and the generation of every resolution read, together
+    with the full request path and the accepted media type, so it changes whenever the data or the encoding of the
+    response changes. Cuboids that have never been written through the API have version 0.
+
+    Args:
+        request (rest_framework.request.Request): Request being served
+        regions (list[tuple]): (lookup_key, resolution, time_range, corner, extent) of every region in the response
+
+    Returns:
+        (str, int): Quoted strong ETag and the latest write time as a unix timestamp, or None if no cuboid has a
+        recorded write time. Returns (None, None) if the state store is unavailable or an ingest job is writing to
+        one of the channels or layers.
+    """
+    pipe = get_client().pipeline(transaction=False)
+    for lookup_key, resolution, time_range, corner, extent in regions:
+        pipe.hmget(_channel_key(GENERATION_PREFIX, lookup_key), [str(resolution), '{}&modified'.format(resolution)])
+        pipe.scard(_channel_key(INGEST_PREFIX, lookup_key))
+    for lookup_key, resolution, time_range, corner, extent in regions:
+        indices = get_cuboid_indices(corner, extent, resolution)
+        for time_sample in time_range:
+            pipe.hmget(_hash_key(VERSION_PREFIX, lookup_key, resolution, time_sample), indices)
+            pipe.hmget(_hash_key(MODIFIED_PREFIX, lookup_key, resolution, time_sample), indices)
+
+    try:
+        results = pipe.execute()
+    except redis.RedisError as err:
+        BossLogger().logger.error("Unable to read cuboid versions: {}".format(err))
+        return None, None
+
+    generations = results[0:2 * len(regions):2]
+    if any(results[1:2 * len(regions):2]):
+        return None, None
+    results = results[2 * len(regions):]
+
+    digest = hashlib.sha1()
+    digest.update(request.get_full_path().encode())
+    digest.update(request.META.get('HTTP_ACCEPT', '').encode())
+    for lookup_key, resolution, time_range, corner, extent in regions:
+        digest.update('|{}|{}|{}|{}|{}'.format(lookup_key, resolution, list(time_range), corner, extent).encode())
+
+    last_modified = None
+    for generation, modified in generations:
+        digest.update(b'|' + (generation or b'0'))
+        if modified is not None:
+            last_modified = max(last_modified or 0, int(modified))
+    for versions, modified in zip(results[0::2], results[1::2]):
+        digest.update(b'|' + b','.join(version or b'0' for version in versions))
+        for timestamp in modified:
+            if timestamp is not None:
+                last_modified = max(last_modified or 0, int(timestamp))
+
+    return quote_etag(digest.hexdigest()), last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Check the conditional headers of a request against the validators of the response
+
+    If-None-Match takes precedence over If-Modified-Since.
+
+    Args:
+        request (rest_framework.request.Request): Request being served
+        etag (str): Quoted ETag of the response
+        last_modified (int): Last write time of the response as a unix timestamp
+
+    Returns:
+        (django.http.HttpResponse): A 304 response if the client copy is current, otherwise None
+    """
+    if etag is None:
+        return None
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison, as required for If-None-Match
+        client_etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(if_none_match)]
+        current = etag.strip('"')
+        if '*' not in client_etags and current not in [tag.strip('"') for tag in client_etags]:
+            return None
+    else:
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since is None or last_modified is None or last_modified > if_modified_since:
+            return None
+
+    return set_validators(HttpResponse(status=304), etag, last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Add the ETag and Last-Modified headers to a response
+
+    The response also varies on Accept, as both the body and the ETag depend on the negotiated media type.
+
+    Args:
+        response: Django or DRF response
+        etag (str): Quoted ETag of the response, or None to leave the response unchanged
+        last_modified (int): Last write time of the response as a unix timestamp, or None
+
+    Returns:
+        The response
+    """
+    patch_vary_headers(response, ['Accept'])
+    if etag is not None:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
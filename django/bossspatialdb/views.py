@@ -20,6 +20,7 @@ from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 
 from .parsers import BloscParser, BloscPythonParser
 from .renderers import BloscRenderer, BloscPythonRenderer
+from . import versioning
 
 from django.http import HttpResponse
 from django.conf import settings
@@ -86,20 +87,27 @@ class Cutout(APIView):
             return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Get the params to pull data out of the cache
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+
+        # Return early if the client already has the current version of the data
+        etag, last_modified = versioning.get_validators(
+            request, [(req.get_lookup_key(), req.get_resolution(), req.get_time(), corner, extent)])
+        response = versioning.not_modified(request, etag, last_modified)
+        if response:
+            return response
+
         # Get interface to SPDB cache
         cache = SpatialDB(settings.KVIO_SETTINGS,
                           settings.STATEIO_CONFIG,
                           settings.OBJECTIO_CONFIG)
 
-        # Get the params to pull data out of the cache
-        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
-        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
-
         # Get a Cube instance with all time samples
         data = cache.cutout(resource, corner, extent, req.get_resolution(), [req.get_time().start, req.get_time().stop])
 
         # Send data to renderer
-        return Response(data)
+        return versioning.set_validators(Response(data), etag, last_modified)
 
     def post(self, request, collection, experiment, dataset, resolution, x_range, y_range, z_range):
         """
@@ -162,13 +170,21 @@ class Cutout(APIView):
         try:
             if len(request.data.shape) == 4:
                 cache.write_cuboid(resource, corner, req.get_resolution(), request.data, req.get_time()[0])
+                num_time_samples = request.data.shape[0]
             else:
                 cache.write_cuboid(resource, corner, req.get_resolution(),
                                    np.expand_dims(request.data, axis=0), req.get_time()[0])
+                num_time_samples = 1
         except Exception as e:
             # TODO: Eventually remove as this level of detail should not be sent to the user
             return BossHTTPError('Error during write_cuboid: {}'.format(e), ErrorCodes.BOSS_SYSTEM_ERROR)
 
+        # Invalidate the ETags of every tile and cutout that overlaps the written region or is downsampled from it
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+        versioning.bump_versions(req.get_lookup_key(), req.get_resolution(),
+                                 range(req.get_time()[0], req.get_time()[0] + num_time_samples), corner, extent,
+                                 req.experiment.num_hierarchy_levels)
+
         # Send data to renderer
         return HttpResponse(status=201)
 
@@ -0,0 +1,179 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+
+from bosscore.error import BossError, ErrorCodes
+
+# Colors used, in order, for channels that do not specify one
+DEFAULT_COLORS = ('FF0000', '00FF00', '0000FF', 'FFFF00', 'FF00FF', '00FFFF', 'FFFFFF')
+
+# Opacity used when drawing annotation layers over the blended channels
+DEFAULT_LAYER_OPACITY = 0.5
+
+# Maximum value of each supported datatype, used as the default display window
+DATATYPE_MAX = {
+    'uint8': 2 ** 8 - 1,
+    'uint16': 2 ** 16 - 1,
+    'uint32': 2 ** 32 - 1,
+    'uint64': 2 ** 64 - 1,
+}
+
+
+def parse_color(color):
+    """
+    Parse a hex color string into an RGB triple
+
+    Args:
+        color (str): Color as a 6 digit hex string (eg. FF0000). A leading '#' is allowed.
+
+    Returns:
+        (np.ndarray): float32 array of length 3 with values in [0, 255]
+
+    Raises:
+        BossError: If the color cannot be parsed
+    """
+    color = color.lstrip('#')
+    try:
+        if len(color) != 6:
+            raise ValueError
+        return np.array([int(color[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32)
+    except ValueError:
+        raise BossError("Invalid color {}. Colors must be 6 digit hex strings".format(color),
+                        ErrorCodes.INVALID_URL)
+
+
+def parse_window(window, datatype):
+    """
+    Parse a display window
+
+    Args:
+        window (str): Window as "min:max". An empty string selects the full range of the datatype.
+        datatype (str): Datatype of the channel the window applies to
+
+    Returns:
+        (float, float): The lower and upper bounds of the window
+
+    Raises:
+        BossError: If the window cannot be parsed or is empty
+    """
+    if not window:
+        return 0.0, float(DATATYPE_MAX[datatype])
+
+    try:
+        lower, upper = [float(x) for x in window.split(':')]
+    except ValueError:
+        raise BossError("Invalid window {}. Windows must be of the form min:max".format(window),
+                        ErrorCodes.INVALID_URL)
+
+    if lower >= upper:
+        raise BossError("Invalid window {}. The lower bound must be less than the upper bound".format(window),
+                        ErrorCodes.INVALID_URL)
+    return lower, upper
+
+
+def parse_channel_specs(channel_layers, colors=None, windows=None):
+    """
+    Build the per channel rendering parameters for a composite request
+
+    Colors and windows are comma separated lists given in the same order as the channels in the request. Missing or
+    empty entries fall back to the default color for that position and the full range of the datatype.
+
+    Args:
+        channel_layers (list[bosscore.models.ChannelLayer]): Validated channels and layers, in request order
+        colors (str): Comma separated list of hex colors
+        windows (str): Comma separated list of min:max display windows
+
+    Returns:
+        (list[dict]): One dict per channel or layer with the keys 'color', 'window' and 'is_label'
+
+    Raises:
+        BossError: If more colors or windows are provided than channels, or an entry is invalid
+    """
+    colors = colors.split(',') if colors else []
+    windows = windows.split(',') if windows else []
+
+    if len(colors) > len(channel_layers) or len(windows) > len(channel_layers):
+        raise BossError("More colors or windows were provided than channels in the composite request",
+                        ErrorCodes.INVALID_URL)
+
+    specs = []
+    for idx, channel_layer in enumerate(channel_layers):
+        color = colors[idx] if idx < len(colors) and colors[idx] else DEFAULT_COLORS[idx % len(DEFAULT_COLORS)]
+        window = windows[idx] if idx < len(windows) else None
+        specs.append({'color': parse_color(color),
+                      'window': parse_window(window, channel_layer.datatype),
+                      'is_label': not channel_layer.is_channel})
+    return specs
+
+
+def get_plane(data, orientation):
+    """
+    Extract the 2D image plane from cutout data
+
+    Args:
+        data (np.ndarray): Cutout data with dimensions (t, z, y, x). Only the first time sample is used.
+        orientation (str): Image plane requested. Valid options are xy, xz or yz
+
+    Returns:
+        (np.ndarray): 2D array of the plane. xy planes are indexed (y, x), xz planes (z, x) and yz planes (z, y)
+    """
+    if orientation == 'xy':
+        return data[0, 0, :, :]
+    elif orientation == 'xz':
+        return data[0, :, 0, :]
+    elif orientation == 'yz':
+        return data[0, :, :, 0]
+    else:
+        raise BossError("Invalid orientation: {}".format(orientation), ErrorCodes.INVALID_CUTOUT_ARGS)
+
+
+def blend_planes(planes, specs, layer_opacity=DEFAULT_LAYER_OPACITY):
+    """
+    Blend a set of image planes into a single RGB image
+
+    Channels are windowed, scaled to [0, 1], tinted with their color and summed. Annotation layers are then drawn
+    over the result as a solid color wherever the label is non-zero.
+
+    Args:
+        planes (list[np.ndarray]): 2D planes of identical shape, in the same order as specs
+        specs (list[dict]): Rendering parameters from parse_channel_specs()
+        layer_opacity (float): Opacity used when drawing annotation layers
+
+    Returns:
+        (np.ndarray): uint8 array with dimensions (rows, cols, 3)
+    """
+    out = np.zeros(planes[0].shape + (3,), dtype=np.float32)
+
+    # Channels are additive
+    for plane, spec in zip(planes, specs):
+        if spec['is_label']:
+            continue
+        lower, upper = spec['window']
+        weight = plane.astype(np.float32)
+        weight -= lower
+        weight *= 1.0 / (upper - lower)
+        np.clip(weight, 0, 1, out=weight)
+        out += weight[:, :, np.newaxis] * spec['color']
+
+    np.clip(out, 0, 255, out=out)
+
+    # Layers are drawn over the channels
+    for plane, spec in zip(planes, specs):
+        if not spec['is_label']:
+            continue
+        alpha = (plane != 0).astype(np.float32)[:, :, np.newaxis] * layer_opacity
+        out *= 1 - alpha
+        out += alpha * spec['color']
+
+    return np.rint(out).astype(np.uint8)
@@ -0,0 +1,161 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+
+from bosscore.error import BossError, ErrorCodes
+
+# Constants for the splitmix64 finalizer
+MIX_SHIFT_1 = np.uint64(30)
+MIX_SHIFT_2 = np.uint64(27)
+MIX_SHIFT_3 = np.uint64(31)
+MIX_MULT_1 = np.uint64(0xbf58476d1ce4e5b9)
+MIX_MULT_2 = np.uint64(0x94d049bb133111eb)
+
+# Keep colors away from black so labels stay visible on dark channels
+MIN_COLOR_VALUE = 64
+
+
+def hash_label_colors(ids):
+    """
+    Map label IDs to stable RGB colors
+
+    Uses the splitmix64 finalizer so neighboring IDs get unrelated colors and the same ID always gets the same color,
+    independent of the tile it is rendered in.
+
+    Args:
+        ids (np.ndarray): Array of label IDs
+
+    Returns:
+        (np.ndarray): uint8 array with the shape of ids plus a trailing dimension of 3
+    """
+    h = np.asarray(ids, dtype=np.uint64).copy()
+    with np.errstate(over='ignore'):
+        h ^= h >> MIX_SHIFT_1
+        h *= MIX_MULT_1
+        h ^= h >> MIX_SHIFT_2
+        h *= MIX_MULT_2
+        h ^= h >> MIX_SHIFT_3
+
+    rgb = np.empty(h.shape + (3,), dtype=np.uint8)
+    for channel in range(3):
+        value = (h >> np.uint64(8 * channel)) & np.uint64(0xFF)
+        rgb[..., channel] = MIN_COLOR_VALUE + value * (255 - MIN_COLOR_VALUE) // 255
+    return rgb
+
+
+def find_outlines(plane):
+    """
+    Find the pixels on the boundary of each label
+
+    A pixel is on a boundary if any of its 4-connected neighbors has a different label.
+
+    Args:
+        plane (np.ndarray): 2D label array
+
+    Returns:
+        (np.ndarray): Boolean array with the shape of plane
+    """
+    edges = np.zeros(plane.shape, dtype=bool)
+
+    diff = plane[:, 1:] != plane[:, :-1]
+    edges[:, 1:] |= diff
+    edges[:, :-1] |= diff
+
+    diff = plane[1:, :] != plane[:-1, :]
+    edges[1:, :] |= diff
+    edges[:-1, :] |= diff
+
+    return edges
+
+
+def parse_label_options(query_params):
+    """
+    Parse the label rendering arguments from a request
+
+    Supported arguments are:
+        outline: "true" to only draw the boundary of each label
+        alpha: Default opacity of labels between 0 and 1
+        opacity: Comma separated list of id:opacity pairs overriding the default for specific labels
+
+    Args:
+        query_params (dict): Request query parameters
+
+    Returns:
+        (dict): Keyword arguments for render_labels()
+
+    Raises:
+        BossError: If an argument is invalid
+    """
+    options = {'outline': query_params.get('outline', 'false').lower() == 'true',
+               'alpha': 1.0,
+               'opacity': {}}
+
+    try:
+        if 'alpha' in query_params:
+            options['alpha'] = float(query_params['alpha'])
+        if query_params.get('opacity'):
+            for item in query_params['opacity'].split(','):
+                label_id, opacity = item.split(':')
+                options['opacity'][int(label_id)] = float(opacity)
+    except ValueError:
+        raise BossError("Invalid label opacity arguments. Use alpha=<0-1> and opacity=<id>:<0-1>,...",
+                        ErrorCodes.INVALID_URL)
+
+    for label_id in options['opacity']:
+        if not 0 <= label_id < 2 ** 64:
+            raise BossError("Label ids must be between 0 and 2^64 - 1", ErrorCodes.INVALID_URL)
+
+    for opacity in [options['alpha']] + list(options['opacity'].values()):
+        if not 0 <= opacity <= 1:
+            raise BossError("Label opacity must be between 0 and 1", ErrorCodes.INVALID_URL)
+
+    return options
+
+
+def render_labels(plane, outline=False, alpha=1.0, opacity=None):
+    """
+    Render a 2D label plane as an RGBA image
+
+    Label 0 is background and is always transparent. Colors and opacities are computed once per unique label and
+    then expanded to the full plane with a single lookup.
+
+    Args:
+        plane (np.ndarray): 2D label array
+        outline (bool): Only draw the boundary of each label
+        alpha (float): Default opacity of labels
+        opacity (dict): Opacity for specific label IDs, overriding alpha
+
+    Returns:
+        (np.ndarray): uint8 array with dimensions (rows, cols, 4)
+    """
+    ids, inverse = np.unique(plane, return_inverse=True)
+
+    lut = np.empty((len(ids), 4), dtype=np.uint8)
+    lut[:, :3] = hash_label_colors(ids)
+
+    lut_alpha = np.full(len(ids), alpha, dtype=np.float32)
+    if opacity:
+        override_ids = np.fromiter(opacity.keys(), dtype=np.uint64, count=len(opacity))
+        override_values = np.fromiter(opacity.values(), dtype=np.float32, count=len(opacity))
+        idx = np.searchsorted(ids, override_ids)
+        found = idx < len(ids)
+        found[found] = ids[idx[found]] == override_ids[found]
+        lut_alpha[idx[found]] = override_values[found]
+    lut_alpha[ids == 0] = 0
+    lut[:, 3] = np.rint(lut_alpha * 255)
+
+    rgba = lut[inverse.reshape(plane.shape)]
+    if outline:
+        rgba[~find_outlines(plane), 3] = 0
+    return rgba
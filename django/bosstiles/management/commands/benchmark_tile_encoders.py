@@ -0,0 +1,74 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from bosstiles.renderers import PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer
+
+RENDERERS = (PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer)
+
+
+def make_test_image(tile_size, mode):
+    """
+    Create a synthetic tile that compresses roughly like microscopy data (smooth structure plus noise)
+
+    Args:
+        tile_size (int): Width and height of the tile
+        mode (str): 'L' for a grayscale tile or 'RGB' for a composite tile
+
+    Returns:
+        (PIL.Image.Image): The tile
+    """
+    rng = np.random.RandomState(0)
+    y, x = np.mgrid[0:tile_size, 0:tile_size]
+    structure = 96 + 64 * np.sin(x / 17.0) * np.cos(y / 23.0)
+    bands = 3 if mode == 'RGB' else 1
+    data = structure[:, :, np.newaxis] + rng.normal(0, 12, (tile_size, tile_size, bands))
+    data = np.clip(data, 0, 255).astype(np.uint8)
+    if bands == 1:
+        return Image.fromarray(data[:, :, 0], 'L')
+    return Image.fromarray(data, 'RGB')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark encode time and size of every tile encoder profile for a range of tile sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tile-sizes', type=int, nargs='+', default=[256, 512, 1024],
+                            help='Tile sizes to benchmark')
+        parser.add_argument('--repeats', type=int, default=10, help='Number of encodes per measurement')
+        parser.add_argument('--mode', choices=('L', 'RGB'), default='L',
+                            help='Benchmark grayscale (L) or composite (RGB) tiles')
+
+    def handle(self, *args, **options):
+        self.stdout.write('{:>6} {:>10} {:>6} {:>12} {:>12}'.format('size', 'profile', 'format', 'ms/tile', 'bytes'))
+
+        for tile_size in options['tile_sizes']:
+            img = make_test_image(tile_size, options['mode'])
+
+            for profile_name, profile in sorted(settings.TILE_ENCODER_PROFILES.items()):
+                for renderer_class in RENDERERS:
+                    renderer = renderer_class()
+
+                    start = time.perf_counter()
+                    for _ in range(options['repeats']):
+                        encoded = renderer.encode(img, dict(profile.get(renderer.format, {})))
+                    elapsed = (time.perf_counter() - start) / options['repeats']
+
+                    self.stdout.write('{:>6} {:>10} {:>6} {:>12.2f} {:>12}'.format(
+                        tile_size, profile_name, renderer.format, elapsed * 1000, len(encoded)))
@@ -0,0 +1,115 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+
+import numpy as np
+
+from bosscore.error import BossError, ErrorCodes
+
+# Axis of the (z, y, x) volume that mosaic rows are stacked along, for each orientation
+ROW_AXIS = {'xy': 1, 'xz': 0, 'yz': 0}
+
+# Permutation of the (z, y, x) volume into (frame, row, col) for each orientation
+FRAME_ORDER = {'xy': (0, 1, 2), 'xz': (1, 0, 2), 'yz': (2, 0, 1)}
+
+
+def get_row_bands(corner, extent, orientation, tile_size):
+    """
+    Split the bounding box of a mosaic into bands that each cover one row of tiles
+
+    Each band spans all columns and frames of the mosaic, so every cuboid is only read by a single band.
+
+    Args:
+        corner (tuple[int]): x, y, z corner of the mosaic
+        extent (tuple[int]): x, y, z extent of the mosaic
+        orientation (str): Image plane requested. Valid options are xy, xz or yz
+        tile_size (int): Size of each tile in pixels
+
+    Returns:
+        (list[(tuple[int], tuple[int])]): Corner and extent of each band, in row order
+    """
+    # Index into the x, y, z corner of the dimension rows are stacked along
+    dim = 2 - ROW_AXIS[orientation]
+
+    bands = []
+    for start in range(corner[dim], corner[dim] + extent[dim], tile_size):
+        band_corner = list(corner)
+        band_extent = list(extent)
+        band_corner[dim] = start
+        band_extent[dim] = min(tile_size, corner[dim] + extent[dim] - start)
+        bands.append((tuple(band_corner), tuple(band_extent)))
+    return bands
+
+
+def get_frames(volume, orientation):
+    """
+    Reorder a volume into the sequence of 2D frames of a mosaic
+
+    Args:
+        volume (np.ndarray): Data with dimensions (z, y, x)
+        orientation (str): Image plane requested. Valid options are xy, xz or yz
+
+    Returns:
+        (np.ndarray): Data with dimensions (frame, row, col)
+    """
+    return volume.transpose(FRAME_ORDER[orientation])
+
+
+def parse_columns(columns, num_frames):
+    """
+    Parse the number of columns used to lay out the frames of a mosaic
+
+    Args:
+        columns (str): Number of columns from the request. None for a roughly square layout.
+        num_frames (int): Number of frames in the mosaic
+
+    Returns:
+        (int): Number of columns
+
+    Raises:
+        BossError: If the number of columns is invalid
+    """
+    if not columns:
+        return int(math.ceil(math.sqrt(num_frames)))
+
+    try:
+        columns = int(columns)
+    except ValueError:
+        raise BossError("Invalid number of columns {}".format(columns), ErrorCodes.INVALID_URL)
+    if columns < 1:
+        raise BossError("The number of columns must be at least 1", ErrorCodes.INVALID_URL)
+    return min(columns, num_frames)
+
+
+def tile_frames(frames, columns):
+    """
+    Lay out a sequence of frames on a grid, left to right and top to bottom
+
+    Unused cells in the last row are left at zero.
+
+    Args:
+        frames (np.ndarray): Data with dimensions (frame, row, col) or (frame, row, col, band)
+        columns (int): Number of frames per row
+
+    Returns:
+        (np.ndarray): Data with dimensions (row, col) or (row, col, band)
+    """
+    num_frames, height, width = frames.shape[:3]
+    rows = int(math.ceil(num_frames / columns))
+
+    padded = np.zeros((rows * columns,) + frames.shape[1:], dtype=frames.dtype)
+    padded[:num_frames] = frames
+
+    grid = padded.reshape((rows, columns) + frames.shape[1:]).swapaxes(1, 2)
+    return grid.reshape((rows * height, columns * width) + frames.shape[3:])
@@ -12,35 +12,147 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import io
+import zlib
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
 from rest_framework import renderers
 
+# zlib strategies that can be selected for PNG encoding in TILE_ENCODER_PROFILES
+PNG_STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'huffman': zlib.Z_HUFFMAN_ONLY,
+    'rle': getattr(zlib, 'Z_RLE', 3),
+    'fixed': getattr(zlib, 'Z_FIXED', 4),
+}
 
-class PNGRenderer(renderers.BaseRenderer):
-    """ A DRF renderer for rendering an XY image as a png
+
+def get_encoder_options(renderer_format, renderer_context=None):
+    """
+    Get the encoder options for a format from the encoder profile selected in the request
+
+    The profile is chosen with the 'profile' query argument and falls back to 'default' if it is missing or unknown.
+
+    Args:
+        renderer_format (str): Format of the renderer (eg. png)
+        renderer_context (dict): DRF renderer context
+
+    Returns:
+        (dict): Encoder options for the format
+    """
+    profile = None
+    if renderer_context and 'request' in renderer_context:
+        profile = renderer_context['request'].query_params.get('profile')
+
+    profiles = settings.TILE_ENCODER_PROFILES
+    if profile not in profiles:
+        profile = 'default'
+    return dict(profiles[profile].get(renderer_format, {}))
+
+
+class ImageRenderer(renderers.BaseRenderer):
+    """ Base class for DRF renderers that encode a PIL image with tunable encoder options
     """
-    media_type = 'image/png'
-    format = 'png'
     charset = None
     render_style = 'binary'
 
     def render(self, data, media_type=None, renderer_context=None):
+        return self.encode(data, get_encoder_options(self.format, renderer_context), renderer_context)
+
+    def encode(self, img, options, renderer_context=None):
+        """
+        Encode an image
+
+        Args:
+            img (PIL.Image.Image): Image to encode
+            options (dict): Encoder options from the encoder profile
+            renderer_context (dict): DRF renderer context
+
+        Returns:
+            (bytes): Encoded image
+        """
+        raise NotImplementedError
+
+
+class PNGRenderer(ImageRenderer):
+    """ A DRF renderer for rendering an XY image as a png
+    """
+    media_type = 'image/png'
+    format = 'png'
+
+    def encode(self, img, options, renderer_context=None):
+        if 'strategy' in options:
+            options['compress_type'] = PNG_STRATEGIES[options.pop('strategy')]
         file_obj = io.BytesIO()
-        data.save(file_obj, "PNG")
-        file_obj.seek(0)
-        return file_obj.read()
+        img.save(file_obj, "PNG", **options)
+        return file_obj.getvalue()
 
 
-class JPEGRenderer(renderers.BaseRenderer):
+class JPEGRenderer(ImageRenderer):
     """ A DRF renderer for rendering an XY image as a jpeg
     """
     media_type = 'image/jpeg'
     format = 'jpg'
-    charset = None
-    render_style = 'binary'
 
-    def render(self, data, media_type=None, renderer_context=None):
+    def encode(self, img, options, renderer_context=None):
         file_obj = io.BytesIO()
-        data.save(file_obj, "JPEG")
-        file_obj.seek(0)
-        return file_obj.read()
+        if img.mode == 'RGBA':
+            # JPEG has no alpha channel
+            img = img.convert('RGB')
+        img.save(file_obj, "JPEG", **options)
+        return file_obj.getvalue()
+
+
+class WebPRenderer(ImageRenderer):
+    """ A DRF renderer for rendering an XY image as a lossy or lossless webp
+    """
+    media_type = 'image/webp'
+    format = 'webp'
+
+    def encode(self, img, options, renderer_context=None):
+        file_obj = io.BytesIO()
+        if img.mode not in ('RGB', 'RGBA'):
+            # The webp encoder only supports 8-bit color images
+            img = to_8bit(img).convert('RGB')
+        img.save(file_obj, "WEBP", **options)
+        return file_obj.getvalue()
+
+
+class RawRenderer(ImageRenderer):
+    """ A DRF renderer for returning an image as uncompressed 8-bit pixels in row major order
+
+    The image dimensions and number of bands are returned in the X-Image-Width, X-Image-Height and X-Image-Bands
+    headers. Intended for clients on a fast network where encoding time dominates.
+    """
+    media_type = 'application/octet-stream'
+    format = 'raw'
+
+    def encode(self, img, options, renderer_context=None):
+        img = to_8bit(img)
+        if renderer_context and renderer_context.get('response') is not None:
+            response = renderer_context['response']
+            response['X-Image-Width'] = img.size[0]
+            response['X-Image-Height'] = img.size[1]
+            response['X-Image-Bands'] = len(img.getbands())
+        return img.tobytes()
+
+
+def to_8bit(img):
+    """
+    Convert a grayscale image with more than 8 bits per pixel to 8 bits by keeping the most significant bits
+
+    Args:
+        img (PIL.Image.Image): Image to convert
+
+    Returns:
+        (PIL.Image.Image): 8-bit image. Images that already are 8-bit are returned unchanged.
+    """
+    if img.mode in ('L', 'RGB', 'RGBA'):
+        return img
 
+    data = np.asarray(img)
+    data = data.astype(np.dtype('u{}'.format(data.dtype.itemsize)), copy=False)
+    shift = 8 * data.dtype.itemsize - 8
+    return Image.fromarray((data >> shift).astype(np.uint8), 'L')
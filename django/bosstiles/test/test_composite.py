@@ -0,0 +1,108 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+from collections import namedtuple
+
+import numpy as np
+
+from bosstiles import composite
+from bosscore.error import BossError
+
+MockChannelLayer = namedtuple('MockChannelLayer', ['datatype', 'is_channel'])
+
+
+class TestComposite(unittest.TestCase):
+
+    def test_parse_color(self):
+        """Test hex colors are converted to RGB"""
+        np.testing.assert_equal(composite.parse_color('FF8000'), [255, 128, 0])
+        np.testing.assert_equal(composite.parse_color('#00ff00'), [0, 255, 0])
+
+        with self.assertRaises(BossError):
+            composite.parse_color('FF80')
+        with self.assertRaises(BossError):
+            composite.parse_color('GGGGGG')
+
+    def test_parse_window(self):
+        """Test windows default to the datatype range"""
+        self.assertEqual(composite.parse_window('', 'uint8'), (0, 255))
+        self.assertEqual(composite.parse_window(None, 'uint16'), (0, 65535))
+        self.assertEqual(composite.parse_window('10:20', 'uint16'), (10, 20))
+
+        with self.assertRaises(BossError):
+            composite.parse_window('20:10', 'uint8')
+        with self.assertRaises(BossError):
+            composite.parse_window('20', 'uint8')
+
+    def test_parse_channel_specs_defaults(self):
+        """Test missing colors and windows get defaults"""
+        channels = [MockChannelLayer('uint8', True), MockChannelLayer('uint16', True),
+                    MockChannelLayer('uint64', False)]
+        specs = composite.parse_channel_specs(channels, 'FFFFFF', ',0:100')
+
+        self.assertEqual(len(specs), 3)
+        np.testing.assert_equal(specs[0]['color'], [255, 255, 255])
+        np.testing.assert_equal(specs[1]['color'], composite.parse_color(composite.DEFAULT_COLORS[1]))
+        self.assertEqual(specs[0]['window'], (0, 255))
+        self.assertEqual(specs[1]['window'], (0, 100))
+        self.assertFalse(specs[1]['is_label'])
+        self.assertTrue(specs[2]['is_label'])
+
+    def test_parse_channel_specs_too_many(self):
+        """Test more colors than channels is an error"""
+        with self.assertRaises(BossError):
+            composite.parse_channel_specs([MockChannelLayer('uint8', True)], 'FF0000,00FF00')
+
+    def test_get_plane(self):
+        """Test planes are extracted in the same layout as the image service"""
+        data = np.random.randint(0, 255, (1, 4, 5, 6)).astype(np.uint8)
+        np.testing.assert_equal(composite.get_plane(data[:, 2:3, :, :], 'xy'), data[0, 2, :, :])
+        np.testing.assert_equal(composite.get_plane(data[:, :, 1:2, :], 'xz'), data[0, :, 1, :])
+        np.testing.assert_equal(composite.get_plane(data[:, :, :, 3:4], 'yz'), data[0, :, :, 3])
+
+    def test_blend_two_channels(self):
+        """Test channels are windowed, tinted and summed"""
+        red = np.array([[0, 255], [128, 255]], dtype=np.uint8)
+        green = np.array([[0, 0], [50, 100]], dtype=np.uint16)
+        specs = [{'color': composite.parse_color('FF0000'), 'window': (0, 255), 'is_label': False},
+                 {'color': composite.parse_color('00FF00'), 'window': (0, 100), 'is_label': False}]
+
+        rgb = composite.blend_planes([red, green], specs)
+
+        self.assertEqual(rgb.dtype, np.uint8)
+        self.assertEqual(rgb.shape, (2, 2, 3))
+        np.testing.assert_equal(rgb[:, :, 0], red)
+        np.testing.assert_equal(rgb[:, :, 1], [[0, 0], [128, 255]])
+        np.testing.assert_equal(rgb[:, :, 2], 0)
+
+    def test_blend_saturates(self):
+        """Test overlapping channels saturate instead of wrapping"""
+        plane = np.full((2, 2), 255, dtype=np.uint8)
+        specs = [{'color': composite.parse_color('FFFFFF'), 'window': (0, 255), 'is_label': False},
+                 {'color': composite.parse_color('FFFFFF'), 'window': (0, 255), 'is_label': False}]
+
+        rgb = composite.blend_planes([plane, plane], specs)
+        np.testing.assert_equal(rgb, 255)
+
+    def test_blend_layer(self):
+        """Test layers are drawn over channels only where labeled"""
+        channel = np.zeros((2, 2), dtype=np.uint8)
+        layer = np.array([[0, 7], [0, 0]], dtype=np.uint64)
+        specs = [{'color': composite.parse_color('FF0000'), 'window': (0, 255), 'is_label': False},
+                 {'color': composite.parse_color('0000FF'), 'window': (0, 1), 'is_label': True}]
+
+        rgb = composite.blend_planes([channel, layer], specs, layer_opacity=1.0)
+        np.testing.assert_equal(rgb[0, 1], [0, 0, 255])
+        np.testing.assert_equal(rgb[0, 0], [0, 0, 0])
+        np.testing.assert_equal(rgb[1, 1], [0, 0, 0])
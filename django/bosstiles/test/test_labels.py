@@ -0,0 +1,87 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+import numpy as np
+
+from bosstiles import labels
+from bosscore.error import BossError
+
+
+class TestLabels(unittest.TestCase):
+
+    def test_hash_label_colors_stable(self):
+        """Test the same ID always maps to the same color"""
+        ids = np.array([1, 2, 3, 2 ** 63 + 5], dtype=np.uint64)
+        colors = labels.hash_label_colors(ids)
+
+        self.assertEqual(colors.shape, (4, 3))
+        self.assertEqual(colors.dtype, np.uint8)
+        np.testing.assert_equal(colors, labels.hash_label_colors(ids.copy()))
+        np.testing.assert_equal(colors[1], labels.hash_label_colors(np.array([2], dtype=np.uint64))[0])
+
+    def test_hash_label_colors_distinct(self):
+        """Test neighboring IDs get different colors"""
+        colors = labels.hash_label_colors(np.arange(1, 1001, dtype=np.uint64))
+        unique_colors = np.unique(colors.view([('', np.uint8)] * 3))
+        self.assertGreater(len(unique_colors), 990)
+        self.assertTrue((colors >= labels.MIN_COLOR_VALUE).all())
+
+    def test_render_labels(self):
+        """Test background is transparent and labels are opaque"""
+        plane = np.array([[0, 5], [5, 9]], dtype=np.uint64)
+        rgba = labels.render_labels(plane)
+
+        self.assertEqual(rgba.shape, (2, 2, 4))
+        np.testing.assert_equal(rgba[:, :, 3], [[0, 255], [255, 255]])
+        np.testing.assert_equal(rgba[0, 1], rgba[1, 0])
+        np.testing.assert_equal(rgba[0, 1, :3], labels.hash_label_colors(np.array([5], dtype=np.uint64))[0])
+
+    def test_render_labels_opacity(self):
+        """Test default and per ID opacity"""
+        plane = np.array([[0, 5], [5, 9]], dtype=np.uint64)
+        rgba = labels.render_labels(plane, alpha=0.5, opacity={9: 1.0, 12: 0.0})
+
+        np.testing.assert_equal(rgba[:, :, 3], [[0, 128], [128, 255]])
+
+    def test_render_labels_outline(self):
+        """Test only label boundaries are drawn in outline mode"""
+        plane = np.zeros((5, 5), dtype=np.uint64)
+        plane[1:4, 1:4] = 7
+        rgba = labels.render_labels(plane, outline=True)
+
+        expected = np.zeros((5, 5), dtype=np.uint8)
+        expected[1:4, 1:4] = 255
+        expected[2, 2] = 0
+        np.testing.assert_equal(rgba[:, :, 3], expected)
+
+    def test_parse_label_options(self):
+        """Test label arguments are parsed from the query string"""
+        options = labels.parse_label_options({'outline': 'True', 'alpha': '0.25', 'opacity': '3:1,4:0'})
+        self.assertEqual(options, {'outline': True, 'alpha': 0.25, 'opacity': {3: 1.0, 4: 0.0}})
+
+        options = labels.parse_label_options({})
+        self.assertEqual(options, {'outline': False, 'alpha': 1.0, 'opacity': {}})
+
+        with self.assertRaises(BossError):
+            labels.parse_label_options({'alpha': '2'})
+        with self.assertRaises(BossError):
+            labels.parse_label_options({'opacity': '3'})
+        with self.assertRaises(BossError):
+            labels.parse_label_options({'opacity': '-1:0.5'})
+        with self.assertRaises(BossError):
+            labels.parse_label_options({'opacity': '{}:0.5'.format(2 ** 64)})
+
+        options = labels.parse_label_options({'opacity': '{}:0.5'.format(2 ** 64 - 1)})
+        self.assertEqual(options['opacity'], {2 ** 64 - 1: 0.5})
@@ -0,0 +1,85 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+import numpy as np
+
+from bosstiles import mosaic
+from bosscore.error import BossError
+from bosscore.request import parse_index_range
+
+
+class TestMosaic(unittest.TestCase):
+
+    def test_parse_index_range(self):
+        """Test single indices and ranges are parsed"""
+        self.assertEqual(parse_index_range('3'), (3, 4))
+        self.assertEqual(parse_index_range('0:4'), (0, 4))
+
+    def test_get_row_bands_xy(self):
+        """Test xy mosaics are split into one band per row of tiles"""
+        bands = mosaic.get_row_bands((0, 256, 5), (512, 768, 3), 'xy', 256)
+        self.assertEqual(bands, [((0, 256, 5), (512, 256, 3)),
+                                 ((0, 512, 5), (512, 256, 3)),
+                                 ((0, 768, 5), (512, 256, 3))])
+
+    def test_get_row_bands_xz(self):
+        """Test xz mosaics are split along z"""
+        bands = mosaic.get_row_bands((0, 7, 0), (64, 1, 96), 'xz', 64)
+        self.assertEqual(bands, [((0, 7, 0), (64, 1, 64)),
+                                 ((0, 7, 64), (64, 1, 32))])
+
+    def test_get_frames(self):
+        """Test volumes are reordered into (frame, row, col) for each orientation"""
+        volume = np.arange(2 * 3 * 4).reshape(2, 3, 4)
+        self.assertEqual(mosaic.get_frames(volume, 'xy').shape, (2, 3, 4))
+        self.assertEqual(mosaic.get_frames(volume, 'xz').shape, (3, 2, 4))
+        self.assertEqual(mosaic.get_frames(volume, 'yz').shape, (4, 2, 3))
+        np.testing.assert_equal(mosaic.get_frames(volume, 'yz')[1], volume[:, :, 1])
+
+    def test_parse_columns(self):
+        """Test the default layout is roughly square"""
+        self.assertEqual(mosaic.parse_columns(None, 16), 4)
+        self.assertEqual(mosaic.parse_columns(None, 5), 3)
+        self.assertEqual(mosaic.parse_columns('8', 3), 3)
+
+        with self.assertRaises(BossError):
+            mosaic.parse_columns('0', 3)
+        with self.assertRaises(BossError):
+            mosaic.parse_columns('two', 3)
+
+    def test_tile_frames(self):
+        """Test frames are laid out left to right and top to bottom, with unused cells left empty"""
+        frames = np.stack([np.full((2, 3), idx + 1, dtype=np.uint8) for idx in range(3)])
+        grid = mosaic.tile_frames(frames, 2)
+
+        self.assertEqual(grid.shape, (4, 6))
+        self.assertTrue((grid[:2, :3] == 1).all())
+        self.assertTrue((grid[:2, 3:] == 2).all())
+        self.assertTrue((grid[2:, :3] == 3).all())
+        self.assertTrue((grid[2:, 3:] == 0).all())
+
+    def test_tile_frames_rgba(self):
+        """Test frames with color bands keep their bands"""
+        frames = np.zeros((4, 2, 2, 4), dtype=np.uint8)
+        frames[3, :, :, 0] = 255
+        grid = mosaic.tile_frames(frames, 2)
+
+        self.assertEqual(grid.shape, (4, 4, 4))
+        self.assertTrue((grid[2:, 2:, 0] == 255).all())
+        self.assertTrue((grid[:2, :, 0] == 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
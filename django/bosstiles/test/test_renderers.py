@@ -0,0 +1,79 @@
+# Copyright 2016 The Johns Hopkins University Applied Physics Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from bosstiles.renderers import PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer, get_encoder_options
+
+TEST_PROFILES = {
+    'default': {'png': {'compress_level': 6}, 'jpg': {'quality': 90}},
+    'fast': {'png': {'compress_level': 1, 'strategy': 'rle'}},
+}
+
+
+class MockRequest(object):
+    def __init__(self, query_params):
+        self.query_params = query_params
+
+
+@override_settings(TILE_ENCODER_PROFILES=TEST_PROFILES)
+class TestImageRenderers(SimpleTestCase):
+
+    def setUp(self):
+        self.data = np.random.randint(0, 255, (64, 32)).astype(np.uint8)
+        self.img = Image.fromarray(self.data, 'L')
+
+    def test_get_encoder_options(self):
+        """Test the profile is selected from the request and falls back to default"""
+        self.assertEqual(get_encoder_options('png'), {'compress_level': 6})
+        self.assertEqual(get_encoder_options('png', {'request': MockRequest({'profile': 'fast'})}),
+                         {'compress_level': 1, 'strategy': 'rle'})
+        self.assertEqual(get_encoder_options('png', {'request': MockRequest({'profile': 'unknown'})}),
+                         {'compress_level': 6})
+        self.assertEqual(get_encoder_options('jpg', {'request': MockRequest({'profile': 'fast'})}), {})
+
+    def test_png_profiles_lossless(self):
+        """Test all png profiles decode to the original image"""
+        for profile in TEST_PROFILES:
+            context = {'request': MockRequest({'profile': profile})}
+            encoded = PNGRenderer().render(self.img, renderer_context=context)
+            np.testing.assert_equal(np.asarray(Image.open(io.BytesIO(encoded))), self.data)
+
+    def test_jpeg_rgba(self):
+        """Test RGBA images can be encoded as jpeg"""
+        img = Image.fromarray(np.zeros((8, 8, 4), dtype=np.uint8), 'RGBA')
+        encoded = JPEGRenderer().render(img)
+        self.assertEqual(Image.open(io.BytesIO(encoded)).mode, 'RGB')
+
+    def test_webp_lossless(self):
+        """Test lossless webp decodes to the original image"""
+        encoded = WebPRenderer().encode(self.img, {'lossless': True})
+        decoded = np.asarray(Image.open(io.BytesIO(encoded)).convert('L'))
+        np.testing.assert_equal(decoded, self.data)
+
+    def test_raw(self):
+        """Test raw output is the uncompressed pixels with the shape in the headers"""
+        response = {}
+        encoded = RawRenderer().render(self.img, renderer_context={'response': response})
+        self.assertEqual(encoded, self.data.tobytes())
+        self.assertEqual(response, {'X-Image-Width': 32, 'X-Image-Height': 64, 'X-Image-Bands': 1})
+
+    def test_raw_16bit(self):
+        """Test 16-bit images are reduced to their most significant byte"""
+        data = np.array([[0, 256, 65535]], dtype=np.uint16)
+        encoded = RawRenderer().encode(Image.fromarray(data, 'I;16'), {})
+        self.assertEqual(encoded, bytes([0, 1, 255]))
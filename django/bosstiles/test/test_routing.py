@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from django.core.urlresolvers import resolve
-from bosstiles.views import Tile, CutoutTile
+from bosstiles.views import Tile, CutoutTile, CompositeTile, MosaicTile
 
 from rest_framework.test import APITestCase
 
@@ -91,3 +91,25 @@ class TileInterfaceRoutingTests(APITestCase):
         self.assertEqual(view_tiles.func.__name__, Tile.as_view().__name__)
         view_tiles = resolve('/' + version + '/tile/col1/exp1/ds1/yz/512/2/0/1/1/3/')
         self.assertEqual(view_tiles.func.__name__, Tile.as_view().__name__)
+
+    def test_composite_tile_resolves(self):
+        """
+        Test to make sure the composite tile URL resolves
+        :return:
+        """
+        view_tiles = resolve('/' + version + '/composite/col1/exp1/xy/512/2/0/1/1')
+        self.assertEqual(view_tiles.func.__name__, CompositeTile.as_view().__name__)
+
+        view_tiles = resolve('/' + version + '/composite/col1/exp1/xz/512/2/0/1/1/3/')
+        self.assertEqual(view_tiles.func.__name__, CompositeTile.as_view().__name__)
+
+    def test_mosaic_tile_resolves(self):
+        """
+        Test to make sure the mosaic tile URL resolves
+        :return:
+        """
+        view_tiles = resolve('/' + version + '/mosaic/col1/exp1/ds1/xy/256/0/0:4/0:4/1')
+        self.assertEqual(view_tiles.func.__name__, MosaicTile.as_view().__name__)
+
+        view_tiles = resolve('/' + version + '/mosaic/col1/exp1/ds1/xy/256/0/2/3/0:16/3/')
+        self.assertEqual(view_tiles.func.__name__, MosaicTile.as_view().__name__)
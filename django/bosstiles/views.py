@@ -11,16 +11,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.conf import settings
+from PIL import Image
 
 from bosscore.request import BossRequest
 from bosscore.error import BossError, BossHTTPError, ErrorCodes
 
 import spdb
+from bossspatialdb import versioning
 
-from .renderers import PNGRenderer, JPEGRenderer
+from .renderers import PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer
+from . import composite, labels, mosaic
 
 
 class CutoutTile(APIView):
@@ -29,7 +36,7 @@ class CutoutTile(APIView):
 
     * Requires authentication.
     """
-    renderer_classes = (PNGRenderer, JPEGRenderer)
+    renderer_classes = (PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer)
 
     def __init__(self):
         super().__init__()
@@ -67,27 +74,45 @@ class CutoutTile(APIView):
         except ValueError:
             return BossHTTPError("Datatype does not match channel/layer", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
+        # Annotation labels are rendered as colored overlays instead of grayscale images
+        label_options = None
+        if resource.get_data_type() == 'uint64':
+            try:
+                label_options = labels.parse_label_options(request.query_params)
+            except BossError as err:
+                return err.to_http()
+
         # Make sure cutout request is under 1GB UNCOMPRESSED
         total_bytes = req.get_x_span() * req.get_y_span() * req.get_z_span() * len(req.get_time()) * (self.bit_depth/8)
         if total_bytes > settings.CUTOUT_MAX_SIZE:
             return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Get the params to pull data out of the cache
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+
+        # Return early if the client already has the current version of the tile
+        etag, last_modified = versioning.get_validators(
+            request, [(req.get_lookup_key(), req.get_resolution(), req.get_time(), corner, extent)])
+        response = versioning.not_modified(request, etag, last_modified)
+        if response:
+            return response
+
         # Get interface to SPDB cache
         cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
                                          settings.STATEIO_CONFIG,
                                          settings.OBJECTIO_CONFIG)
 
-        # Get the params to pull data out of the cache
-        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
-        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
-
         # Do a cutout as specified
         data = cache.cutout(resource, corner, extent, req.get_resolution(),
                             [req.get_time().start, req.get_time().stop])
 
         # Covert the cutout back to an image and return it
-        if orientation == 'xy':
+        if label_options is not None and orientation in ('xy', 'yz', 'xz'):
+            img = Image.fromarray(labels.render_labels(composite.get_plane(data.data, orientation), **label_options),
+                                  'RGBA')
+        elif orientation == 'xy':
             img = data.xy_image()
         elif orientation == 'yz':
             img = data.yz_image()
@@ -97,7 +122,7 @@ class CutoutTile(APIView):
             return BossHTTPError("Invalid orientation: {}".format(orientation),
                                  ErrorCodes.INVALID_CUTOUT_ARGS)
 
-        return Response(img)
+        return versioning.set_validators(Response(img), etag, last_modified)
 
 
 class Tile(APIView):
@@ -106,7 +131,7 @@ class Tile(APIView):
 
     * Requires authentication.
     """
-    renderer_classes = (PNGRenderer, JPEGRenderer)
+    renderer_classes = (PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer)
 
     def __init__(self):
         super().__init__()
@@ -145,27 +170,45 @@ class Tile(APIView):
         except ValueError:
             return BossHTTPError("Datatype does not match channel/layer", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
 
+        # Annotation labels are rendered as colored overlays instead of grayscale images
+        label_options = None
+        if resource.get_data_type() == 'uint64':
+            try:
+                label_options = labels.parse_label_options(request.query_params)
+            except BossError as err:
+                return err.to_http()
+
         # Make sure cutout request is under 1GB UNCOMPRESSED
         total_bytes = req.get_x_span() * req.get_y_span() * req.get_z_span() * len(req.get_time()) * (self.bit_depth/8)
         if total_bytes > settings.CUTOUT_MAX_SIZE:
             return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
                                  ErrorCodes.REQUEST_TOO_LARGE)
 
+        # Get the params to pull data out of the cache
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+
+        # Return early if the client already has the current version of the tile
+        etag, last_modified = versioning.get_validators(
+            request, [(req.get_lookup_key(), req.get_resolution(), req.get_time(), corner, extent)])
+        response = versioning.not_modified(request, etag, last_modified)
+        if response:
+            return response
+
         # Get interface to SPDB cache
         cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
                                          settings.STATEIO_CONFIG,
                                          settings.OBJECTIO_CONFIG)
 
-        # Get the params to pull data out of the cache
-        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
-        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
-
         # Do a cutout as specified
         data = cache.cutout(resource, corner, extent, req.get_resolution(),
                             [req.get_time().start, req.get_time().stop])
 
         # Covert the cutout back to an image and return it
-        if orientation == 'xy':
+        if label_options is not None and orientation in ('xy', 'yz', 'xz'):
+            img = Image.fromarray(labels.render_labels(composite.get_plane(data.data, orientation), **label_options),
+                                  'RGBA')
+        elif orientation == 'xy':
             img = data.xy_image()
         elif orientation == 'yz':
             img = data.yz_image()
@@ -175,4 +218,190 @@ class Tile(APIView):
             return BossHTTPError("Invalid orientation: {}".format(orientation),
                                  ErrorCodes.INVALID_CUTOUT_ARGS)
 
-        return Response(img)
+        return versioning.set_validators(Response(img), etag, last_modified)
+
+
+class CompositeTile(APIView):
+    """
+    View to blend several channels (and linked annotation layers) of an experiment into a single RGB tile
+
+    * Requires authentication.
+    """
+    renderer_classes = (PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer)
+
+    def get(self, request, collection, experiment, orientation, tile_size, resolution, x_idx, y_idx, z_idx,
+            t_idx=None):
+        """
+        View to handle GET requests for a composite tile
+
+        The channels to blend are passed as a comma separated list in the 'channels' query argument. Optional
+        'colors' (hex, eg. FF0000) and 'windows' (min:max) arguments are comma separated lists in the same order.
+
+        :param request: DRF Request object
+        :type request: rest_framework.request.Request
+        :param collection: Unique Collection identifier, indicating which collection you want to access
+        :param experiment: Experiment identifier, indicating which experiment you want to access
+        :param orientation: Image plane requested. Vaid options include xy,xz or yz
+        :param tile_size: Size of the tile in pixels
+        :param resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+        :param x_idx: the tile index in the X dimension
+        :param y_idx: the tile index in the Y dimension
+        :param z_idx: the tile index in the Z dimension
+        :param t_idx: the tile index in the T dimension
+        :return:
+        """
+        # Process request and validate
+        try:
+            req = BossRequest(request)
+            specs = composite.parse_channel_specs(req.channel_layers, request.query_params.get('colors'),
+                                                  request.query_params.get('windows'))
+        except BossError as err:
+            return err.to_http()
+
+        # Convert each channel to a resource
+        resources = [spdb.project.BossResourceDjango(req.for_channel_layer(channel_layer))
+                     for channel_layer in req.channel_layers]
+
+        # Make sure cutout request is under 1GB UNCOMPRESSED
+        try:
+            bit_depth = sum(resource.get_bit_depth() for resource in resources)
+        except ValueError:
+            return BossHTTPError("Datatype does not match channel/layer", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
+        total_bytes = req.get_x_span() * req.get_y_span() * req.get_z_span() * len(req.get_time()) * (bit_depth/8)
+        if total_bytes > settings.CUTOUT_MAX_SIZE:
+            return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
+                                 ErrorCodes.REQUEST_TOO_LARGE)
+
+        # Get the params to pull data out of the cache
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+        time_range = [req.get_time().start, req.get_time().stop]
+
+        # Return early if the client already has the current version of every channel in the tile
+        etag, last_modified = versioning.get_validators(
+            request, [(req.for_channel_layer(channel_layer).get_lookup_key(), req.get_resolution(), req.get_time(),
+                       corner, extent) for channel_layer in req.channel_layers])
+        response = versioning.not_modified(request, etag, last_modified)
+        if response:
+            return response
+
+        def cutout(resource):
+            # Each worker gets its own interface to the SPDB cache
+            cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
+                                             settings.STATEIO_CONFIG,
+                                             settings.OBJECTIO_CONFIG)
+            data = cache.cutout(resource, corner, extent, req.get_resolution(), time_range)
+            return composite.get_plane(data.data, orientation)
+
+        # Fetch all channels concurrently, then blend and encode once
+        with ThreadPoolExecutor(max_workers=min(len(resources), settings.TILE_FETCH_MAX_WORKERS)) as executor:
+            planes = list(executor.map(cutout, resources))
+
+        img = Image.fromarray(composite.blend_planes(planes, specs), 'RGB')
+        return versioning.set_validators(Response(img), etag, last_modified)
+
+
+class MosaicTile(APIView):
+    """
+    View to return a grid of tiles, or a sequence of planes, from a channel or layer as a single image
+
+    * Requires authentication.
+    """
+    renderer_classes = (PNGRenderer, JPEGRenderer, WebPRenderer, RawRenderer)
+
+    def get(self, request, collection, experiment, dataset, orientation, tile_size, resolution, x_args, y_args,
+            z_args, t_idx=None):
+        """
+        View to handle GET requests for a mosaic of tiles
+
+        The in-plane tile indices and the plane index can each be a single index or a range (eg. 0:4). When a range
+        of planes is requested each plane is a frame of the mosaic, laid out in 'columns' frames per row (default is
+        a roughly square layout).
+
+        :param request: DRF Request object
+        :type request: rest_framework.request.Request
+        :param collection: Unique Collection identifier, indicating which collection you want to access
+        :param experiment: Experiment identifier, indicating which experiment you want to access
+        :param dataset: Dataset identifier, indicating which channel or layer you want to access
+        :param orientation: Image plane requested. Vaid options include xy,xz or yz
+        :param tile_size: Size of each tile in pixels
+        :param resolution: Integer indicating the level in the resolution hierarchy (0 = native)
+        :param x_args: the tile index or range of tile indices in the X dimension
+        :param y_args: the tile index or range of tile indices in the Y dimension
+        :param z_args: the tile index or range of tile indices in the Z dimension
+        :param t_idx: the tile index in the T dimension
+        :return:
+        """
+        # Process request and validate once for every tile in the mosaic
+        try:
+            req = BossRequest(request)
+        except BossError as err:
+            return err.to_http()
+
+        tile_size = int(tile_size)
+        corner = (req.get_x_start(), req.get_y_start(), req.get_z_start())
+        extent = (req.get_x_span(), req.get_y_span(), req.get_z_span())
+        time_range = [req.get_time().start, req.get_time().stop]
+
+        num_tiles = extent[0] * extent[1] * extent[2] // (tile_size * tile_size)
+        if num_tiles > settings.MOSAIC_MAX_TILES:
+            return BossHTTPError("Mosaic request has more than {} tiles. Reduce mosaic dimensions."
+                                 .format(settings.MOSAIC_MAX_TILES), ErrorCodes.REQUEST_TOO_LARGE)
+
+        # Convert to Resource
+        resource = spdb.project.BossResourceDjango(req)
+
+        # Get bit depth
+        try:
+            bit_depth = resource.get_bit_depth()
+        except ValueError:
+            return BossHTTPError("Datatype does not match channel/layer", ErrorCodes.DATATYPE_DOES_NOT_MATCH)
+
+        # Annotation labels are rendered as colored overlays instead of grayscale images
+        label_options = None
+        if resource.get_data_type() == 'uint64':
+            try:
+                label_options = labels.parse_label_options(request.query_params)
+            except BossError as err:
+                return err.to_http()
+
+        # Make sure cutout request is under 1GB UNCOMPRESSED
+        total_bytes = extent[0] * extent[1] * extent[2] * len(req.get_time()) * (bit_depth/8)
+        if total_bytes > settings.CUTOUT_MAX_SIZE:
+            return BossHTTPError("Cutout request is over 1GB when uncompressed. Reduce cutout dimensions.",
+                                 ErrorCodes.REQUEST_TOO_LARGE)
+
+        # Return early if the client already has the current version of every tile in the mosaic
+        etag, last_modified = versioning.get_validators(
+            request, [(req.get_lookup_key(), req.get_resolution(), req.get_time(), corner, extent)])
+        response = versioning.not_modified(request, etag, last_modified)
+        if response:
+            return response
+
+        def cutout(band):
+            # Each worker gets its own interface to the SPDB cache
+            cache = spdb.spatialdb.SpatialDB(settings.KVIO_SETTINGS,
+                                             settings.STATEIO_CONFIG,
+                                             settings.OBJECTIO_CONFIG)
+            band_corner, band_extent = band
+            data = cache.cutout(resource, band_corner, band_extent, req.get_resolution(), time_range)
+            return data.data[0]
+
+        # Fetch each row of tiles concurrently, then assemble and encode once
+        bands = mosaic.get_row_bands(corner, extent, orientation, tile_size)
+        with ThreadPoolExecutor(max_workers=min(len(bands), settings.TILE_FETCH_MAX_WORKERS)) as executor:
+            volume = np.concatenate(list(executor.map(cutout, bands)), axis=mosaic.ROW_AXIS[orientation])
+
+        frames = mosaic.get_frames(volume, orientation)
+        try:
+            columns = mosaic.parse_columns(request.query_params.get('columns'), frames.shape[0])
+        except BossError as err:
+            return err.to_http()
+
+        if label_options is not None:
+            rgba = np.stack([labels.render_labels(frame, **label_options) for frame in frames])
+            img = Image.fromarray(mosaic.tile_frames(rgba, columns), 'RGBA')
+        else:
+            img = Image.fromarray(np.ascontiguousarray(mosaic.tile_frames(frames, columns)))
+
+        return versioning.set_validators(Response(img), etag, last_modified)
@@ -21,7 +21,7 @@ from rest_framework.response import Response
 from bosscore.error import BossKeycloakError, BossHTTPError, ErrorCodes
 from bosscore.models import BossRole
 from bosscore.serializers import UserSerializer, BossRoleSerializer
-from bosscore.privileges import check_role
+from bosscore.privileges import check_role, set_local_role
 
 from bossutils.keycloak import KeyCloakClient, KeyCloakError
 from bossutils.logger import BossLogger
@@ -215,6 +215,7 @@ class BossUserRole(APIView):
         try:
             with KeyCloakClient('BOSS') as kc:
                 response = kc.map_role_to_user(user_name, role_name)
+                set_local_role(user_name, role_name, True)
                 return Response(status=201)
 
         except KeyCloakError:
@@ -238,6 +239,7 @@ class BossUserRole(APIView):
         try:
             with KeyCloakClient('BOSS') as kc:
                 response = kc.remove_role_from_user(user_name, role_name)
+                set_local_role(user_name, role_name, False)
                 return Response(status=204)
 
         except KeyCloakError: